@@ -0,0 +1,129 @@
+# dispatch.py
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, Optional, Set
+
+from livekit import api
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMPTY_TIMEOUT_SECONDS = 120
+
+
+class RoomPreparer:
+    """Creates a room and dispatches the agent to it while the client is still connecting.
+
+    Without it, the room only exists once the client joins with its token, so the
+    worker gets the job, connects and loads the session after the user's audio
+    is already flowing. ``schedule`` is called when a token is issued. It creates
+    the room in the background, so token responses do not wait for the LiveKit API.
+
+    Workers without an agent name are dispatched automatically to every new
+    room, however it was created, so creating the room is enough. Workers
+    registered with ``AGENT_NAME`` need an explicit dispatch, and this must be
+    the same name. The dispatch is part of the CreateRoom request, but LiveKit
+    applies it only when it actually creates the room. A room that already
+    existed (created by a client join, or re-created after LiveKit closed it)
+    gets no agent that way, so the room's dispatches are then listed and one is
+    created if the agent is missing. A retried token, or one issued by another
+    service process, finds the dispatch and does not add a second agent.
+    The dispatch metadata names the participant the agent should wait for, when
+    the room was requested for a single participant.
+
+    Nothing is remembered once a preparation finishes: the room may be closed
+    and re-created by the client at any time, so every token checks it again.
+    Concurrent requests for the same room share one preparation.
+    """
+
+    def __init__(self, lkapi: api.LiveKitAPI, agent_name: str = "",
+                 empty_timeout: int = DEFAULT_EMPTY_TIMEOUT_SECONDS):
+        self.lkapi = lkapi
+        self.agent_name = agent_name
+        self.empty_timeout = empty_timeout
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def schedule(self, room: str, identity: Optional[str] = None) -> asyncio.Task:
+        """Prepare ``room`` in the background unless it is being prepared already.
+
+        Args:
+            room: Room the token was issued for
+            identity: Participant the agent should wait for; None for a shared room
+
+        Returns:
+            The preparation task (shared with concurrent requests for the room)
+        """
+        task = self._pending.get(room)
+        if task is not None:
+            return task
+        task = asyncio.create_task(self.prepare(room, identity))
+        self._pending[room] = task
+        self._tasks.add(task)
+        task.add_done_callback(lambda done: self._finished(room, done))
+        return task
+
+    def _finished(self, room: str, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if self._pending.get(room) is task:
+            del self._pending[room]
+
+    async def prepare(self, room: str, identity: Optional[str] = None) -> bool:
+        """Create ``room`` and make sure the agent is dispatched to it.
+
+        Args:
+            room: Room the token was issued for
+            identity: Participant the agent should wait for; None for a shared room
+
+        Returns:
+            bool: True if the room is ready for the agent, False if the calls failed
+        """
+        start = time.perf_counter()
+        metadata = json.dumps({"identity": identity}) if identity else ""
+        agents = []
+        if self.agent_name:
+            agents.append(api.RoomAgentDispatch(agent_name=self.agent_name, metadata=metadata))
+        try:
+            # CreateRoom returns the existing room (and ignores agents) if it is already there
+            await self.lkapi.room.create_room(
+                api.CreateRoomRequest(name=room, empty_timeout=self.empty_timeout, agents=agents)
+            )
+        except Exception as e:
+            # The client still creates the room on join, so this only loses the head start
+            logger.warning(f"failed to create room {room}: {e}")
+            if not self.agent_name:
+                return False
+
+        dispatched = False
+        if self.agent_name:
+            # Also after a failed CreateRoom: the room may exist already (e.g. the client joined)
+            try:
+                dispatched = await self._ensure_dispatch(room, metadata)
+            except Exception as e:
+                logger.warning(f"failed to dispatch agent {self.agent_name} to room {room}: {e}")
+                return False
+
+        logger.info(f"prepared room {room} for {identity or 'any participant'} in "
+                    f"{(time.perf_counter() - start) * 1000:.0f}ms"
+                    f"{' (dispatched to existing room)' if dispatched else ''}")
+        return True
+
+    async def _ensure_dispatch(self, room: str, metadata: str) -> bool:
+        """Dispatch the agent to ``room`` unless it already is (e.g. by CreateRoom).
+
+        Returns:
+            bool: True if this call created the dispatch
+        """
+        dispatches = await self.lkapi.agent_dispatch.list_dispatch(room_name=room)
+        if any(dispatch.agent_name == self.agent_name for dispatch in dispatches):
+            return False
+        await self.lkapi.agent_dispatch.create_dispatch(
+            api.CreateAgentDispatchRequest(agent_name=self.agent_name, room=room, metadata=metadata)
+        )
+        return True
+
+    async def wait_pending(self) -> None:
+        """Wait for preparations in flight (used on shutdown and in tests)."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
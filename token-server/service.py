@@ -0,0 +1,158 @@
+# service.py
+"""Production token service: the /getToken contract of server.py on an async server.
+
+Run with ``python service.py``. Settings are read once at startup from the
+environment: LIVEKIT_API_KEY, LIVEKIT_API_SECRET, LIVEKIT_URL, TOKEN_SERVER_HOST,
+TOKEN_SERVER_PORT, TOKEN_TTL_SECONDS, TOKEN_CACHE_TTL_SECONDS,
+TOKEN_CACHE_MAX_ENTRIES and TOKEN_BATCH_MAX. server.py stays the Flask dev server.
+
+With TOKEN_PREPARE_ROOMS=1 each issued token also creates its room, with the
+agent (AGENT_NAME, as registered by the worker) dispatched, in the background;
+ROOM_EMPTY_TIMEOUT is how long a prepared room waits for its client.
+"""
+import logging
+import os
+from collections import Counter
+from typing import Optional
+
+from aiohttp import web
+from livekit import api
+
+from dispatch import DEFAULT_EMPTY_TIMEOUT_SECONDS, RoomPreparer
+from tokens import (
+    DEFAULT_CACHE_MAX_ENTRIES,
+    DEFAULT_CACHE_TTL_SECONDS,
+    DEFAULT_TOKEN_TTL_SECONDS,
+    TokenIssuer,
+    default_identity,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROOM = 'default-room'
+DEFAULT_BATCH_MAX = 500
+
+ISSUER_KEY = web.AppKey("issuer", TokenIssuer)
+URL_KEY = web.AppKey("url", str)
+BATCH_MAX_KEY = web.AppKey("batch_max", int)
+PREPARER_KEY = web.AppKey("preparer", RoomPreparer)
+
+
+async def get_token(request: web.Request) -> web.Response:
+    """GET /getToken?identity=&room=&name= -> {"token", "url"}, as in server.py."""
+    identity = request.query.get('identity') or default_identity()
+    requested_room = request.query.get('room')
+    room = requested_room or DEFAULT_ROOM
+    name = request.query.get('name') or identity
+    token = request.app[ISSUER_KEY].issue(identity, room, name)
+    preparer = request.app.get(PREPARER_KEY)
+    if preparer is not None:
+        # The agent waits for this participant only in a room requested for them
+        preparer.schedule(room, identity if requested_room else None)
+    return web.json_response({'token': token, 'url': request.app[URL_KEY]})
+
+
+async def get_tokens(request: web.Request) -> web.Response:
+    """POST /getTokens with {"room": ..., "participants": [{"identity", "room", "name"}, ...]}.
+
+    Every field is optional, as for /getToken; "room" is the default for
+    participants without one. Returns {"url", "tokens": [{"identity", "room", "token"}]}.
+    """
+    try:
+        body = await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(text="body must be JSON")
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text="body must be a JSON object")
+
+    participants = body.get('participants')
+    if not isinstance(participants, list) or not all(isinstance(p, dict) for p in participants):
+        raise web.HTTPBadRequest(text="participants must be a list of objects")
+    batch_max = request.app[BATCH_MAX_KEY]
+    if len(participants) > batch_max:
+        raise web.HTTPRequestEntityTooLarge(max_size=batch_max, actual_size=len(participants))
+
+    tokens = request.app[ISSUER_KEY].issue_many(participants, body.get('room') or DEFAULT_ROOM)
+    preparer = request.app.get(PREPARER_KEY)
+    if preparer is not None:
+        # A room is requested for one participant if only they asked for it by name
+        own_rooms = Counter(p.get('room') for p in participants if p.get('room'))
+        for participant, issued in zip(participants, tokens):
+            single = own_rooms.get(participant.get('room')) == 1
+            preparer.schedule(issued['room'], issued['identity'] if single else None)
+    return web.json_response({'url': request.app[URL_KEY], 'tokens': tokens})
+
+
+async def health(request: web.Request) -> web.Response:
+    return web.json_response({'status': 'ok', 'cache': request.app[ISSUER_KEY].cache_stats()})
+
+
+def create_app(issuer: TokenIssuer, url: str, batch_max: int = DEFAULT_BATCH_MAX,
+               preparer: Optional[RoomPreparer] = None) -> web.Application:
+    """Build the token service around an issuer created once at startup.
+
+    Args:
+        issuer: Signs (and caches) the tokens
+        url: LiveKit server URL returned to clients
+        batch_max: Most participants accepted by one /getTokens request
+        preparer: Creates rooms and dispatches the agent as tokens are issued (optional)
+
+    Returns:
+        web.Application: The aiohttp application
+    """
+    app = web.Application()
+    app[ISSUER_KEY] = issuer
+    app[URL_KEY] = url
+    app[BATCH_MAX_KEY] = batch_max
+    if preparer is not None:
+        app[PREPARER_KEY] = preparer
+    app.router.add_get('/getToken', get_token)
+    app.router.add_post('/getTokens', get_tokens)
+    app.router.add_get('/health', health)
+    return app
+
+
+def app_from_env() -> web.Application:
+    issuer = TokenIssuer(
+        os.getenv('LIVEKIT_API_KEY', ''),
+        os.getenv('LIVEKIT_API_SECRET', ''),
+        ttl_seconds=int(os.getenv('TOKEN_TTL_SECONDS', str(DEFAULT_TOKEN_TTL_SECONDS))),
+        cache_ttl_seconds=float(os.getenv('TOKEN_CACHE_TTL_SECONDS', str(DEFAULT_CACHE_TTL_SECONDS))),
+        cache_max_entries=int(os.getenv('TOKEN_CACHE_MAX_ENTRIES', str(DEFAULT_CACHE_MAX_ENTRIES))),
+    )
+    url = os.getenv('LIVEKIT_URL', '')
+    if not url:
+        logger.warning("LIVEKIT_URL is not set; clients will get an empty server URL")
+    app = create_app(issuer, url, int(os.getenv('TOKEN_BATCH_MAX', str(DEFAULT_BATCH_MAX))))
+    if os.getenv('TOKEN_PREPARE_ROOMS', '0') == '1':
+        app.cleanup_ctx.append(_room_preparer)
+    return app
+
+
+async def _room_preparer(app: web.Application):
+    # The LiveKit API client owns an aiohttp session, so it is created on the running loop
+    lkapi = api.LiveKitAPI(app[URL_KEY], os.getenv('LIVEKIT_API_KEY'), os.getenv('LIVEKIT_API_SECRET'))
+    preparer = RoomPreparer(
+        lkapi,
+        agent_name=os.getenv('AGENT_NAME', ''),
+        empty_timeout=int(os.getenv('ROOM_EMPTY_TIMEOUT', str(DEFAULT_EMPTY_TIMEOUT_SECONDS))),
+    )
+    app[PREPARER_KEY] = preparer
+    logger.info(f"preparing rooms on token issue (agent_name={preparer.agent_name!r})")
+    yield
+    await preparer.wait_pending()
+    await lkapi.aclose()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    # reuse_port lets several copies of the service share the port, one per core.
+    # There is no access log because it would write one line per token during the
+    # top-of-hour burst.
+    web.run_app(
+        app_from_env(),
+        host=os.getenv('TOKEN_SERVER_HOST', '0.0.0.0'),
+        port=int(os.getenv('TOKEN_SERVER_PORT', '5000')),
+        reuse_port=True,
+        access_log=None,
+    )
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script for RoomPreparer room creation and agent dispatch (with a fake LiveKit API).
+"""
+import asyncio
+import json
+
+from dispatch import RoomPreparer
+
+
+class FakeRoomService:
+    """CreateRoom as LiveKit applies it: agents are dispatched only when the room is new."""
+
+    def __init__(self, lkapi: "FakeLiveKitAPI"):
+        self.lkapi = lkapi
+
+    async def create_room(self, request):
+        await asyncio.sleep(0.01)
+        if self.lkapi.fail_rooms:
+            raise ConnectionError("livekit unavailable")
+        self.lkapi.calls.append(("create_room", request.name, request.empty_timeout))
+        if request.name not in self.lkapi.dispatches:
+            self.lkapi.dispatches[request.name] = list(request.agents)
+
+
+class FakeAgentDispatchService:
+    """ListDispatch / CreateDispatch over the rooms of the fake RoomService."""
+
+    def __init__(self, lkapi: "FakeLiveKitAPI"):
+        self.lkapi = lkapi
+
+    async def list_dispatch(self, room_name):
+        await asyncio.sleep(0.01)
+        if self.lkapi.fail_dispatches:
+            raise ConnectionError("livekit unavailable")
+        self.lkapi.calls.append(("list_dispatch", room_name))
+        return list(self.lkapi.dispatches.get(room_name, []))
+
+    async def create_dispatch(self, request):
+        await asyncio.sleep(0.01)
+        self.lkapi.calls.append(("create_dispatch", request.room))
+        self.lkapi.dispatches.setdefault(request.room, []).append(request)
+        return request
+
+
+class FakeLiveKitAPI:
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        # Room name -> agents dispatched to it
+        self.dispatches = {}
+        self.fail_rooms = self.fail_dispatches = fail
+        self.room = FakeRoomService(self)
+        self.agent_dispatch = FakeAgentDispatchService(self)
+
+    def client_join(self, room: str) -> None:
+        """A client joining creates the room, without any named agent."""
+        self.dispatches.setdefault(room, [])
+
+    def close_room(self, room: str) -> None:
+        self.dispatches.pop(room, None)
+
+
+async def test_room_preparer():
+    print("Room Preparer Test Results")
+    print("=" * 50)
+
+    print("\n1. Concurrent tokens for one room create it with the agent dispatched once")
+    print("-" * 30)
+    lkapi = FakeLiveKitAPI()
+    preparer = RoomPreparer(lkapi, agent_name="tutor", empty_timeout=120)
+    tasks = [preparer.schedule("lesson-1", "student-1") for _ in range(10)]
+    assert all(task is tasks[0] for task in tasks)
+    await preparer.wait_pending()
+    assert lkapi.calls == [("create_room", "lesson-1", 120), ("list_dispatch", "lesson-1")]
+    [dispatch] = lkapi.dispatches["lesson-1"]
+    assert dispatch.agent_name == "tutor" and json.loads(dispatch.metadata) == {"identity": "student-1"}
+    print(lkapi.calls)
+
+    print("\n2. Later tokens check the room again without adding a second agent")
+    print("-" * 30)
+    assert await preparer.schedule("lesson-1", "student-1") is True
+    # Another preparation (a retry, or another service process) finds the dispatch too
+    other = RoomPreparer(lkapi, agent_name="tutor")
+    assert await other.schedule("lesson-1", "student-1") is True
+    assert len(lkapi.dispatches["lesson-1"]) == 1
+    assert not any(call[0] == "create_dispatch" for call in lkapi.calls)
+    print(lkapi.calls[2:])
+
+    print("\n3. A room created or re-created by the client gets the agent dispatched")
+    print("-" * 30)
+    lkapi.client_join("lesson-4")
+    assert await preparer.schedule("lesson-4", "student-4") is True
+    [dispatch] = lkapi.dispatches["lesson-4"]
+    assert dispatch.agent_name == "tutor" and json.loads(dispatch.metadata) == {"identity": "student-4"}
+    # LiveKit closes the room, then the client joins again before its next token
+    lkapi.close_room("lesson-1")
+    lkapi.client_join("lesson-1")
+    assert await preparer.schedule("lesson-1", "student-1") is True
+    assert [d.agent_name for d in lkapi.dispatches["lesson-1"]] == ["tutor"]
+    print([call for call in lkapi.calls if call[0] == "create_dispatch"])
+
+    print("\n4. A shared room is dispatched without an identity")
+    print("-" * 30)
+    await preparer.schedule("default-room")
+    assert lkapi.dispatches["default-room"][0].metadata == ""
+    print("no identity metadata")
+
+    print("\n5. Without an agent name only the room is created")
+    print("-" * 30)
+    lkapi = FakeLiveKitAPI()
+    await RoomPreparer(lkapi).schedule("lesson-2", "student-2")
+    assert lkapi.calls == [("create_room", "lesson-2", 120)] and not lkapi.dispatches["lesson-2"]
+    print(lkapi.calls)
+
+    print("\n6. A failed CreateRoom still dispatches to a room the client created")
+    print("-" * 30)
+    lkapi = FakeLiveKitAPI()
+    lkapi.fail_rooms = True
+    lkapi.client_join("lesson-5")
+    assert await RoomPreparer(lkapi, agent_name="tutor").schedule("lesson-5", "student-5") is True
+    assert [d.agent_name for d in lkapi.dispatches["lesson-5"]] == ["tutor"]
+    print(lkapi.calls)
+
+    print("\n7. API failures are logged and retried on the next token")
+    print("-" * 30)
+    lkapi = FakeLiveKitAPI(fail=True)
+    preparer = RoomPreparer(lkapi, agent_name="tutor")
+    assert await preparer.schedule("lesson-3", "student-3") is False
+    lkapi.fail_rooms = lkapi.fail_dispatches = False
+    assert await preparer.schedule("lesson-3", "student-3") is True
+    print(lkapi.calls)
+
+
+if __name__ == "__main__":
+    asyncio.run(test_room_preparer())
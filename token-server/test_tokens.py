@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script for TokenIssuer signing, caching and batch issuance.
+"""
+import base64
+import hashlib
+import hmac
+import json
+
+from tokens import TokenIssuer
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def decode(token: str, secret: str) -> dict:
+    """Verify the HS256 signature and return the claims."""
+    header, payload, signature = token.split(".")
+    expected = hmac.new(secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
+    assert base64.urlsafe_b64decode(signature + "==") == expected, "bad signature"
+    assert json.loads(base64.urlsafe_b64decode(header + "==")) == {"alg": "HS256", "typ": "JWT"}
+    return json.loads(base64.urlsafe_b64decode(payload + "=="))
+
+
+def test_token_issuer():
+    print("Token Issuer Test Results")
+    print("=" * 50)
+
+    clock = FakeClock()
+    issuer = TokenIssuer("key", "secret", ttl_seconds=3600, cache_ttl_seconds=30, cache_max_entries=2, clock=clock)
+
+    print("\n1. Claims match AccessToken with room_join/room_create grants")
+    print("-" * 30)
+    claims = decode(issuer.issue("student-1", "lesson-1"), "secret")
+    assert claims["sub"] == claims["identity"] == claims["name"] == "student-1"
+    assert claims["iss"] == "key"
+    assert claims["exp"] - claims["nbf"] == 3600
+    assert claims["video"]["room"] == "lesson-1"
+    assert claims["video"]["roomJoin"] and claims["video"]["roomCreate"]
+    print(claims)
+
+    print("\n2. Repeated requests within the cache TTL get the same token")
+    print("-" * 30)
+    first = issuer.issue("student-1", "lesson-1")
+    clock.now += 10
+    assert issuer.issue("student-1", "lesson-1") == first
+    assert issuer.issue("student-1", "lesson-2") != first
+    clock.now += 30
+    assert issuer.issue("student-1", "lesson-1") != first
+    print(issuer.cache_stats())
+
+    print("\n3. The cache stays within its size limit")
+    print("-" * 30)
+    for index in range(5):
+        issuer.issue(f"student-{index}", "lesson-1")
+    assert issuer.cache_stats()["entries"] == 2
+    print(issuer.cache_stats())
+
+    print("\n4. Batch issuance fills in identities and the default room")
+    print("-" * 30)
+    issued = issuer.issue_many([{"identity": "a"}, {"identity": "b", "room": "other"}, {}], "lesson-3")
+    assert [token["room"] for token in issued] == ["lesson-3", "other", "lesson-3"]
+    assert issued[2]["identity"].startswith("user-")
+    for token in issued:
+        assert decode(token["token"], "secret")["sub"] == token["identity"]
+    print([(token["identity"], token["room"]) for token in issued])
+
+    print("\n5. Missing credentials are rejected")
+    print("-" * 30)
+    try:
+        TokenIssuer("", "secret")
+    except ValueError as error:
+        print(f"ValueError: {error}")
+    else:
+        raise AssertionError("expected ValueError")
+
+
+if __name__ == "__main__":
+    test_token_issuer()
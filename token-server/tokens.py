@@ -0,0 +1,145 @@
+# tokens.py
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Same default lifetime as livekit.api.AccessToken
+DEFAULT_TOKEN_TTL_SECONDS = 6 * 60 * 60
+DEFAULT_CACHE_TTL_SECONDS = 30
+DEFAULT_CACHE_MAX_ENTRIES = 10000
+
+_JWT_HEADER = {"alg": "HS256", "typ": "JWT"}
+
+
+def _b64url(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _json_segment(value: dict) -> bytes:
+    return _b64url(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+
+def default_identity() -> str:
+    return 'user-' + os.urandom(4).hex()
+
+
+class TokenIssuer:
+    """Issues LiveKit access tokens with one signing context and a short-lived cache.
+
+    The API key and secret are set once. The JWT header is encoded once, and an
+    HMAC-SHA256 keyed with the secret is kept and copied for each token, so issuing
+    a token is one JSON dump and one HMAC update. Tokens carry the same claims as
+    ``api.AccessToken(...).with_identity().with_name().with_grants(VideoGrants(
+    room_join=True, room=room, room_create=True)).to_jwt()`` in server.py.
+
+    Repeated (identity, room, name) requests within ``cache_ttl_seconds`` get the
+    same token back. This absorbs the burst at the top of the hour, when every
+    client (and every retry) asks for a token at once. A cached token is at most
+    ``cache_ttl_seconds`` older than a fresh one, which is small next to its lifetime.
+    """
+
+    def __init__(self, api_key: str, api_secret: str,
+                 ttl_seconds: int = DEFAULT_TOKEN_TTL_SECONDS,
+                 cache_ttl_seconds: float = DEFAULT_CACHE_TTL_SECONDS,
+                 cache_max_entries: int = DEFAULT_CACHE_MAX_ENTRIES,
+                 clock: Callable[[], float] = time.time):
+        if not api_key or not api_secret:
+            raise ValueError("api_key and api_secret must be set")
+        self.api_key = api_key
+        self.ttl_seconds = ttl_seconds
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.cache_max_entries = cache_max_entries
+        self._clock = clock
+        self._header = _json_segment(_JWT_HEADER) + b"."
+        self._mac = hmac.new(api_secret.encode("utf-8"), digestmod=hashlib.sha256)
+        self._cache: "OrderedDict[Tuple[str, str, str], Tuple[str, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def claims(self, identity: str, room: str, name: str, now: int) -> dict:
+        """JWT claims for a participant allowed to join (and create) a room."""
+        claims = {
+            "identity": identity,
+            "video": {
+                "roomCreate": True,
+                "roomJoin": True,
+                "room": room,
+                "canPublish": True,
+                "canSubscribe": True,
+                "canPublishData": True,
+            },
+            "sub": identity,
+            "iss": self.api_key,
+            "nbf": now,
+            "exp": now + self.ttl_seconds,
+        }
+        if name:
+            claims["name"] = name
+        return claims
+
+    def sign(self, claims: dict) -> str:
+        signing_input = self._header + _json_segment(claims)
+        mac = self._mac.copy()
+        mac.update(signing_input)
+        return (signing_input + b"." + _b64url(mac.digest())).decode("ascii")
+
+    def issue(self, identity: str, room: str, name: Optional[str] = None) -> str:
+        """Token for ``identity`` in ``room``, from the cache if one was issued recently.
+
+        Args:
+            identity: Participant identity (required, as with AccessToken)
+            room: Room to join
+            name: Display name; defaults to the identity
+
+        Returns:
+            str: Signed JWT
+        """
+        if not identity or not room:
+            raise ValueError("identity and room must be set when joining a room")
+        name = name or identity
+        key = (identity, room, name)
+        now = self._clock()
+
+        cached = self._cache.get(key)
+        if cached is not None and now - cached[1] < self.cache_ttl_seconds:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return cached[0]
+
+        self.misses += 1
+        token = self.sign(self.claims(identity, room, name, int(now)))
+        if self.cache_ttl_seconds > 0:
+            self._cache[key] = (token, now)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_max_entries:
+                self._cache.popitem(last=False)
+        return token
+
+    def issue_many(self, participants: List[Dict[str, str]], default_room: str) -> List[Dict[str, str]]:
+        """Issue tokens for several participants at once.
+
+        Args:
+            participants: Dicts with an optional "identity", "room" and "name"
+            default_room: Room for entries without one
+
+        Returns:
+            List of {"identity", "room", "token"} in the order given
+        """
+        issued = []
+        for participant in participants:
+            identity = participant.get("identity") or default_identity()
+            room = participant.get("room") or default_room
+            issued.append({
+                "identity": identity,
+                "room": room,
+                "token": self.issue(identity, room, participant.get("name")),
+            })
+        return issued
+
+    def cache_stats(self) -> Dict[str, int]:
+        return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses}
@@ -1,5 +1,22 @@
 #!/bin/bash
-# Download files at runtime when env vars are available
-python src/main.py download-files
-# Start the application
-exec python src/main.py start
\ No newline at end of file
+# Download files at runtime when env vars are available, once per container:
+# the marker lives next to the downloaded models, so a restart skips this step
+MODEL_CACHE_DIR="${HF_HOME:-$HOME/.cache/huggingface}"
+DOWNLOAD_MARKER="$MODEL_CACHE_DIR/.agent-files-downloaded"
+if [ ! -f "$DOWNLOAD_MARKER" ]; then
+    python src/main.py download-files && mkdir -p "$MODEL_CACHE_DIR" && touch "$DOWNLOAD_MARKER"
+fi
+# With EMBEDDING_BACKEND=remote, one embedding server per pod holds the model for every job process.
+# It is restarted whenever it exits; job processes reconnect on their next request
+if [ "$EMBEDDING_BACKEND" = "remote" ]; then
+    (
+        cd src || exit 1
+        while true; do
+            python -m services.embedding_server
+            echo "embedding server exited with status $?, restarting in 1s" >&2
+            sleep 1
+        done
+    ) &
+fi
+# Start the application (add --profile-startup to log import and init times)
+exec python src/main.py start "$@"
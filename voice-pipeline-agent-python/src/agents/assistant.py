@@ -6,29 +6,96 @@ from livekit.plugins import (
 )
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 from livekit import rtc
-from typing import AsyncIterable
+from contextlib import aclosing
+from typing import Any, AsyncIterable, Optional, Tuple
 import asyncio
+import time
 
+from agents.fanout_stream import FanoutStream
+from config.settings import Settings
 from services.instructions_service import InstructionsService
+from services.latency_metrics import get_latency_recorder
+from services.pronunciation_lexicon import PronunciationLexicon
+from services.text_batcher import TextBatcher
 from services.text_preprocessor import TTSPreprocessor
 
+# Consumers of each generation's (original, processed) text chunks
+TTS_CONSUMER = "tts"
+TRANSCRIPTION_CONSUMER = "transcription"
+
+# How many chunks TTS or transcription may fall behind the LLM before it is paused
+MAX_BUFFERED_CHUNKS = 256
+
+
+class ReplyGeneration:
+    """One llm_node call: its chunk stream and the speech it will be played as.
+
+    ``stream`` carries (original, processed) chunk pairs to tts_node and
+    transcription_node. The nodes call check_interrupted() at every delta,
+    batch and audio frame, so a barge-in (the speech handle's ``interrupted``
+    flag, set as soon as the session decides to interrupt) stops all three
+    within one chunk instead of when the framework gets to cancel them.
+    """
+
+    def __init__(self, speech: Any = None):
+        """Initialize the generation.
+
+        Args:
+            speech: The SpeechHandle this reply belongs to, if known
+        """
+        self.stream: FanoutStream[Tuple[str, str]] = FanoutStream(
+            (TTS_CONSUMER, TRANSCRIPTION_CONSUMER), max_buffered=MAX_BUFFERED_CHUNKS
+        )
+        self.speech = speech
+        # perf_counter() time the interruption was detected
+        self.interrupted_at: Optional[float] = None
+
+    def check_interrupted(self) -> bool:
+        """Return True if the reply was interrupted, stopping it on first detection."""
+        if self.interrupted_at is None and self.speech is not None and self.speech.interrupted:
+            self.interrupt()
+        return self.interrupted_at is not None
+
+    def interrupt(self) -> None:
+        """Stop the reply: drop the buffered chunks and end both consumers' cursors.
+
+        The LLM deltas TTS had not read yet are counted as wasted_llm_deltas:
+        they were generated (and paid for) but will never be spoken.
+        """
+        if self.interrupted_at is not None:
+            return
+        self.interrupted_at = time.perf_counter()
+        # The flushed normalizer tail ("", text) is not an LLM delta
+        unread = sum(1 for original, _ in self.stream.unread(TTS_CONSUMER) if original)
+        self.stream.cancel()
+        recorder = get_latency_recorder()
+        recorder.count("interrupted_replies")
+        recorder.count("wasted_llm_deltas", unread)
+
 
 class Assistant(Agent):
-    def __init__(self, instructions_service: InstructionsService) -> None:
+    def __init__(self, instructions_service: InstructionsService,
+                 instructions: Optional[str] = None,
+                 pronunciation_lexicon: Optional[PronunciationLexicon] = None,
+                 settings: Optional[Settings] = None) -> None:
         # This project is configured to use Deepgram STT, OpenAI LLM and Cartesia TTS plugins
         # Other great providers exist like Cerebras, ElevenLabs, Groq, Play.ht, Rime, and more
         # Learn more and pick the best one for your app:
         # https://docs.livekit.io/agents/plugins
         self.instructions_service = instructions_service
-        self.prompt_postprocessor = TTSPreprocessor()
+        self.prompt_postprocessor = TTSPreprocessor(lexicon=pronunciation_lexicon)
+        self._settings = settings or Settings()
         
-        self._original_chunks = []
-        self._processed_chunks = []
-        self._chunks_ready = asyncio.Event()
-        self._generation_complete = False
+        # Each llm_node call publishes its generation to these queues; tts_node and
+        # transcription_node take the next generation from their own queue
+        self._tts_generations: "asyncio.Queue[ReplyGeneration]" = asyncio.Queue()
+        self._transcription_generations: "asyncio.Queue[ReplyGeneration]" = asyncio.Queue()
+        # Speech handle of the most recently created reply, which the next llm_node call generates
+        self._latest_speech: Any = None
 
         super().__init__(
-            instructions=self.instructions_service.get_system_instructions(),
+            # Prefer instructions resolved ahead of time (e.g. via the async RAG path)
+            instructions=instructions or self.instructions_service.get_system_instructions(),
             stt=deepgram.STT(),
             llm=openai.LLM.with_deepseek(model="deepseek-chat"),
             tts=cartesia.TTS(model="sonic-2"),
@@ -37,12 +104,20 @@ class Assistant(Agent):
         )
 
     async def on_enter(self):
+        # Each reply's speech handle is our interruption signal
+        self.session.on("speech_created", self._on_speech_created)
         # The agent should be polite and greet the user when it joins :)
         self.session.generate_reply(
             instructions=self.instructions_service.get_greeting_instructions(), 
             allow_interruptions=True
         )
 
+    async def on_exit(self):
+        self.session.off("speech_created", self._on_speech_created)
+
+    def _on_speech_created(self, event) -> None:
+        self._latest_speech = event.speech_handle
+
     async def llm_node(
         self, chat_ctx, tools, model_settings
     ) -> AsyncIterable[str]:
@@ -50,54 +125,147 @@ class Assistant(Agent):
         Override the LLM node to apply prompt postprocessing to LLM output 
         before it goes downstream to TTS. This implementation ensures proper
         spacing between chunks while maintaining real-time streaming.
+        
+        Every chunk is published as an (original, processed) pair on a per-generation
+        FanoutStream, read by tts_node (processed text) and transcription_node
+        (original text) through their own cursors.
+        
+        When the user interrupts, the LLM request is closed at the next delta and
+        the text not yet spoken is dropped. The deltas TTS never read, plus the
+        one received after the interruption, are counted as wasted_llm_deltas.
+        This also holds when the framework cancels the node before it saw the
+        interruption.
         """
         
-        self._original_chunks = []
-        self._processed_chunks = []
-        self._chunks_ready = asyncio.Event()
-        self._generation_complete = False
+        generation = ReplyGeneration(self._latest_speech)
+        self._publish_generation(generation)
+        recorder = get_latency_recorder()
         
-        # First get the LLM output using the default implementation
-        llm_output = Agent.default.llm_node(self, chat_ctx, tools, model_settings)
-                
-        async for chunk in llm_output:
-                        
-            if hasattr(chunk, 'delta') and chunk.delta:
-                delta = chunk.delta
-                if hasattr(delta, 'content'):
-                    text_content = str(delta.content)
-
-                    processed_content = self.prompt_postprocessor.process_for_tts(text_content)
-                    self._original_chunks.append(text_content)
-                    self._processed_chunks.append(processed_content)
-                    self._chunks_ready.set()
-                    delta.content = processed_content
-                    
-            yield chunk
-        self._generation_complete = True
-        self._chunks_ready.set()
+        # Deltas are normalized as a stream so dates, URLs, markdown spans, etc.
+        # split across deltas are still rewritten; at most the last word is held back
+        normalizer = self.prompt_postprocessor.create_stream_normalizer()
+        # Time spent in our own text preprocessing for this generation
+        preprocess_time = 0.0
+        
+        try:
+            # First get the LLM output using the default implementation. aclosing()
+            # ends the LLM request as soon as we stop reading, not when it is collected.
+            async with aclosing(Agent.default.llm_node(self, chat_ctx, tools, model_settings)) as llm_output:
+                async for chunk in llm_output:
+                    if generation.check_interrupted():
+                        # Generated after the user barged in: paid for, never spoken
+                        recorder.count("wasted_llm_deltas")
+                        break
+                                
+                    if hasattr(chunk, 'delta') and chunk.delta:
+                        delta = chunk.delta
+                        if hasattr(delta, 'content'):
+                            text_content = str(delta.content)
+
+                            start = time.perf_counter()
+                            processed_content = normalizer.push(text_content)
+                            preprocess_time += time.perf_counter() - start
+                            if not await generation.stream.send((text_content, processed_content)):
+                                # Interrupted while waiting for a slow consumer
+                                recorder.count("wasted_llm_deltas")
+                                break
+                            delta.content = processed_content
+                            
+                    yield chunk
+            
+            # Interrupted: the normalizer's pending text is dropped with it
+            if generation.stream.cancelled:
+                return
+            
+            start = time.perf_counter()
+            tail = normalizer.flush()
+            preprocess_time += time.perf_counter() - start
+            if tail:
+                await generation.stream.send(("", tail))
+                yield tail
+            generation.stream.close()
+            recorder.record("llm_preprocess", preprocess_time)
+        finally:
+            # Interrupted (or failed): end both consumers and drop what they had not read.
+            # Cancelled by the framework on a barge-in: record the interruption first.
+            if not generation.stream.closed and not generation.check_interrupted():
+                generation.stream.cancel()
+
+    def _publish_generation(self, generation: ReplyGeneration) -> None:
+        """Hand a new generation to both consumers, dropping any they never picked up."""
+        for queue, consumer in ((self._tts_generations, TTS_CONSUMER),
+                                (self._transcription_generations, TRANSCRIPTION_CONSUMER)):
+            while not queue.empty():
+                queue.get_nowait().stream.detach(consumer)
+            queue.put_nowait(generation)
+
+    @staticmethod
+    async def _next_generation(queue: "asyncio.Queue[ReplyGeneration]") -> ReplyGeneration:
+        """Wait for the next generation, skipping ones interrupted before this consumer started."""
+        while True:
+            generation = await queue.get()
+            if not generation.stream.cancelled:
+                return generation
 
     async def tts_node (
             self, text: AsyncIterable[str], model_settings: ModelSettings
     ) -> AsyncIterable[rtc.AudioFrame]:
         
+        generation = await self._next_generation(self._tts_generations)
+        recorder = get_latency_recorder()
+        
+        first_text_at: Optional[float] = None
+        
         async def processed_text():
-            chunk_index = 0
-            while True:
-                await self._chunks_ready.wait()
-                
-                while chunk_index < len(self._processed_chunks):
-                    chunk = self._processed_chunks[chunk_index]
-                    yield chunk
-                    chunk_index += 1
-
-                if self._generation_complete and chunk_index >= len(self._processed_chunks):
+            async for _, processed in generation.stream.cursor(TTS_CONSUMER):
+                if processed:
+                    yield processed
+        
+        # Send the first clause right away, then sentence/phrase-sized batches
+        batcher = TextBatcher(
+            mode=self._settings.tts_batch_mode,
+            first_min_chars=self._settings.tts_first_batch_min_chars,
+            min_chars=self._settings.tts_batch_min_chars,
+            max_chars=self._settings.tts_batch_max_chars,
+        )
+        
+        # Characters sent to TTS, and the audio that came back, for waste accounting
+        sent_characters = 0
+        first_frame_at: Optional[float] = None
+        audio_seconds = 0.0
+        
+        async def batched_text():
+            nonlocal first_text_at, sent_characters
+            async for batch in batcher.batch(processed_text()):
+                # Also drops what the batcher flushes when an interruption ends the cursor
+                if generation.check_interrupted():
                     break
-
-                self._chunks_ready.clear()
+                if first_text_at is None:
+                    first_text_at = time.perf_counter()
+                sent_characters += len(batch)
+                yield batch
         
-        async for audio_frame in Agent.default.tts_node(self, processed_text(), model_settings) :
-            yield audio_frame
+        try:
+            # Leaving the loop closes the TTS stream, so nothing queued is synthesized after an interruption
+            async with aclosing(Agent.default.tts_node(self, batched_text(), model_settings)) as audio_frames:
+                async for audio_frame in audio_frames:
+                    if generation.check_interrupted():
+                        break
+                    if first_frame_at is None:
+                        first_frame_at = time.perf_counter()
+                        if first_text_at is not None:
+                            # From the first text batch sent to TTS to the first synthesized frame
+                            recorder.record("tts_first_frame", first_frame_at - first_text_at)
+                    audio_seconds += getattr(audio_frame, "duration", 0.0)
+                    yield audio_frame
+        finally:
+            # Also reached when the framework cancels the node on a barge-in before we saw it
+            if generation.check_interrupted() and sent_characters:
+                # Audio plays out in real time from the first frame; the share of the
+                # synthesized audio not played yet estimates the characters paid for in vain
+                played = 0.0 if first_frame_at is None else generation.interrupted_at - first_frame_at
+                unplayed = 1.0 if audio_seconds <= 0 else 1.0 - min(max(played, 0.0), audio_seconds) / audio_seconds
+                recorder.count("wasted_tts_characters", round(sent_characters * unplayed))
 
     async def transcription_node(
         self, text: AsyncIterable[str], model_settings: ModelSettings
@@ -108,16 +276,10 @@ class Assistant(Agent):
         the processed text for better pronunciation.
         """
 
-        chunk_index = 0
-        while True:
-            await self._chunks_ready.wait()
-
-            while chunk_index < len(self._original_chunks):
-                chunk = self._original_chunks[chunk_index]
-                yield chunk
-                chunk_index += 1
-
-            if self._generation_complete and chunk_index >= len(self._original_chunks):
+        generation = await self._next_generation(self._transcription_generations)
+        
+        async for original, _ in generation.stream.cursor(TRANSCRIPTION_CONSUMER):
+            if generation.check_interrupted():
                 break
-
-            self._chunks_ready.clear()
\ No newline at end of file
+            if original:
+                yield original
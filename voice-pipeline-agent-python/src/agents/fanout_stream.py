@@ -0,0 +1,180 @@
+import asyncio
+from collections import deque
+from itertools import islice
+from typing import AsyncIterator, Deque, Dict, Generic, Iterable, List, Set, TypeVar
+
+T = TypeVar("T")
+
+
+class FanoutStream(Generic[T]):
+    """Single-producer stream read independently by a fixed set of named consumers.
+
+    Each consumer reads through its own cursor, so one slow consumer never makes
+    another miss or re-read items. Items are dropped as soon as every consumer
+    has read them. The producer is held back once an attached consumer (one that
+    has started iterating) is ``max_buffered`` items behind. A consumer that has
+    not attached yet keeps its items buffered but does not block the producer,
+    so a consumer that never shows up cannot stall the stream; detach() it to
+    release those items.
+
+    Everything runs on one event loop, so no locks are needed. Waiters sleep on
+    an ``asyncio.Event`` that is replaced (not cleared) on every notification,
+    so a wake-up can never be lost between checking the state and waiting.
+    """
+
+    def __init__(self, consumers: Iterable[str], max_buffered: int = 64):
+        """Initialize the stream.
+
+        Args:
+            consumers: Names of the consumers that will read the stream
+            max_buffered: Maximum number of items an attached consumer may lag behind
+        """
+        if max_buffered <= 0:
+            raise ValueError("max_buffered must be positive")
+
+        self._items: Deque[T] = deque()
+        # Absolute index of self._items[0]
+        self._offset = 0
+        # Absolute index of the next item for each consumer that has not detached
+        self._positions: Dict[str, int] = {name: 0 for name in consumers}
+        self._attached: Set[str] = set()
+        self._max_buffered = max_buffered
+        self._closed = False
+        self._cancelled = False
+        self._readable = asyncio.Event()
+        self._writable = asyncio.Event()
+
+    @property
+    def closed(self) -> bool:
+        """True once the producer has finished (normally or by cancel())."""
+        return self._closed
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    @property
+    def buffered(self) -> int:
+        """Number of items still held for at least one consumer."""
+        return len(self._items)
+
+    async def send(self, item: T) -> bool:
+        """Append an item, waiting while an attached consumer is too far behind.
+
+        Args:
+            item: The item to publish
+
+        Returns:
+            bool: False if the stream was cancelled and the item was dropped
+        """
+        if self._closed and not self._cancelled:
+            raise RuntimeError("send() called on a closed FanoutStream")
+
+        while not self._cancelled and self._lag() >= self._max_buffered:
+            await self._writable.wait()
+
+        if self._cancelled:
+            return False
+
+        self._items.append(item)
+        self._readable = self._notify(self._readable)
+        return True
+
+    def unread(self, name: str) -> List[T]:
+        """Return the buffered items the named consumer has not read yet.
+
+        Args:
+            name: The consumer name
+
+        Returns:
+            The items in order; empty once the consumer has detached
+        """
+        position = self._positions.get(name)
+        if position is None:
+            return []
+        return list(islice(self._items, position - self._offset, None))
+
+    def close(self) -> None:
+        """Mark the end of the stream; consumers finish after reading what is buffered."""
+        if self._closed:
+            return
+        self._closed = True
+        self._readable = self._notify(self._readable)
+
+    def cancel(self) -> None:
+        """Abort the stream: drop buffered items and end every cursor and pending send()."""
+        if self._cancelled:
+            return
+        self._cancelled = True
+        self._closed = True
+        self._items.clear()
+        self._readable = self._notify(self._readable)
+        self._writable = self._notify(self._writable)
+
+    def detach(self, name: str) -> None:
+        """Stop tracking a consumer, releasing the items only it still needed.
+
+        Args:
+            name: The consumer name
+        """
+        if self._positions.pop(name, None) is None:
+            return
+        self._attached.discard(name)
+        self._trim()
+        self._writable = self._notify(self._writable)
+
+    async def cursor(self, name: str) -> AsyncIterator[T]:
+        """Iterate over the stream as the named consumer.
+
+        The consumer is detached when iteration ends or is cancelled.
+
+        Args:
+            name: One of the consumer names given to the constructor
+
+        Yields:
+            The items in order, until the stream is closed or cancelled
+        """
+        if name not in self._positions:
+            raise KeyError(f"Unknown or detached consumer: {name}")
+        if name in self._attached:
+            raise RuntimeError(f"Consumer {name} is already attached")
+
+        self._attached.add(name)
+        try:
+            while not self._cancelled:
+                position = self._positions[name]
+                if position < self._offset + len(self._items):
+                    item = self._items[position - self._offset]
+                    self._positions[name] = position + 1
+                    self._trim()
+                    self._writable = self._notify(self._writable)
+                    yield item
+                elif self._closed:
+                    break
+                else:
+                    await self._readable.wait()
+        finally:
+            self.detach(name)
+
+    def _lag(self) -> int:
+        """Items the slowest attached consumer still has to read."""
+        end = self._offset + len(self._items)
+        return max((end - self._positions[name] for name in self._attached), default=0)
+
+    def _trim(self) -> None:
+        """Drop items every remaining consumer has read."""
+        if not self._positions:
+            self._offset += len(self._items)
+            self._items.clear()
+            return
+
+        consumed = min(self._positions.values()) - self._offset
+        for _ in range(consumed):
+            self._items.popleft()
+        self._offset += consumed
+
+    @staticmethod
+    def _notify(event: asyncio.Event) -> asyncio.Event:
+        """Wake everything waiting on event and return a fresh event for the next wait."""
+        event.set()
+        return asyncio.Event()
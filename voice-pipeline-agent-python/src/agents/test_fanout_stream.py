@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script for the FanoutStream per-generation chunk stream.
+"""
+import asyncio
+
+from fanout_stream import FanoutStream
+
+
+async def test_fanout_stream():
+    """Exercise independent cursors, backpressure, trimming and cancellation."""
+
+    print("Fanout Stream Test Results")
+    print("=" * 50)
+
+    print("\n1. Independent cursors see every item")
+    print("-" * 30)
+    stream = FanoutStream(("tts", "transcription"), max_buffered=4)
+
+    async def produce(count):
+        for i in range(count):
+            await stream.send(i)
+        stream.close()
+
+    async def consume(name, delay):
+        items = []
+        async for item in stream.cursor(name):
+            items.append(item)
+            await asyncio.sleep(delay)
+        return items
+
+    _, tts, transcription = await asyncio.gather(
+        produce(20), consume("tts", 0.002), consume("transcription", 0)
+    )
+    assert tts == list(range(20)) and transcription == list(range(20))
+    assert stream.buffered == 0
+    print(f"tts: {len(tts)} items, transcription: {len(transcription)} items")
+
+    print("\n2. Backpressure only from attached consumers")
+    print("-" * 30)
+    stream = FanoutStream(("tts", "transcription"), max_buffered=2)
+    for i in range(5):
+        # Nobody is attached, so sends never block
+        await asyncio.wait_for(stream.send(i), timeout=1)
+    cursor = stream.cursor("tts")
+    assert await cursor.__anext__() == 0
+    blocked = asyncio.ensure_future(stream.send(5))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    for expected in (1, 2, 3):
+        assert await cursor.__anext__() == expected
+    await asyncio.wait_for(blocked, timeout=1)
+    print(f"Buffered while transcription is not attached: {stream.buffered}")
+
+    print("\n3. Detaching releases memory")
+    print("-" * 30)
+    assert stream.unread("transcription") == [0, 1, 2, 3, 4, 5] and stream.unread("tts") == [4, 5]
+    stream.detach("transcription")
+    assert stream.buffered == 2 and stream.unread("transcription") == []
+    print(f"Buffered after detaching transcription: {stream.buffered}")
+
+    print("\n4. Cancellation ends cursors and pending sends")
+    print("-" * 30)
+    stream = FanoutStream(("tts",), max_buffered=1)
+    waiting = asyncio.ensure_future(consume("tts", 0.1))
+    await stream.send("a")
+    await asyncio.sleep(0.01)
+    await stream.send("b")
+    pending_send = asyncio.ensure_future(stream.send("c"))
+    await asyncio.sleep(0.01)
+    stream.cancel()
+    assert await asyncio.wait_for(pending_send, timeout=1) is False
+    items = await asyncio.wait_for(waiting, timeout=1)
+    assert items == ["a"] and stream.buffered == 0
+    print(f"Consumer stopped after {items}")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_fanout_stream())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test script for interruption-aware cancellation in the Assistant nodes (runs with fake plugins).
+"""
+import asyncio
+import os
+import sys
+
+# The fakes live in benchmarks/ and the Assistant imports config/ and services/ from the parent directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["METRICS_SNAPSHOT_DIR"] = ""
+
+from benchmarks.fake_plugins import (
+    FakeModelSettings,
+    FakeSpeechCreatedEvent,
+    FakeSpeechHandle,
+    empty_text,
+    install_fake_plugins,
+)
+
+install_fake_plugins()
+
+from agents.assistant import Assistant
+from services.latency_metrics import get_latency_recorder
+
+REPLY = ("Great job! Let's try some minimal pairs. Say bat and bath slowly, then a little faster. "
+         "Notice how your tongue touches your teeth. Which pair feels hardest? ") * 3
+
+
+async def run_reply(assistant, speech, interrupt_after=None, cancel=False):
+    """Run llm_node, tts_node and transcription_node for one reply, interrupting after some deltas.
+
+    With cancel, the node tasks are also cancelled right after speech.interrupt(),
+    as the framework does, before any node gets to see the flag.
+    """
+    chunks = [REPLY[i:i + 4] for i in range(0, len(REPLY), 4)]
+    assistant.llm.load(chunks, [5.0] * len(chunks), paced=True)
+    assistant.tts.reset()
+    assistant._on_speech_created(FakeSpeechCreatedEvent(speech))
+    frames, transcript = [], []
+
+    async def run_llm():
+        async for chunk in assistant.llm_node(None, [], FakeModelSettings()):
+            if interrupt_after is not None and assistant.llm.emitted == interrupt_after:
+                speech.interrupt()
+                if cancel:
+                    for task in tasks:
+                        task.cancel()
+
+    async def run_tts():
+        async for frame in assistant.tts_node(empty_text(), FakeModelSettings()):
+            frames.append(frame)
+
+    async def run_transcription():
+        async for text in assistant.transcription_node(empty_text(), FakeModelSettings()):
+            transcript.append(text)
+
+    tasks = [asyncio.create_task(run()) for run in (run_llm, run_tts, run_transcription)]
+    results = await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), timeout=10)
+    for result in results:
+        if isinstance(result, BaseException) and not (cancel and isinstance(result, asyncio.CancelledError)):
+            raise result
+    return chunks, frames, "".join(transcript)
+
+
+async def test_interruption():
+    """Check that an interrupted reply stops the LLM, TTS and transcription within one chunk."""
+
+    print("Interruption Test Results")
+    print("=" * 50)
+
+    assistant = Assistant(None, instructions="test")
+    recorder = get_latency_recorder()
+
+    print("\n1. An uninterrupted reply is streamed completely")
+    print("-" * 30)
+    chunks, frames, transcript = await run_reply(assistant, FakeSpeechHandle())
+    assert transcript == REPLY
+    assert assistant.llm.emitted == len(chunks) and assistant.llm.closed
+    assert not recorder.counters().get("interrupted_replies")
+    print(f"{len(chunks)} deltas, {len(frames)} TTS batches")
+
+    print("\n2. A barge-in stops the LLM request at the next delta")
+    print("-" * 30)
+    chunks, frames, transcript = await run_reply(assistant, FakeSpeechHandle(), interrupt_after=30)
+    assert assistant.llm.closed
+    assert assistant.llm.emitted == 31, assistant.llm.emitted
+    assert len(transcript) <= 30 * 4
+    # Processed text is rewritten for TTS, so compare lengths
+    assert len("".join(assistant.tts.batches)) <= 30 * 4 + 40
+    counters = recorder.counters()
+    # TTS kept up, so only the delta received after the barge-in was wasted
+    assert counters["interrupted_replies"] == 1 and counters["wasted_llm_deltas"] == 1
+    print(f"LLM stopped after {assistant.llm.emitted} of {len(chunks)} deltas, counters: {counters}")
+
+    print("\n3. Deltas TTS had not read when the reply was interrupted are wasted")
+    print("-" * 30)
+    # TTS waits for its first audio byte while the LLM keeps generating
+    assistant.tts.first_byte_latency = 1.0
+    wasted_before = recorder.counters()["wasted_llm_deltas"]
+    chunks, frames, transcript = await run_reply(assistant, FakeSpeechHandle(), interrupt_after=30)
+    assistant.tts.first_byte_latency = 0.0
+    wasted = recorder.counters()["wasted_llm_deltas"] - wasted_before
+    # TTS got one sentence (10 deltas) and the batcher may hold the delta after it;
+    # the rest of the 30, plus the delta after the barge-in, was never read
+    spoken = len("".join(assistant.tts.batches)) // 4
+    unread = wasted - 1
+    assert spoken < 15 and 30 - spoken - 1 <= unread <= 30 - spoken, (spoken, wasted)
+    print(f"TTS got {spoken} of 30 deltas, wasted {wasted}")
+
+    print("\n4. Nodes cancelled right after the barge-in still account for it")
+    print("-" * 30)
+    assistant.tts.first_byte_latency = 1.0
+    before = recorder.counters()
+    chunks, frames, transcript = await run_reply(assistant, FakeSpeechHandle(), interrupt_after=30, cancel=True)
+    assistant.tts.first_byte_latency = 0.0
+    counters = recorder.counters()
+    assert assistant.llm.closed and not frames
+    assert counters["interrupted_replies"] - before["interrupted_replies"] == 1
+    spoken = len("".join(assistant.tts.batches)) // 4
+    wasted = counters["wasted_llm_deltas"] - before["wasted_llm_deltas"]
+    # No delta arrives after the barge-in: only the unread ones are wasted
+    assert 30 - spoken - 1 <= wasted <= 30 - spoken, (spoken, wasted)
+    # Nothing was played, so every character sent to TTS was wasted
+    wasted_characters = counters["wasted_tts_characters"] - before.get("wasted_tts_characters", 0)
+    assert wasted_characters == len("".join(assistant.tts.batches)) > 0, wasted_characters
+    print(f"wasted {wasted} deltas and {wasted_characters} TTS characters")
+
+    print("\n5. The next reply is not affected")
+    print("-" * 30)
+    chunks, frames, transcript = await run_reply(assistant, FakeSpeechHandle())
+    assert transcript == REPLY
+    print(f"{len(frames)} TTS batches")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_interruption())
@@ -0,0 +1,434 @@
+import asyncio
+import itertools
+import sys
+import time
+import types
+from typing import (
+    Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+)
+
+
+class FakeDelta:
+    """Mutable stand-in for a ChatChunk's delta (llm_node rewrites ``content``)."""
+
+    def __init__(self, content: str):
+        self.content = content
+
+
+class FakeChatChunk:
+    """Stand-in for livekit.agents.llm.ChatChunk, stamped with its emit time."""
+
+    def __init__(self, content: str):
+        self.delta = FakeDelta(content)
+        self.emitted_at = 0.0
+
+
+class FakeAudioFrame:
+    """One synthesized frame per text batch; only the batch text and its duration are kept."""
+
+    def __init__(self, text: str, duration: float = 0.0):
+        self.text = text
+        self.duration = duration
+
+
+class FakeLLM:
+    """Replays a recorded delta stream instead of calling the LLM API.
+
+    With ``paced`` the recorded gaps between deltas are slept, so consumers
+    see the stream at the model's real speed; otherwise deltas are emitted
+    back to back, which measures our own per-chunk overhead.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self.chunks: Sequence[str] = ()
+        self.delays_ms: Sequence[float] = ()
+        self.paced = False
+        # Deltas emitted by the last chat() and whether its stream was closed
+        self.emitted = 0
+        self.closed = False
+
+    @classmethod
+    def with_deepseek(cls, *args: Any, **kwargs: Any) -> "FakeLLM":
+        return cls()
+
+    def load(self, chunks: Sequence[str], delays_ms: Optional[Sequence[float]] = None,
+             paced: bool = False) -> None:
+        self.chunks = chunks
+        self.delays_ms = delays_ms or [0.0] * len(chunks)
+        self.paced = paced
+
+    async def chat(self) -> AsyncIterator[FakeChatChunk]:
+        self.emitted = 0
+        self.closed = False
+        try:
+            for content, delay_ms in zip(self.chunks, self.delays_ms):
+                # Unpaced, still give the loop one pass per delta, like a network read would
+                await asyncio.sleep(delay_ms / 1000 if self.paced else 0)
+                chunk = FakeChatChunk(content)
+                chunk.emitted_at = time.perf_counter()
+                self.emitted += 1
+                yield chunk
+        finally:
+            self.closed = True
+
+
+class FakeTTS:
+    """Records the text batches it is asked to synthesize and when they arrived.
+
+    ``first_byte_latency`` is slept before the first frame of each synthesis,
+    like a streaming TTS's time to first byte. Frames last as long as their
+    text takes to say at ``chars_per_second``.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self.first_byte_latency = 0.0
+        self.chars_per_second = 15.0
+        self.batches: List[str] = []
+        self.batch_times: List[float] = []
+
+    def reset(self) -> None:
+        self.batches = []
+        self.batch_times = []
+
+    async def synthesize(self, text: AsyncIterable[str]) -> AsyncIterator[FakeAudioFrame]:
+        first = True
+        async for batch in text:
+            self.batch_times.append(time.perf_counter())
+            self.batches.append(batch)
+            if first and self.first_byte_latency:
+                await asyncio.sleep(self.first_byte_latency)
+            first = False
+            yield FakeAudioFrame(batch, len(batch) / self.chars_per_second)
+
+
+class FakeSTT:
+    def __init__(self, *args: Any, **kwargs: Any):
+        pass
+
+
+class FakeVAD:
+    @classmethod
+    def load(cls, *args: Any, **kwargs: Any) -> "FakeVAD":
+        return cls()
+
+
+class FakeNoiseCancellation:
+    def __init__(self, *args: Any, **kwargs: Any):
+        pass
+
+
+class FakeTurnDetector:
+    def __init__(self, *args: Any, **kwargs: Any):
+        pass
+
+
+class FakeModelSettings:
+    pass
+
+
+class FakeOptions:
+    """Stand-in for option containers (WorkerOptions, RoomInputOptions)."""
+
+    def __init__(self, **kwargs: Any):
+        self.__dict__.update(kwargs)
+
+
+class FakeAgent:
+    """The parts of livekit.agents.Agent that Assistant uses.
+
+    ``Agent.default`` nodes behave like the framework's: llm_node streams from
+    the agent's LLM and tts_node synthesizes with the agent's TTS.
+    """
+
+    def __init__(self, instructions: str, stt: Any = None, llm: Any = None, tts: Any = None,
+                 turn_detection: Any = None, **kwargs: Any):
+        self.instructions = instructions
+        self.stt = stt
+        self.llm = llm
+        self.tts = tts
+        self.turn_detection = turn_detection
+        self.session: Optional["FakeAgentSession"] = None
+
+    class default:
+        @staticmethod
+        async def llm_node(agent: "FakeAgent", chat_ctx: Any, tools: Any,
+                           model_settings: Any) -> AsyncIterator[FakeChatChunk]:
+            async for chunk in agent.llm.chat():
+                yield chunk
+
+        @staticmethod
+        async def tts_node(agent: "FakeAgent", text: AsyncIterable[str],
+                           model_settings: Any) -> AsyncIterator[FakeAudioFrame]:
+            async for frame in agent.tts.synthesize(text):
+                yield frame
+
+
+async def empty_text() -> AsyncIterator[str]:
+    """Text input for tts_node/transcription_node; Assistant reads its own fan-out instead."""
+    return
+    yield
+
+
+class SessionProfile:
+    """Timings of a simulated conversation, shared by every session of a load test.
+
+    Replies replay recorded LLM streams at ``llm_tokens_per_s`` after
+    ``llm_ttft``; their audio plays out at ``speech_chars_per_s``.
+    """
+
+    def __init__(self, streams: List[Dict[str, Any]], turns: int = 2, user_speech: float = 1.5,
+                 stt_delay: float = 0.3, llm_ttft: float = 0.35, llm_tokens_per_s: float = 40.0,
+                 tts_ttfb: float = 0.15, speech_chars_per_s: float = 15.0):
+        """Initialize the profile.
+
+        Args:
+            streams: Recorded replies (see benchmarks.text_pipeline.load_streams)
+            turns: User turns per session, after the greeting
+            user_speech: Seconds the user speaks per turn
+            stt_delay: Seconds from the end of speech to the final transcript
+            llm_ttft: Seconds to the first LLM delta
+            llm_tokens_per_s: LLM deltas per second after the first
+            tts_ttfb: Seconds from the first text batch to the first audio frame
+            speech_chars_per_s: Playout speed of the synthesized audio
+        """
+        self.streams = streams
+        self.turns = turns
+        self.user_speech = user_speech
+        self.stt_delay = stt_delay
+        self.llm_ttft = llm_ttft
+        self.llm_tokens_per_s = llm_tokens_per_s
+        self.tts_ttfb = tts_ttfb
+        self.speech_chars_per_s = speech_chars_per_s
+
+    def replies(self, offset: int = 0) -> Iterator[Tuple[List[str], List[float]]]:
+        """Endless (chunks, delays_ms) replies, starting at ``offset`` so sessions differ."""
+        gap_ms = 1000 / self.llm_tokens_per_s
+        for stream in itertools.islice(itertools.cycle(self.streams), offset % len(self.streams), None):
+            chunks = stream["chunks"]
+            yield chunks, [self.llm_ttft * 1000] + [gap_ms] * (len(chunks) - 1)
+
+
+class FakeSpeechHandle:
+    """The interruption flag of livekit's SpeechHandle."""
+
+    def __init__(self):
+        self.interrupted = False
+
+    def interrupt(self) -> None:
+        self.interrupted = True
+
+
+class FakeSpeechCreatedEvent:
+    def __init__(self, speech_handle: FakeSpeechHandle):
+        self.speech_handle = speech_handle
+
+
+class FakeParticipant:
+    def __init__(self, identity: str):
+        self.identity = identity
+
+
+class FakeRoom:
+    """A room with one simulated user; collects the session's time-to-first-audio per reply."""
+
+    def __init__(self, name: str, profile: SessionProfile, offset: int = 0):
+        self.name = name
+        self.profile = profile
+        self.offset = offset
+        self.first_audio: List[float] = []
+        self.conversation: Optional["asyncio.Task[None]"] = None
+
+
+class FakeStateEvent:
+    def __init__(self, old_state: str, new_state: str):
+        self.old_state = old_state
+        self.new_state = new_state
+
+
+class FakeAgentSession:
+    """Runs a scripted conversation against an agent, like AgentSession would.
+
+    Each user turn speaks for ``profile.user_speech``, waits ``stt_delay`` for
+    the transcript, then runs the agent's llm_node, tts_node and
+    transcription_node concurrently and plays the audio out. user_state_changed
+    and agent_state_changed are emitted as the real session does, so
+    entrypoint's handlers run too.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self._handlers: Dict[str, List[Callable[[Any], None]]] = {}
+        self._replies: List["asyncio.Task[None]"] = []
+        self._agent: Optional[FakeAgent] = None
+        self._room: Optional[FakeRoom] = None
+        self._reply_texts: Optional[Iterator[Tuple[List[str], List[float]]]] = None
+        self._agent_state = "initializing"
+
+    def on(self, event: str, callback: Callable[[Any], None]) -> None:
+        self._handlers.setdefault(event, []).append(callback)
+
+    def off(self, event: str, callback: Callable[[Any], None]) -> None:
+        if callback in self._handlers.get(event, []):
+            self._handlers[event].remove(callback)
+
+    def _emit(self, event: str, payload: Any) -> None:
+        for callback in self._handlers.get(event, []):
+            callback(payload)
+
+    def _set_agent_state(self, state: str) -> None:
+        old_state, self._agent_state = self._agent_state, state
+        self._emit("agent_state_changed", FakeStateEvent(old_state, state))
+
+    async def start(self, room: FakeRoom, agent: FakeAgent, **kwargs: Any) -> None:
+        self._room = room
+        self._agent = agent
+        self._reply_texts = room.profile.replies(room.offset)
+        agent.session = self
+        agent.tts.first_byte_latency = room.profile.tts_ttfb
+        agent.tts.chars_per_second = room.profile.speech_chars_per_s
+        self._set_agent_state("listening")
+        await agent.on_enter()
+        room.conversation = asyncio.create_task(self._converse())
+
+    def generate_reply(self, instructions: Optional[str] = None, **kwargs: Any) -> "asyncio.Task[None]":
+        reply = asyncio.create_task(self._reply(time.perf_counter()))
+        self._replies.append(reply)
+        return reply
+
+    async def _converse(self) -> None:
+        profile = self._room.profile
+        await asyncio.gather(*self._replies)
+        for _ in range(profile.turns):
+            self._emit("user_state_changed", FakeStateEvent("listening", "speaking"))
+            await asyncio.sleep(profile.user_speech)
+            self._emit("user_state_changed", FakeStateEvent("speaking", "listening"))
+            user_stopped = time.perf_counter()
+            await asyncio.sleep(profile.stt_delay)
+            await self._reply(user_stopped)
+
+    async def _reply(self, started: float) -> None:
+        agent, profile = self._agent, self._room.profile
+        chunks, delays_ms = next(self._reply_texts)
+        agent.llm.load(chunks, delays_ms, paced=True)
+        self._emit("speech_created", FakeSpeechCreatedEvent(FakeSpeechHandle()))
+        self._set_agent_state("thinking")
+
+        first_audio: Optional[float] = None
+        characters = 0
+
+        async def run_llm():
+            async for _ in agent.llm_node(None, [], FakeModelSettings()):
+                pass
+
+        async def run_tts():
+            nonlocal first_audio, characters
+            async for frame in agent.tts_node(empty_text(), FakeModelSettings()):
+                if first_audio is None:
+                    first_audio = time.perf_counter()
+                    self._room.first_audio.append(first_audio - started)
+                    self._set_agent_state("speaking")
+                characters += len(frame.text)
+
+        async def run_transcription():
+            async for _ in agent.transcription_node(empty_text(), FakeModelSettings()):
+                pass
+
+        await asyncio.gather(run_llm(), run_tts(), run_transcription())
+        if first_audio is not None:
+            # The audio keeps playing after synthesis finished
+            playout_end = first_audio + characters / profile.speech_chars_per_s
+            await asyncio.sleep(max(0.0, playout_end - time.perf_counter()))
+        self._set_agent_state("listening")
+
+
+class FakeJobProcess:
+    def __init__(self, userdata: Optional[Dict[str, Any]] = None):
+        self.userdata: Dict[str, Any] = userdata if userdata is not None else {}
+
+
+class FakeJob:
+    def __init__(self, metadata: str = ""):
+        self.metadata = metadata
+
+
+class FakeJobContext:
+    """A job for one FakeRoom; shutdown() runs the callbacks entrypoint registered."""
+
+    def __init__(self, proc: FakeJobProcess, room: FakeRoom, metadata: str = ""):
+        self.proc = proc
+        self.room = room
+        self.job = FakeJob(metadata)
+        self._shutdown_callbacks: List[Callable[[], Awaitable[None]]] = []
+
+    async def connect(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    async def wait_for_participant(self, *args: Any, **kwargs: Any) -> FakeParticipant:
+        return FakeParticipant(f"{self.room.name}-user")
+
+    def add_shutdown_callback(self, callback: Callable[[], Awaitable[None]]) -> None:
+        self._shutdown_callbacks.append(callback)
+
+    async def shutdown(self) -> None:
+        for callback in self._shutdown_callbacks:
+            await callback()
+
+
+class _FakeMetric:
+    pass
+
+
+class FakeUsageCollector:
+    def collect(self, agent_metrics: Any) -> None:
+        pass
+
+
+def _run_app(*args: Any, **kwargs: Any) -> None:
+    raise RuntimeError("the fake livekit plugins cannot run a worker")
+
+
+def _module(name: str, **attributes: Any) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    return module
+
+
+def install_fake_plugins() -> Dict[str, types.ModuleType]:
+    """Register fake livekit modules so agents.assistant and main import without the SDK.
+
+    Must be called before either is imported. Nothing touches the network:
+    STT, LLM, TTS, VAD, the turn detector and the session are all fakes.
+
+    Returns:
+        Dict of the modules that were installed, by name
+    """
+    rtc = _module("livekit.rtc", AudioFrame=FakeAudioFrame)
+    metrics = _module(
+        "livekit.agents.metrics", AgentMetrics=_FakeMetric, EOUMetrics=_FakeMetric, LLMMetrics=_FakeMetric,
+        TTSMetrics=_FakeMetric, UsageCollector=FakeUsageCollector, log_metrics=lambda agent_metrics: None
+    )
+    cli = _module("livekit.agents.cli", run_app=_run_app)
+    agents = _module(
+        "livekit.agents", Agent=FakeAgent, ModelSettings=FakeModelSettings, AgentSession=FakeAgentSession,
+        AutoSubscribe=types.SimpleNamespace(AUDIO_ONLY="audio_only"), JobContext=FakeJobContext,
+        JobProcess=FakeJobProcess, WorkerOptions=FakeOptions, RoomInputOptions=FakeOptions,
+        cli=cli, metrics=metrics
+    )
+    deepgram = _module("livekit.plugins.deepgram", STT=FakeSTT)
+    openai = _module("livekit.plugins.openai", LLM=FakeLLM)
+    cartesia = _module("livekit.plugins.cartesia", TTS=FakeTTS)
+    multilingual = _module("livekit.plugins.turn_detector.multilingual", MultilingualModel=FakeTurnDetector)
+    turn_detector = _module("livekit.plugins.turn_detector", multilingual=multilingual)
+    silero = _module("livekit.plugins.silero", VAD=FakeVAD)
+    noise_cancellation = _module("livekit.plugins.noise_cancellation", BVC=FakeNoiseCancellation)
+    plugins = _module(
+        "livekit.plugins", deepgram=deepgram, openai=openai, cartesia=cartesia, turn_detector=turn_detector,
+        silero=silero, noise_cancellation=noise_cancellation
+    )
+    livekit = _module("livekit", agents=agents, plugins=plugins, rtc=rtc)
+
+    modules = {module.__name__: module for module in (
+        livekit, rtc, agents, metrics, cli, plugins, deepgram, openai, cartesia, turn_detector, multilingual,
+        silero, noise_cancellation
+    )}
+    sys.modules.update(modules)
+    return modules
@@ -0,0 +1,181 @@
+import json
+import os
+import platform
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# Metrics compared against the baseline; lower is better for both. Tail
+# percentiles are reported but too noisy between runs to gate on.
+COMPARED_METRICS = ("p50_us", "peak_kib")
+
+# Differences below these are noise, whatever the relative change
+NOISE_FLOORS = {"p50_us": 2.0, "peak_kib": 16.0}
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class BenchmarkResult:
+    """Timings and allocations of one benchmark.
+
+    ``samples`` are per-operation latencies in seconds; an operation is
+    whatever the benchmark counts (a call, a delta chunk). ``extra`` holds
+    benchmark-specific figures (e.g. time to first TTS batch) that are
+    reported but not compared.
+    """
+
+    def __init__(self, name: str, unit: str, samples: List[float], elapsed: float,
+                 peak_bytes: int = 0, retained_bytes: int = 0,
+                 extra: Optional[Dict[str, float]] = None):
+        self.name = name
+        self.unit = unit
+        self.samples = samples
+        self.elapsed = elapsed
+        self.peak_bytes = peak_bytes
+        self.retained_bytes = retained_bytes
+        self.extra = extra or {}
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+        count = len(ordered)
+        summary = {
+            "unit": self.unit,
+            "ops": count,
+            "mean_us": round(sum(ordered) / count * 1e6, 3) if count else 0.0,
+            "p50_us": round(percentile(ordered, 0.50) * 1e6, 3),
+            "p95_us": round(percentile(ordered, 0.95) * 1e6, 3),
+            "p99_us": round(percentile(ordered, 0.99) * 1e6, 3),
+            "max_us": round(ordered[-1] * 1e6, 3) if count else 0.0,
+            "ops_per_s": round(count / self.elapsed, 1) if self.elapsed else 0.0,
+            "peak_kib": round(self.peak_bytes / 1024, 1),
+            "retained_kib": round(self.retained_bytes / 1024, 1),
+        }
+        summary.update({key: round(value, 3) for key, value in self.extra.items()})
+        return summary
+
+
+def measure(name: str, unit: str, run_round: Callable[[], Any], rounds: int,
+            warmup: int = 1) -> BenchmarkResult:
+    """Run a benchmark: warm-up, timed rounds, then one round under tracemalloc.
+
+    ``run_round`` performs one round and returns ``(samples, extra)``: the
+    per-operation latencies it measured and a dict of extra figures (or None).
+    Allocations are measured in a separate round because tracemalloc slows
+    every allocation down and would distort the timings.
+
+    Args:
+        name: Benchmark name, the key in the baseline file
+        unit: What one operation is (e.g. "call", "chunk")
+        run_round: Callable running one round
+        rounds: Number of timed rounds
+        warmup: Untimed rounds run first (caches, regex compilation)
+
+    Returns:
+        BenchmarkResult: Samples of all timed rounds plus the allocation figures
+    """
+    for _ in range(warmup):
+        run_round()
+
+    samples: List[float] = []
+    extras: Dict[str, List[float]] = {}
+    elapsed = 0.0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        round_samples, extra = run_round()
+        elapsed += time.perf_counter() - start
+        samples.extend(round_samples)
+        for key, value in (extra or {}).items():
+            extras.setdefault(key, []).append(value)
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        run_round()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(
+        name, unit, samples, elapsed,
+        peak_bytes=max(0, peak - before), retained_bytes=max(0, after - before),
+        extra={key: sorted(values)[len(values) // 2] for key, values in extras.items()},
+    )
+
+
+def environment() -> Dict[str, str]:
+    """Where a baseline was recorded; timings only compare on similar machines."""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+    }
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, Any]]) -> None:
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({"environment": environment(), "benchmarks": results}, file, indent=2)
+        file.write("\n")
+
+
+def compare_to_baseline(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any],
+                        tolerance: float = 0.3) -> List[str]:
+    """Find metrics that got worse than the baseline by more than ``tolerance``.
+
+    Args:
+        results: Benchmark summaries by name
+        baseline: Contents of a baseline file
+        tolerance: Allowed relative increase (0.3 = 30% slower or bigger)
+
+    Returns:
+        One message per regression; empty if there are none
+    """
+    regressions = []
+    for name, summary in results.items():
+        reference = baseline.get("benchmarks", {}).get(name)
+        if reference is None:
+            continue
+        for metric in COMPARED_METRICS:
+            if metric not in reference or metric not in summary:
+                continue
+            old, new = reference[metric], summary[metric]
+            if new - old <= NOISE_FLOORS[metric]:
+                continue
+            if new > old * (1 + tolerance):
+                change = (new / old - 1) * 100 if old else float("inf")
+                regressions.append(f"{name}.{metric}: {old} -> {new} (+{change:.0f}%)")
+    return regressions
+
+
+def format_table(results: Dict[str, Dict[str, Any]],
+                 baseline: Optional[Dict[str, Any]] = None) -> str:
+    """Render summaries as a fixed-width table, with p50 change against the baseline."""
+    columns = ("ops", "p50_us", "p95_us", "p99_us", "ops_per_s", "peak_kib", "retained_kib")
+    header = f"{'benchmark':<28}" + "".join(f"{column:>13}" for column in columns) + f"{'p50 vs base':>13}"
+    lines = [header, "-" * len(header)]
+    for name, summary in results.items():
+        line = f"{name:<28}" + "".join(f"{summary[column]:>13}" for column in columns)
+        reference = (baseline or {}).get("benchmarks", {}).get(name)
+        if reference and reference.get("p50_us"):
+            line += f"{(summary['p50_us'] / reference['p50_us'] - 1) * 100:>+12.0f}%"
+        lines.append(line)
+
+        extra = {key: value for key, value in summary.items()
+                 if key not in columns and key not in ("unit", "mean_us", "max_us")}
+        if extra:
+            lines.append(" " * 4 + ", ".join(f"{key}={value}" for key, value in extra.items()))
+    return "\n".join(lines)
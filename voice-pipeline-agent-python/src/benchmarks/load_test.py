@@ -0,0 +1,283 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import resource
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+# Load tests never write latency snapshots for the metrics endpoint
+os.environ["METRICS_SNAPSHOT_DIR"] = ""
+
+from benchmarks.fake_plugins import (
+    FakeJobContext,
+    FakeJobProcess,
+    FakeRoom,
+    FakeVAD,
+    SessionProfile,
+    install_fake_plugins,
+)
+
+install_fake_plugins()
+
+import main
+from benchmarks.harness import percentile
+from benchmarks.text_pipeline import load_streams
+from services.instructions_service import InstructionsService
+from services.pronunciation_lexicon import PronunciationLexicon
+from services.text_preprocessor import DEFAULT_PRONUNCIATIONS
+from services.week_prompt_store import get_week_prompt_store
+
+# How often the event loop monitor wakes up
+LAG_SAMPLE_INTERVAL = 0.05
+
+
+class FakeRagService:
+    """Stands in for RagService with a fixed search latency.
+
+    With ``cpu_bound`` the latency is spent spinning in Python while holding
+    the GIL, like embedding on the CPU, so it can stall the event loop even from
+    another thread; otherwise it sleeps, like waiting on Milvus.
+    """
+
+    def __init__(self, latency: float = 0.0, cpu_bound: bool = False):
+        self.latency = latency
+        self.cpu_bound = cpu_bound
+        self.searches = 0
+
+    def search_many(self, query_texts: List[str], limit: int = 1, **kwargs: Any) -> List[List[Dict[str, Any]]]:
+        self.searches += 1
+        if self.cpu_bound:
+            deadline = time.perf_counter() + self.latency
+            while time.perf_counter() < deadline:
+                pass
+        elif self.latency:
+            time.sleep(self.latency)
+        return [[{"id": i, "score": 1.0, "text": f"Simulated extract for: {query}"}]
+                for i, query in enumerate(query_texts)]
+
+    async def search_many_async(self, query_texts: List[str], limit: int = 1,
+                                **kwargs: Any) -> List[List[Dict[str, Any]]]:
+        return await asyncio.to_thread(self.search_many, query_texts, limit)
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a task that sleeps LAG_SAMPLE_INTERVAL.
+
+    Also samples the process RSS, so the peak of each load level is known even
+    though ru_maxrss only ever grows.
+    """
+
+    def __init__(self, interval: float = LAG_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.lags: List[float] = []
+        self.peak_rss = 0
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, time.perf_counter() - start - self.interval))
+            self.peak_rss = max(self.peak_rss, current_rss())
+
+
+def current_rss() -> int:
+    """Resident set size in bytes (Linux), else the peak RSS so far."""
+    try:
+        with open("/proc/self/statm", 'r') as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and KiB elsewhere
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def prewarm_process(rag_service: Optional[FakeRagService]) -> FakeJobProcess:
+    """Fill proc.userdata the way main.prewarm does, without loading real models or Milvus."""
+    proc = FakeJobProcess()
+    proc.userdata["vad"] = FakeVAD.load()
+    proc.userdata["rag_service"] = rag_service
+    instructions_service = InstructionsService(rag_service=None, defer_rag=True)
+    instructions_service.attach_rag_service(rag_service)
+    proc.userdata["instructions_service"] = instructions_service
+    lexicon = PronunciationLexicon(DEFAULT_PRONUNCIATIONS)
+    lexicon.compile()
+    proc.userdata["pronunciation_lexicon"] = lexicon
+    return proc
+
+
+async def run_session(index: int, proc: FakeJobProcess, profile: SessionProfile) -> List[float]:
+    """Run one job through main.entrypoint until its conversation ends.
+
+    Returns:
+        Seconds from the end of each user turn (or the greeting request) to the first audio frame
+    """
+    ctx = FakeJobContext(proc, FakeRoom(f"load-test-{index}", profile, offset=index))
+    try:
+        await main.entrypoint(ctx)
+        await ctx.room.conversation
+    finally:
+        await ctx.shutdown()
+    return ctx.room.first_audio
+
+
+async def run_level(sessions: int, profile: SessionProfile, ramp: float,
+                    rag_service: Optional[FakeRagService], cold_prompts: bool) -> Dict[str, Any]:
+    """Run ``sessions`` concurrent sessions in this process and measure the load.
+
+    Args:
+        sessions: Number of concurrent sessions
+        profile: Timings of every session's conversation
+        ramp: Seconds over which session starts are spread, like rooms arriving
+        rag_service: RAG stand-in shared by the sessions (None disables retrieval)
+        cold_prompts: Give every session its own InstructionsService, so each
+                      one builds its prompt (and retrieves) instead of hitting the
+                      process-wide prompt cache
+
+    Returns:
+        Dict with the time-to-first-audio and event loop lag percentiles (ms),
+        CPU use (% of one core), RSS (MiB) and the number of failed sessions.
+    """
+    shared = prewarm_process(rag_service)
+
+    def session_process() -> FakeJobProcess:
+        if not cold_prompts:
+            return shared
+        # Without a prewarmed service entrypoint creates one for the job
+        return FakeJobProcess({k: v for k, v in shared.userdata.items() if k != "instructions_service"})
+
+    async def delayed_session(index: int, proc: FakeJobProcess) -> List[float]:
+        await asyncio.sleep(ramp * index / max(sessions - 1, 1) if sessions > 1 else 0.0)
+        return await run_session(index, proc, profile)
+
+    monitor = LoopLagMonitor()
+    monitor.start()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+
+    processes = [session_process() for _ in range(sessions)]
+    outcomes = await asyncio.gather(
+        *(delayed_session(index, proc) for index, proc in enumerate(processes)), return_exceptions=True
+    )
+
+    cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+    await monitor.stop()
+    for proc in {id(proc): proc for proc in processes + [shared]}.values():
+        instructions_service = proc.userdata.get("instructions_service")
+        if instructions_service is not None:
+            instructions_service.stop_prompt_refresher()
+
+    errors = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+    for error in errors[:3]:
+        print(f"session failed: {error!r}", file=sys.stderr)
+    first_audio = sorted(value for outcome in outcomes if not isinstance(outcome, BaseException)
+                         for value in outcome)
+    lags = sorted(monitor.lags)
+
+    return {
+        "sessions": sessions,
+        "replies": len(first_audio),
+        "ttfa_p50_ms": round(percentile(first_audio, 0.50) * 1000, 1),
+        "ttfa_p95_ms": round(percentile(first_audio, 0.95) * 1000, 1),
+        "ttfa_max_ms": round(first_audio[-1] * 1000, 1) if first_audio else 0.0,
+        "lag_p50_ms": round(percentile(lags, 0.50) * 1000, 2),
+        "lag_p99_ms": round(percentile(lags, 0.99) * 1000, 2),
+        "lag_max_ms": round(lags[-1] * 1000, 2) if lags else 0.0,
+        "cpu_pct": round(cpu / wall * 100, 1) if wall else 0.0,
+        "rss_mib": round(max(monitor.peak_rss, current_rss()) / 2 ** 20, 1),
+        "errors": len(errors),
+        "wall_s": round(wall, 1),
+    }
+
+
+def format_report(levels: List[Dict[str, Any]]) -> str:
+    columns = list(levels[0].keys()) if levels else []
+    lines = ["".join(f"{column:>13}" for column in columns), "-" * 13 * len(columns)]
+    for level in levels:
+        lines.append("".join(f"{level[column]:>13}" for column in columns))
+    return "\n".join(lines)
+
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Drive N simulated sessions through entrypoint/Assistant in one process with fake plugins"
+    )
+    parser.add_argument("--sessions", default="1,10,25,50",
+                        help="comma-separated concurrent session counts, run one after another")
+    parser.add_argument("--turns", type=int, default=2, help="user turns per session after the greeting")
+    parser.add_argument("--ramp", type=float, default=1.0, help="seconds over which sessions start")
+    parser.add_argument("--user-speech", type=float, default=1.5, help="seconds the user speaks per turn")
+    parser.add_argument("--stt-delay", type=float, default=0.3, help="seconds to the final transcript")
+    parser.add_argument("--llm-ttft", type=float, default=0.35, help="seconds to the first LLM delta")
+    parser.add_argument("--llm-tokens-per-s", type=float, default=40.0, help="LLM deltas per second")
+    parser.add_argument("--tts-ttfb", type=float, default=0.15, help="seconds to the first audio frame")
+    parser.add_argument("--speech-chars-per-s", type=float, default=15.0,
+                        help="audio playout speed; raise it to shorten the run")
+    parser.add_argument("--rag-latency", type=float, default=None,
+                        help="enable a fake RAG service with this search latency (s)")
+    parser.add_argument("--rag-cpu", action="store_true", help="spend the RAG latency holding the GIL")
+    parser.add_argument("--cold-prompts", action="store_true",
+                        help="every session builds its own prompt instead of using the process cache")
+    parser.add_argument("--max-lag-ms", type=float, default=50.0,
+                        help="p99 event loop lag above which a level counts as stalled")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="keep the sessions' own output")
+    args = parser.parse_args(argv)
+
+    week_prompts = get_week_prompt_store()
+    if not week_prompts.current():
+        print(f"No week prompts in {week_prompts.path}: sessions only get the default instructions",
+              file=sys.stderr)
+
+    profile = SessionProfile(
+        load_streams(), turns=args.turns, user_speech=args.user_speech, stt_delay=args.stt_delay,
+        llm_ttft=args.llm_ttft, llm_tokens_per_s=args.llm_tokens_per_s, tts_ttfb=args.tts_ttfb,
+        speech_chars_per_s=args.speech_chars_per_s,
+    )
+    rag_service = None
+    if args.rag_latency is not None or args.cold_prompts:
+        # Cold prompts always go through the fake: entrypoint would otherwise load the real RagService
+        rag_service = FakeRagService(args.rag_latency or 0.0, cpu_bound=args.rag_cpu)
+
+    levels = []
+    with open(os.devnull, 'w') as devnull:
+        for sessions in (int(value) for value in args.sessions.split(",")):
+            searches = rag_service.searches if rag_service else 0
+            # InstructionsService prints every prompt it serves
+            with contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+                level = asyncio.run(run_level(sessions, profile, args.ramp, rag_service, args.cold_prompts))
+            if rag_service is not None:
+                level["rag_searches"] = rag_service.searches - searches
+            levels.append(level)
+            if not args.json:
+                print(f"{sessions} sessions: ttfa p95 {level['ttfa_p95_ms']}ms, "
+                      f"loop lag p99 {level['lag_p99_ms']}ms, cpu {level['cpu_pct']}%", file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(levels, indent=2))
+        return 0
+
+    print(format_report(levels))
+    if rag_service is not None and not rag_service.searches:
+        print("\nNo RAG searches ran: the week prompts have no query for the current day and period")
+    stalled = [level["sessions"] for level in levels if level["lag_p99_ms"] > args.max_lag_ms]
+    if stalled:
+        print(f"\nEvent loop stalls (p99 lag > {args.max_lag_ms:.0f}ms) from {stalled[0]} sessions")
+    else:
+        print(f"\nNo event loop stalls (p99 lag <= {args.max_lag_ms:.0f}ms) up to {levels[-1]['sessions']} sessions")
+    return 0
+
+
+if __name__ == "__main__":
+    # Run from the repository root: PYTHONPATH=src python -m benchmarks.load_test --sessions 1,10,50
+    raise SystemExit(main_cli())
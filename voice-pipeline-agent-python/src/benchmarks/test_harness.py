@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test script for the benchmark harness: statistics and baseline comparison.
+"""
+import time
+
+from harness import compare_to_baseline, measure, percentile
+
+
+def test_harness():
+    """Check percentiles, a measured benchmark and regression detection."""
+
+    print("Benchmark Harness Test Results")
+    print("=" * 50)
+
+    print("\n1. Nearest-rank percentiles")
+    print("-" * 30)
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 0.50) == 50.0
+    assert percentile(values, 0.95) == 95.0
+    assert percentile(values, 1.0) == 100.0
+    assert percentile([], 0.5) == 0.0
+    print("p50/p95/p100 of 1..100: 50/95/100")
+
+    print("\n2. Measuring a benchmark")
+    print("-" * 30)
+
+    def run_round():
+        samples = []
+        for _ in range(10):
+            start = time.perf_counter()
+            "".join(str(i) for i in range(200))
+            samples.append(time.perf_counter() - start)
+        return samples, {"items": 10}
+
+    summary = measure("join", "call", run_round, rounds=3, warmup=1).summary()
+    assert summary["ops"] == 30 and summary["items"] == 10
+    assert 0 < summary["p50_us"] <= summary["p95_us"] <= summary["max_us"]
+    assert summary["ops_per_s"] > 0 and summary["peak_kib"] > 0
+    print(summary)
+
+    print("\n3. Regressions against a baseline")
+    print("-" * 30)
+    baseline = {"benchmarks": {
+        "fast": {"p50_us": 100.0, "peak_kib": 50.0},
+        "tiny": {"p50_us": 0.5, "peak_kib": 1.0},
+    }}
+    results = {
+        "fast": {"p50_us": 150.0, "peak_kib": 55.0},
+        # 4x slower, but below the noise floor
+        "tiny": {"p50_us": 2.0, "peak_kib": 1.0},
+        "new": {"p50_us": 10.0, "peak_kib": 1.0},
+    }
+    regressions = compare_to_baseline(results, baseline, tolerance=0.3)
+    assert regressions == ["fast.p50_us: 100.0 -> 150.0 (+50%)"], regressions
+    assert compare_to_baseline(results, baseline, tolerance=0.6) == []
+    print(regressions)
+
+
+if __name__ == "__main__":
+    test_harness()
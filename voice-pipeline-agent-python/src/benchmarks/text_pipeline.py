@@ -0,0 +1,278 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Benchmarks never write latency snapshots for the metrics endpoint
+os.environ["METRICS_SNAPSHOT_DIR"] = ""
+
+from benchmarks.fake_plugins import FakeChatChunk, FakeModelSettings, empty_text, install_fake_plugins
+
+install_fake_plugins()
+
+from agents.assistant import Assistant
+from benchmarks.harness import (
+    BenchmarkResult,
+    compare_to_baseline,
+    environment,
+    format_table,
+    load_baseline,
+    measure,
+    save_baseline,
+)
+from config.settings import Settings
+from services.text_batcher import TextBatcher
+from services.text_preprocessor import TTSPreprocessor
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+STREAMS_PATH = os.path.join(BENCHMARKS_DIR, "data", "llm_streams.json")
+WEEK_PROMPTS_PATH = os.path.join(BENCHMARKS_DIR, "..", "data", "week-prompt.json")
+DEFAULT_BASELINE_PATH = os.path.join(BENCHMARKS_DIR, "baseline.json")
+
+
+def load_streams(path: str = STREAMS_PATH) -> List[Dict[str, Any]]:
+    """Recorded LLM replies: each has a name, its delta chunks and the gaps between them (ms)."""
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)["streams"]
+
+
+def load_week_prompts(path: str = WEEK_PROMPTS_PATH) -> List[str]:
+    """Every prompt in week-prompt.json, the input replace_book_title sees in production."""
+    with open(path, 'r', encoding='utf-8') as file:
+        week = json.load(file)
+    return [period["prompt"] for day in week.values() for period in day.values()]
+
+
+def _timed_calls(function: Callable[[str], Any], texts: List[str]) -> Tuple[List[float], None]:
+    samples = []
+    for text in texts:
+        start = time.perf_counter()
+        function(text)
+        samples.append(time.perf_counter() - start)
+    return samples, None
+
+
+def bench_process_for_tts(streams: List[Dict[str, Any]], rounds: int, warmup: int) -> List[BenchmarkResult]:
+    """TTSPreprocessor.process_for_tts on whole replies, as plain text and as markdown."""
+    preprocessor = TTSPreprocessor()
+    texts = ["".join(stream["chunks"]) for stream in streams]
+    return [
+        measure("process_for_tts", "call",
+                lambda: _timed_calls(preprocessor.process_for_tts, texts), rounds, warmup),
+        measure("process_for_tts_markdown", "call",
+                lambda: _timed_calls(lambda text: preprocessor.process_for_tts(text, is_markdown=True), texts),
+                rounds, warmup),
+    ]
+
+
+def bench_replace_book_title(rounds: int, warmup: int) -> List[BenchmarkResult]:
+    preprocessor = TTSPreprocessor()
+    prompts = load_week_prompts()
+    return [measure("replace_book_title", "call",
+                    lambda: _timed_calls(preprocessor.replace_book_title, prompts), rounds, warmup)]
+
+
+def bench_stream_normalizer(streams: List[Dict[str, Any]], rounds: int, warmup: int) -> List[BenchmarkResult]:
+    """StreamingTTSNormalizer.push per delta (and flush per reply), as llm_node calls it."""
+    preprocessor = TTSPreprocessor()
+
+    def run_round():
+        samples = []
+        for stream in streams:
+            normalizer = preprocessor.create_stream_normalizer()
+            for chunk in stream["chunks"]:
+                start = time.perf_counter()
+                normalizer.push(chunk)
+                samples.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            normalizer.flush()
+            samples.append(time.perf_counter() - start)
+        return samples, None
+
+    return [measure("stream_normalizer", "chunk", run_round, rounds, warmup)]
+
+
+def bench_text_batcher(streams: List[Dict[str, Any]], rounds: int, warmup: int) -> List[BenchmarkResult]:
+    """TextBatcher.push per delta with the configured batching settings."""
+    settings = Settings()
+
+    def run_round():
+        samples = []
+        for stream in streams:
+            batcher = TextBatcher(
+                mode=settings.tts_batch_mode,
+                first_min_chars=settings.tts_first_batch_min_chars,
+                min_chars=settings.tts_batch_min_chars,
+                max_chars=settings.tts_batch_max_chars,
+            )
+            for chunk in stream["chunks"]:
+                start = time.perf_counter()
+                batcher.push(chunk)
+                samples.append(time.perf_counter() - start)
+            batcher.flush()
+        return samples, None
+
+    return [measure("text_batcher", "chunk", run_round, rounds, warmup)]
+
+
+async def run_turn(assistant: Assistant, stream: Dict[str, Any], paced: bool = False) -> Dict[str, Any]:
+    """Replay one recorded reply through llm_node with tts_node and transcription_node reading it.
+
+    Args:
+        assistant: Assistant built with the fake plugins
+        stream: Recorded reply from load_streams()
+        paced: Replay with the recorded gaps between deltas
+
+    Returns:
+        Dict with the per-chunk llm_node latencies (s), the time from the first
+        delta to the first TTS batch (s), the TTS batches and the transcript.
+    """
+    assistant.llm.load(stream["chunks"], stream["delays_ms"], paced=paced)
+    assistant.tts.reset()
+    latencies: List[float] = []
+    transcript: List[str] = []
+    first_emitted: List[float] = []
+
+    async def run_llm():
+        async for chunk in assistant.llm_node(None, [], FakeModelSettings()):
+            if isinstance(chunk, FakeChatChunk):
+                latencies.append(time.perf_counter() - chunk.emitted_at)
+                if not first_emitted:
+                    first_emitted.append(chunk.emitted_at)
+
+    async def run_tts():
+        async for _ in assistant.tts_node(empty_text(), FakeModelSettings()):
+            pass
+
+    async def run_transcription():
+        async for text in assistant.transcription_node(empty_text(), FakeModelSettings()):
+            transcript.append(text)
+
+    await asyncio.gather(run_llm(), run_tts(), run_transcription())
+
+    batch_times = assistant.tts.batch_times
+    return {
+        "latencies": latencies,
+        "first_batch": batch_times[0] - first_emitted[0] if batch_times and first_emitted else 0.0,
+        "batches": list(assistant.tts.batches),
+        "transcript": "".join(transcript),
+    }
+
+
+def bench_llm_fanout(streams: List[Dict[str, Any]], rounds: int, warmup: int,
+                     paced: bool = False) -> List[BenchmarkResult]:
+    """Assistant.llm_node -> tts_node / transcription_node over the recorded replies.
+
+    Each sample is the time llm_node adds to one delta (normalization plus
+    publishing to both consumers). Unpaced, deltas arrive back to back with one
+    event loop pass between them, as network reads would give; paced, they
+    arrive at the recorded speed.
+    """
+    loop = asyncio.new_event_loop()
+    # The instructions service is only used by on_enter, which the benchmark never calls
+    assistant = Assistant(None, instructions="benchmark")
+
+    def run_round():
+        samples, first_batches, batches = [], [], 0
+        for stream in streams:
+            turn = loop.run_until_complete(run_turn(assistant, stream, paced=paced))
+            if turn["transcript"] != "".join(stream["chunks"]):
+                raise AssertionError(f"transcription of {stream['name']} does not match the LLM output")
+            samples.extend(turn["latencies"])
+            first_batches.append(turn["first_batch"])
+            batches += len(turn["batches"])
+        return samples, {
+            "first_tts_batch_us": sum(first_batches) / len(first_batches) * 1e6,
+            "tts_batches": batches,
+        }
+
+    try:
+        return [measure("llm_fanout_paced" if paced else "llm_fanout", "chunk", run_round, rounds, warmup)]
+    finally:
+        loop.close()
+
+
+def run_suite(rounds: int = 20, warmup: int = 2, paced: bool = False,
+              only: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Run the text-path benchmarks.
+
+    Args:
+        rounds: Timed rounds per benchmark (each round replays every recorded reply)
+        warmup: Untimed rounds per benchmark
+        paced: Also run the fan-out at the recorded LLM speed (slow: ~10s per round)
+        only: Names of benchmarks (or prefixes) to run; all if None
+
+    Returns:
+        Benchmark summaries by name
+    """
+    streams = load_streams()
+    suites = [
+        ("process_for_tts", lambda: bench_process_for_tts(streams, rounds, warmup)),
+        ("replace_book_title", lambda: bench_replace_book_title(rounds, warmup)),
+        ("stream_normalizer", lambda: bench_stream_normalizer(streams, rounds, warmup)),
+        ("text_batcher", lambda: bench_text_batcher(streams, rounds, warmup)),
+        ("llm_fanout", lambda: bench_llm_fanout(streams, rounds, warmup)),
+    ]
+    if paced:
+        suites.append(("llm_fanout_paced", lambda: bench_llm_fanout(streams, rounds, 0, paced=True)))
+
+    results = {}
+    for name, run in suites:
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        for result in run():
+            results[result.name] = result.summary()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the LLM text -> TTS/transcription path with recorded streams and fake plugins"
+    )
+    parser.add_argument("--rounds", type=int, default=20, help="timed rounds per benchmark")
+    parser.add_argument("--warmup", type=int, default=2, help="untimed rounds per benchmark")
+    parser.add_argument("--paced", action="store_true", help="also replay the fan-out at the recorded LLM speed")
+    parser.add_argument("--only", action="append", help="run only benchmarks starting with this name")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="baseline file to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed relative regression")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 if anything regressed")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.rounds, args.warmup, args.paced, args.only)
+    baseline = load_baseline(args.baseline)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(format_table(results, baseline))
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"\nSaved baseline to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+
+    if baseline.get("environment") != environment():
+        print(f"\nBaseline was recorded on {baseline.get('environment')}, timings may not be comparable")
+
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\nRegressions (> {args.tolerance:.0%} over baseline):", file=sys.stderr)
+        for regression in regressions:
+            print(f"  {regression}", file=sys.stderr)
+        return 1 if args.check else 0
+    print(f"\nNo regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    # Run from src/: python -m benchmarks.text_pipeline [--check] [--save-baseline]
+    raise SystemExit(main())
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from typing import Optional
 
 
@@ -17,6 +18,95 @@ class Settings:
         self.milvus_host: Optional[str] = os.getenv("MILVUS_HOST")
         self.milvus_token: Optional[str] = os.getenv("MILVUS_TOKEN")
         self.milvus_collection_name: str = "Neuromancer"
+        # Connections (pymilvus aliases) in the process-wide pool, i.e. parallel searches
+        self.milvus_pool_size: int = int(os.getenv("MILVUS_POOL_SIZE", "4"))
+        # Seconds between liveness probes when no request has succeeded (0 disables)
+        self.milvus_heartbeat_interval: float = float(os.getenv("MILVUS_HEARTBEAT_INTERVAL", "30"))
+        
+        # RAG configuration
+        self.rag_executor_workers: int = int(os.getenv("RAG_EXECUTOR_WORKERS", "4"))
+        self.rag_search_timeout: float = float(os.getenv("RAG_SEARCH_TIMEOUT", "5.0"))
+        
+        # Local vector index: "off", "fallback" (used when Milvus fails) or "prefer"
+        # (answer locally, Milvus only refreshes the snapshot every LOCAL_INDEX_REFRESH_INTERVAL)
+        self.local_index_mode: str = os.getenv("LOCAL_INDEX_MODE", "off")
+        self.local_index_dir: str = os.getenv(
+            "LOCAL_INDEX_DIR", os.path.join(tempfile.gettempdir(), "voice-agent-local-index")
+        )
+        self.local_index_refresh_interval: float = float(os.getenv("LOCAL_INDEX_REFRESH_INTERVAL", "3600"))
+        # Seconds before a failed snapshot refresh is retried
+        self.local_index_retry_interval: float = float(os.getenv("LOCAL_INDEX_RETRY_INTERVAL", "60"))
+        self.local_index_hnsw: bool = os.getenv("LOCAL_INDEX_HNSW", "0") == "1"
+        
+        # Embedding backend: "sentence-transformers" (reference), "onnx", "onnx-int8" or "remote".
+        # The ONNX backends load model.onnx / model_int8.onnx from EMBEDDING_MODEL_DIR
+        self.embedding_backend: str = os.getenv("EMBEDDING_BACKEND", "sentence-transformers")
+        self.embedding_model_dir: Optional[str] = os.getenv("EMBEDDING_MODEL_DIR")
+        self.embedding_threads: int = int(os.getenv("EMBEDDING_THREADS", "0"))
+        
+        # Shared embedding server (EMBEDDING_BACKEND=remote): one process per pod holds the
+        # model and batches the job processes' requests on EMBEDDING_SERVER_SOCKET
+        self.embedding_server_socket: str = os.getenv(
+            "EMBEDDING_SERVER_SOCKET", os.path.join(tempfile.gettempdir(), "voice-agent-embedding.sock")
+        )
+        self.embedding_server_backend: str = os.getenv("EMBEDDING_SERVER_BACKEND", "sentence-transformers")
+        self.embedding_server_max_batch: int = int(os.getenv("EMBEDDING_SERVER_MAX_BATCH", "32"))
+        self.embedding_server_batch_window_ms: float = float(os.getenv("EMBEDDING_SERVER_BATCH_WINDOW_MS", "2"))
+        
+        # Query embedding cache (EMBEDDING_CACHE_PATH enables the on-disk tier)
+        self.embedding_cache_size: int = int(os.getenv("EMBEDDING_CACHE_SIZE", "256"))
+        self.embedding_cache_ttl: float = float(os.getenv("EMBEDDING_CACHE_TTL", "86400"))
+        self.embedding_cache_path: Optional[str] = os.getenv("EMBEDDING_CACHE_PATH")
+        
+        # System prompt cache: how long before a bucket boundary the next prompt
+        # is built, and how often a degraded (RAG-less) prompt is retried
+        self.prompt_refresh_lead: float = float(os.getenv("PROMPT_REFRESH_LEAD", "300"))
+        self.prompt_retry_interval: float = float(os.getenv("PROMPT_RETRY_INTERVAL", "60"))
+        
+        # Week prompts file (default: src/data/week-prompt.json) and how often it is
+        # checked for edits, in seconds (0 disables reloading)
+        self.week_prompts_path: Optional[str] = os.getenv("WEEK_PROMPTS_PATH")
+        self.week_prompts_poll_interval: float = float(os.getenv("WEEK_PROMPTS_POLL_INTERVAL", "5"))
+        
+        # Extra pronunciation entries (JSON or word<TAB>pronunciation lines)
+        self.pronunciation_lexicon_path: Optional[str] = os.getenv("PRONUNCIATION_LEXICON_PATH")
+        
+        # TTS batching: "sentence", "clause" or "off". The first batch goes out at the
+        # first clause past TTS_FIRST_BATCH_MIN_CHARS; later ones need TTS_BATCH_MIN_CHARS
+        self.tts_batch_mode: str = os.getenv("TTS_BATCH_MODE", "sentence")
+        self.tts_first_batch_min_chars: int = int(os.getenv("TTS_FIRST_BATCH_MIN_CHARS", "12"))
+        self.tts_batch_min_chars: int = int(os.getenv("TTS_BATCH_MIN_CHARS", "40"))
+        self.tts_batch_max_chars: int = int(os.getenv("TTS_BATCH_MAX_CHARS", "250"))
+        
+        # Latency metrics: job processes write histogram snapshots to METRICS_SNAPSHOT_DIR,
+        # the main worker process serves them on METRICS_HOST:METRICS_PORT (0 disables).
+        # All interfaces by default, so Prometheus can scrape the container's exposed port
+        self.metrics_host: str = os.getenv("METRICS_HOST", "0.0.0.0")
+        self.metrics_port: int = int(os.getenv("METRICS_PORT", "9464"))
+        self.metrics_snapshot_dir: str = os.getenv(
+            "METRICS_SNAPSHOT_DIR", os.path.join(tempfile.gettempdir(), "voice-agent-metrics")
+        )
+        self.metrics_snapshot_interval: float = float(os.getenv("METRICS_SNAPSHOT_INTERVAL", "5.0"))
+        
+        # Worker startup: "eager" loads the embedding model and connects to Milvus in
+        # prewarm; "background" does it in a thread so the process is ready sooner
+        self.startup_mode: str = os.getenv("STARTUP_MODE", "eager")
+        # PREWARM=0 leaves prewarm out, so every job loads what it needs itself (the
+        # job_setup_unprewarmed latency stage, to compare with job_setup)
+        self.prewarm: bool = os.getenv("PREWARM", "1") != "0"
+        
+        # Worker registration name; when set, the worker only takes explicit dispatches
+        # and must match the token service's AGENT_NAME
+        self.agent_name: str = os.getenv("AGENT_NAME", "")
+        
+        # Worker scaling: idle job processes kept ready (unset: LiveKit's default), sessions
+        # per worker (0: no limit), event loop lag p95 (ms) counted as full load, and the
+        # load at which the worker stops taking jobs
+        num_idle_processes = os.getenv("WORKER_NUM_IDLE_PROCESSES")
+        self.worker_num_idle_processes: Optional[int] = int(num_idle_processes) if num_idle_processes else None
+        self.worker_max_sessions: int = int(os.getenv("WORKER_MAX_SESSIONS", "0"))
+        self.worker_lag_budget_ms: float = float(os.getenv("WORKER_LAG_BUDGET_MS", "100"))
+        self.worker_load_threshold: float = float(os.getenv("WORKER_LOAD_THRESHOLD", "0.75"))
         
         # Agent configuration
         self.min_endpointing_delay: float = 0.5
@@ -1,5 +1,16 @@
+import json
 import logging
 import os
+import sys
+import threading
+import time
+from typing import Optional
+
+# Installed before the other imports so --profile-startup can time them
+from services.startup_profiler import get_startup_profiler, start_startup_profiling
+
+start_startup_profiling()
+
 from dotenv import load_dotenv
 from livekit.agents import (
     AgentSession,
@@ -17,7 +28,12 @@ from livekit.plugins import (
 )
 
 from agents.assistant import Assistant
+from config.settings import Settings
 from services.instructions_service import InstructionsService
+from services.latency_metrics import MetricsServer, get_latency_recorder
+from services.pronunciation_lexicon import PronunciationLexicon
+from services.text_preprocessor import DEFAULT_PRONUNCIATIONS
+from services.worker_load import LoopLagReporter, WorkerLoad
 
 if os.path.exists(".env.local"):
     load_dotenv(dotenv_path=".env.local")
@@ -26,13 +42,168 @@ else:
 
 logger = logging.getLogger("voice-agent")
 
+# Serializes updates of proc.userdata["prewarm_timings"] by prewarm and the rag-loader thread
+_prewarm_timings_lock = threading.Lock()
+
+
+def _format_timings(timings: dict) -> str:
+    return ", ".join(f"{name}={seconds:.2f}s" for name, seconds in timings.items()) or "none"
+
+
+def _publish_prewarm_timings(proc: JobProcess, timings: dict) -> dict:
+    """Merge load times into proc.userdata["prewarm_timings"].
+
+    The merged dict replaces the published one rather than being updated in
+    place, so readers can iterate what they got while the rag-loader thread
+    publishes its timings.
+
+    Returns:
+        dict: The merged timings now published
+    """
+    with _prewarm_timings_lock:
+        merged = {**proc.userdata.get("prewarm_timings", {}), **timings}
+        proc.userdata["prewarm_timings"] = merged
+    return merged
+
+
+def _record_stage_metrics(agent_metrics: metrics.AgentMetrics) -> None:
+    """Record the per-turn stage timings reported by the LiveKit pipeline."""
+    recorder = get_latency_recorder()
+    if isinstance(agent_metrics, metrics.EOUMetrics):
+        recorder.record("end_of_utterance", agent_metrics.end_of_utterance_delay)
+        recorder.record("stt_final", agent_metrics.transcription_delay)
+    elif isinstance(agent_metrics, metrics.LLMMetrics):
+        recorder.record("llm_first_token", agent_metrics.ttft)
+        recorder.record("llm_total", agent_metrics.duration)
+    elif isinstance(agent_metrics, metrics.TTSMetrics):
+        recorder.record("tts_first_byte", agent_metrics.ttfb)
+
+
+def prewarm(proc: JobProcess):
+    """Load models and open connections once per worker process.
+
+    Everything stored in ``proc.userdata`` is shared with every ``entrypoint``
+    call handled by this process, so jobs no longer pay for these loads.
+    The time spent on each load is kept under ``prewarm_timings`` and logged
+    by entrypoint next to the measured job setup time.
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    proc.userdata["vad"] = silero.VAD.load()
+    timings["vad"] = time.perf_counter() - start
+
+    # The turn detector model is served by the worker's shared inference
+    # process; the MultilingualModel handle itself is bound to the job context
+    # and is created per job. Importing the plugin here pays its import cost once.
+    start = time.perf_counter()
+    from livekit.plugins.turn_detector.multilingual import MultilingualModel  # noqa: F401
+    timings["turn_detector"] = time.perf_counter() - start
+
+    settings = Settings()
+    if settings.startup_mode == "background":
+        # The process becomes available right away; sessions use the base prompts
+        # until the RAG service (embedding model + Milvus) is attached
+        start = time.perf_counter()
+        instructions_service = InstructionsService(rag_service=None, defer_rag=True)
+        timings["instructions"] = time.perf_counter() - start
+        threading.Thread(
+            target=_load_rag_service, args=(proc, instructions_service),
+            name="rag-loader", daemon=True
+        ).start()
+    else:
+        rag_service = _load_rag_service(proc)
+        # One InstructionsService per process so every job shares its prompt cache
+        start = time.perf_counter()
+        instructions_service = InstructionsService(rag_service=rag_service)
+        timings["instructions"] = time.perf_counter() - start
+    proc.userdata["instructions_service"] = instructions_service
+    # Prefetch from prewarm so an idle process has the next lesson's prompt ready too
+    instructions_service.start_prompt_refresher()
+
+    # Compiled once; each Assistant's preprocessor gets a copy-on-write copy
+    start = time.perf_counter()
+    lexicon = PronunciationLexicon(DEFAULT_PRONUNCIATIONS)
+    lexicon_path = settings.pronunciation_lexicon_path
+    if lexicon_path:
+        try:
+            lexicon.load_file(lexicon_path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"prewarm failed to load pronunciation lexicon {lexicon_path}: {e}")
+    lexicon.compile()
+    proc.userdata["pronunciation_lexicon"] = lexicon
+    timings["pronunciation_lexicon"] = time.perf_counter() - start
+
+    timings = _publish_prewarm_timings(proc, timings)
+    logger.info(f"prewarm finished in {sum(timings.values()):.2f}s ({_format_timings(timings)})")
+
+    profiler = get_startup_profiler()
+    if profiler is not None:
+        for name, seconds in timings.items():
+            profiler.add_phase(f"prewarm.{name}", seconds)
+        print(profiler.report("job process"), file=sys.stderr)
+
+
+def _load_rag_service(proc: JobProcess, instructions_service: Optional[InstructionsService] = None):
+    """Load the embedding model and connect to Milvus.
+
+    Called from prewarm, or from a background thread when STARTUP_MODE is
+    "background", in which case the service is attached to instructions_service
+    once loaded. The load times are published to prewarm_timings when done.
+    """
+    timings = {}
+    rag_service = None
+    try:
+        # Imported here so the main worker process never loads pymilvus or the embedding model
+        from services.rag_service import RagService
+
+        start = time.perf_counter()
+        rag_service = RagService()
+        timings["embedding_model"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if rag_service.connect():
+            timings["milvus"] = time.perf_counter() - start
+        else:
+            logger.warning("prewarm could not connect to Milvus, jobs will retry on first search")
+        # No-op unless LOCAL_INDEX_MODE enables the local vector index
+        rag_service.start_local_index_refresher()
+    except Exception as e:
+        logger.warning(f"prewarm failed to initialize RAG service: {e}")
+    proc.userdata["rag_service"] = rag_service
+    _publish_prewarm_timings(proc, timings)
+
+    if instructions_service is not None:
+        instructions_service.attach_rag_service(rag_service)
+        logger.info(f"RAG service loaded in the background ({_format_timings(timings)})")
+    return rag_service
+
+
+def _dispatched_identity(ctx: JobContext) -> Optional[str]:
+    """Participant named in the dispatch metadata, when the token server dispatched this job.
+
+    The token service (TOKEN_PREPARE_ROOMS) creates the room with the agent
+    dispatched when it issues the client's token, so the job starts before that
+    participant has joined. The metadata is {"identity": ...} for a room
+    requested for one participant, and empty for a shared room.
+    """
+    metadata = ctx.job.metadata
+    if not metadata:
+        return None
+    try:
+        return json.loads(metadata).get("identity")
+    except (ValueError, AttributeError):
+        logger.warning(f"ignoring job metadata that is not a JSON object: {metadata!r}")
+        return None
+
+
 async def entrypoint(ctx: JobContext):
     logger.info(f"connecting to room {ctx.room.name}")
     await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
 
-    # Wait for the first participant to connect
-    participant = await ctx.wait_for_participant()
-    logger.info(f"starting voice assistant for participant {participant.identity}")
+    # Everything up to session.start is set up before waiting for the participant,
+    # so with a pre-dispatched job it overlaps the client's connection handshake
+    setup_start = time.perf_counter()
 
     usage_collector = metrics.UsageCollector()
 
@@ -40,6 +211,45 @@ async def entrypoint(ctx: JobContext):
     def on_metrics_collected(agent_metrics: metrics.AgentMetrics):
         metrics.log_metrics(agent_metrics)
         usage_collector.collect(agent_metrics)
+        _record_stage_metrics(getattr(agent_metrics, "metrics", agent_metrics))
+
+    # End-to-end reply latency (user stops speaking -> agent starts speaking) and playout time
+    latency_recorder = get_latency_recorder()
+    turn_marks = {}
+
+    def on_user_state_changed(event):
+        if event.new_state == "listening" and event.old_state == "speaking":
+            turn_marks["user_stopped"] = time.perf_counter()
+
+    def on_agent_state_changed(event):
+        now = time.perf_counter()
+        if event.new_state == "speaking":
+            user_stopped = turn_marks.pop("user_stopped", None)
+            if user_stopped is not None:
+                latency_recorder.record("reply", now - user_stopped)
+            turn_marks["agent_started"] = now
+        elif event.old_state == "speaking":
+            agent_started = turn_marks.pop("agent_started", None)
+            if agent_started is not None:
+                latency_recorder.record("playout", now - agent_started)
+
+    async def flush_latency_metrics():
+        latency_recorder.write_snapshot()
+
+    ctx.add_shutdown_callback(flush_latency_metrics)
+
+    # Event loop lag of this job process, read by the main process's load function
+    load_reporter = ctx.proc.userdata.get("load_reporter")
+    if load_reporter is None:
+        load_reporter = ctx.proc.userdata["load_reporter"] = LoopLagReporter(Settings().metrics_snapshot_dir)
+    load_reporter.sessions = 1
+    load_reporter.start()
+
+    async def stop_load_reporter():
+        load_reporter.sessions = 0
+        await load_reporter.stop()
+
+    ctx.add_shutdown_callback(stop_load_reporter)
 
     vad = ctx.proc.userdata.get("vad")
     if not vad:
@@ -56,13 +266,36 @@ async def entrypoint(ctx: JobContext):
 
     # Trigger the on_metrics_collected function when metrics are collected
     session.on("metrics_collected", on_metrics_collected)
+    session.on("user_state_changed", on_user_state_changed)
+    session.on("agent_state_changed", on_agent_state_changed)
 
-    # Create services
-    instructions_service = InstructionsService()
+    # Reuse the process-wide instructions service (and its prompt cache) from prewarm
+    instructions_service = ctx.proc.userdata.get("instructions_service")
+    if not instructions_service:
+        instructions_service = InstructionsService(rag_service=ctx.proc.userdata.get("rag_service"))
+        ctx.proc.userdata["instructions_service"] = instructions_service
+    instructions_service.start_prompt_refresher()
+    # Served from the prompt cache; only a cold cache retrieves, and then without blocking the loop
+    with latency_recorder.span("prompt_build"):
+        instructions = await instructions_service.get_system_instructions_async()
+    assistant = Assistant(
+        instructions_service,
+        instructions=instructions,
+        pronunciation_lexicon=ctx.proc.userdata.get("pronunciation_lexicon"),
+    )
+    setup_time = time.perf_counter() - setup_start
+
+    # Wait for the participant the job was dispatched for (any participant otherwise)
+    wait_start = time.perf_counter()
+    participant = await ctx.wait_for_participant(identity=_dispatched_identity(ctx))
+    logger.info(
+        f"starting voice assistant for participant {participant.identity} "
+        f"(ready {setup_time:.2f}s after connecting, waited {time.perf_counter() - wait_start:.2f}s)"
+    )
 
     await session.start(
         room=ctx.room,
-        agent=Assistant(instructions_service),
+        agent=assistant,
         room_input_options=RoomInputOptions(
             # enable background voice & noise cancellation, powered by Krisp
             # included at no additional cost with LiveKit Cloud
@@ -70,13 +303,67 @@ async def entrypoint(ctx: JobContext):
         ),
     )
 
+    # Startup metric: the measured per-job setup time, as a histogram stage so runs
+    # with and without prewarm (job_setup_unprewarmed) can be compared on /metrics.
+    # The prewarm load time is only the upper bound of what prewarm avoids per job.
+    prewarm_timings = ctx.proc.userdata.get("prewarm_timings")
+    latency_recorder.record("job_setup" if prewarm_timings is not None else "job_setup_unprewarmed", setup_time)
+    logger.info(
+        f"job setup took {setup_time:.2f}s, "
+        f"prewarm load time {sum((prewarm_timings or {}).values()):.2f}s ({_format_timings(prewarm_timings or {})})"
+    )
+
+
+def worker_options(settings: Settings, worker_load: WorkerLoad) -> WorkerOptions:
+    """Build the WorkerOptions from Settings.
+
+    Args:
+        settings: Application settings (PREWARM, WORKER_* and AGENT_NAME)
+        worker_load: Load function and job admission of this worker
+
+    Returns:
+        WorkerOptions: Options for cli.run_app
+    """
+    options = dict(
+        entrypoint_fnc=entrypoint,
+        request_fnc=worker_load.request_fnc,
+        load_fnc=worker_load,
+        load_threshold=settings.worker_load_threshold,
+        # Empty: dispatched automatically to every new room. Set to receive only
+        # explicit dispatches (e.g. from the token service's room preparation)
+        agent_name=settings.agent_name,
+        port=8080,
+        host="0.0.0.0",
+    )
+    if settings.prewarm:
+        options["prewarm_fnc"] = prewarm
+    if settings.worker_num_idle_processes is not None:
+        options["num_idle_processes"] = settings.worker_num_idle_processes
+    return WorkerOptions(**options)
+
 
 if __name__ == "__main__":    
     
-    cli.run_app(
-        WorkerOptions(
-            entrypoint_fnc=entrypoint,
-            port=8080,
-            host="0.0.0.0"
-        ),
-    )
\ No newline at end of file
+    settings = Settings()
+    worker_load = WorkerLoad(
+        settings.metrics_snapshot_dir,
+        max_sessions=settings.worker_max_sessions,
+        lag_budget=settings.worker_lag_budget_ms / 1000,
+    )
+
+    # Job processes write latency snapshots; this (main) process serves them merged,
+    # with the load gauges (voice_agent_worker_load is the signal to autoscale on)
+    if settings.metrics_port:
+        try:
+            MetricsServer(
+                settings.metrics_snapshot_dir, settings.metrics_host, settings.metrics_port,
+                gauges=worker_load.gauges,
+            ).start()
+        except OSError as e:
+            logger.warning(f"latency metrics endpoint disabled: {e}")
+    
+    profiler = get_startup_profiler()
+    if profiler is not None:
+        print(profiler.report("main process"), file=sys.stderr)
+    
+    cli.run_app(worker_options(settings, worker_load))
\ No newline at end of file
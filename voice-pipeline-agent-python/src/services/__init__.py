@@ -1,5 +1,26 @@
-from .instructions_service import InstructionsService
-from .rag_service import RagService
-from .milvus_connection import MilvusConnectionManager
+import importlib
 
-__all__ = ["InstructionsService", "RagService", "MilvusConnectionManager"]
\ No newline at end of file
+# Services are imported on first access (PEP 562), so importing one light module
+# such as services.latency_metrics does not pull in pymilvus, numpy or torch
+_EXPORTS = {
+    "InstructionsService": ".instructions_service",
+    "RagService": ".rag_service",
+    "MilvusConnectionManager": ".milvus_connection",
+    "MilvusConnectionPool": ".milvus_pool",
+    "get_milvus_pool": ".milvus_pool",
+}
+
+__all__ = ["InstructionsService", "RagService", "MilvusConnectionManager", "MilvusConnectionPool", "get_milvus_pool"]
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,257 @@
+import argparse
+import logging
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# all-MiniLM-L6-v2's sentence-transformers max_seq_length
+MAX_SEQ_LENGTH = 256
+
+EMBEDDING_BACKENDS = ("sentence-transformers", "onnx", "onnx-int8")
+# Client of the pod's shared embedding server (services.embedding_server)
+REMOTE_EMBEDDING_BACKEND = "remote"
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model_int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+# Texts used by check_equivalence when none are given: short queries and longer
+# passages like the ones the week prompts retrieve
+EQUIVALENCE_TEXTS = [
+    "dialogue pronunciation phonetics minimal pairs character names",
+    "past tense verbs action words character actions plot events",
+    "character conversations dialogue natural speech informal language",
+    "The sky above the port was the color of television, tuned to a dead channel.",
+    "Case was twenty-four. At twenty-two, he'd been a cowboy, a rustler, one of the best in the Sprawl.",
+    "hello",
+]
+
+
+class EmbeddingBackend:
+    """Turns texts into L2-normalized sentence embeddings.
+
+    Subclasses implement encode(). ``name`` identifies the model and numeric
+    format, and is used as the embedding cache key, so vectors from different
+    backends are never mixed.
+    """
+
+    name: str = EMBEDDING_MODEL_NAME
+
+    def __str__(self) -> str:
+        return self.name
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed a batch of texts.
+
+        Args:
+            texts: The texts to embed
+
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), dimension)
+        """
+        raise NotImplementedError
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """Reference backend: the full-precision PyTorch model via sentence-transformers."""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME):
+        # Imported here so the ONNX backends never pay for importing torch
+        from sentence_transformers import SentenceTransformer
+
+        self.name = model_name
+        self._model = SentenceTransformer(model_name)
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        return np.asarray(
+            self._model.encode(list(texts), batch_size=max(len(texts), 1), convert_to_numpy=True),
+            dtype=np.float32
+        )
+
+
+class OnnxEmbeddingBackend(EmbeddingBackend):
+    """all-MiniLM-L6-v2 exported to ONNX, run with ONNX Runtime.
+
+    Reproduces the sentence-transformers pipeline (tokenize, transformer, mean
+    pooling over the attention mask, L2 normalization) without torch. With
+    ``quantized`` the dynamically int8-quantized export is used, which is
+    smaller and faster on CPUs such as our arm64 nodes. Build the model
+    directory with ``python -m services.embedding_backends export <dir>``.
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = True, threads: int = 0):
+        """Initialize the backend.
+
+        Args:
+            model_dir: Directory containing the ONNX model(s) and tokenizer.json
+            quantized: Use the int8 model instead of the float32 one
+            threads: ONNX Runtime intra-op threads (0 lets ONNX Runtime decide)
+        """
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        model_file = ONNX_INT8_MODEL_FILE if quantized else ONNX_MODEL_FILE
+        self.name = f"{EMBEDDING_MODEL_NAME}:onnx{'-int8' if quantized else ''}"
+
+        self._tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self._tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self._tokenizer.enable_padding()
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self._session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {model_input.name for model_input in self._session.get_inputs()}
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        encodings = self._tokenizer.encode_batch(list(texts))
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            inputs["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self._session.run(None, inputs)[0]
+
+        # Mean pooling over real (non-padding) tokens, then L2 normalization
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+def create_embedding_backend(settings: Optional[Settings] = None) -> EmbeddingBackend:
+    """Create the embedding backend selected by settings.embedding_backend.
+
+    Args:
+        settings: Settings object. If None, will create a new Settings instance.
+
+    Returns:
+        EmbeddingBackend: The configured backend
+    """
+    settings = settings or Settings()
+    backend = settings.embedding_backend
+
+    if backend == "sentence-transformers":
+        return SentenceTransformerBackend()
+    if backend == REMOTE_EMBEDDING_BACKEND:
+        from .embedding_server import RemoteEmbeddingBackend
+
+        return RemoteEmbeddingBackend(settings.embedding_server_socket)
+    if backend in ("onnx", "onnx-int8"):
+        if not settings.embedding_model_dir:
+            raise ValueError(f"EMBEDDING_MODEL_DIR is required for the {backend} embedding backend")
+        return OnnxEmbeddingBackend(
+            settings.embedding_model_dir, quantized=backend == "onnx-int8", threads=settings.embedding_threads
+        )
+    raise ValueError(
+        f"Unknown embedding backend {backend!r}, expected one of {EMBEDDING_BACKENDS + (REMOTE_EMBEDDING_BACKEND,)}"
+    )
+
+
+def check_equivalence(reference: EmbeddingBackend, candidate: EmbeddingBackend,
+                      texts: Optional[List[str]] = None,
+                      min_cosine: float = 0.99) -> Dict[str, Any]:
+    """Compare a backend's embeddings with the reference model's.
+
+    Args:
+        reference: Backend producing the vectors stored in Milvus
+        candidate: Backend to validate
+        texts: Texts to embed. Defaults to EQUIVALENCE_TEXTS.
+        min_cosine: Lowest acceptable cosine similarity for any text
+
+    Returns:
+        Dict with the minimum and mean cosine similarity and whether the
+        candidate passed.
+    """
+    texts = texts or EQUIVALENCE_TEXTS
+    expected = reference.encode(texts)
+    actual = candidate.encode(texts)
+
+    cosines = (expected * actual).sum(axis=1) / (
+        np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1)
+    )
+    return {
+        "reference": reference.name,
+        "candidate": candidate.name,
+        "texts": len(texts),
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "passed": bool(cosines.min() >= min_cosine),
+    }
+
+
+def export_onnx_model(output_dir: str, model_name: str = EMBEDDING_MODEL_NAME) -> None:
+    """Export the reference model to ONNX, plus an int8 dynamically quantized copy.
+
+    Needs torch, sentence-transformers and onnxruntime; run it once at image
+    build time, not in the workers.
+
+    Args:
+        output_dir: Directory to write model.onnx, model_int8.onnx and tokenizer.json to
+        model_name: sentence-transformers model to export
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(output_dir, exist_ok=True)
+    model = SentenceTransformer(model_name)
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+
+    sample = tokenizer(["an example sentence"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    onnx_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in input_names),
+            onnx_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+
+    quantize_dynamic(onnx_path, os.path.join(output_dir, ONNX_INT8_MODEL_FILE), weight_type=QuantType.QInt8)
+    tokenizer.backend_tokenizer.save(os.path.join(output_dir, TOKENIZER_FILE))
+    logger.info(f"Exported {model_name} to {output_dir}")
+
+
+if __name__ == "__main__":
+    # Run from src/: python -m services.embedding_backends {export,check} <model_dir>
+    parser = argparse.ArgumentParser(description="Build and validate ONNX embedding backends")
+    parser.add_argument("command", choices=("export", "check"))
+    parser.add_argument("model_dir")
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "export":
+        export_onnx_model(args.model_dir)
+    else:
+        reference_backend = SentenceTransformerBackend()
+        failed = False
+        for quantized in (False, True):
+            result = check_equivalence(
+                reference_backend, OnnxEmbeddingBackend(args.model_dir, quantized=quantized),
+                min_cosine=args.min_cosine
+            )
+            print(result)
+            failed = failed or not result["passed"]
+        raise SystemExit(1 if failed else 0)
@@ -0,0 +1,219 @@
+import array
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """Bounded LRU/TTL cache for query embeddings with an optional on-disk tier.
+
+    Entries are keyed on (model name, normalized text), so switching models never
+    serves a stale vector. The in-memory tier evicts the least recently used
+    entry once ``max_entries`` is reached and drops entries older than
+    ``ttl_seconds``. When ``persist_path`` is set, embeddings are also written to
+    a SQLite file so a restarted worker can skip encoding entirely.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 86400.0,
+                 persist_path: Optional[str] = None):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of embeddings kept in memory.
+            ttl_seconds: Lifetime of an entry in both tiers. 0 disables expiry.
+            persist_path: Path of the SQLite file for the persistent tier.
+                         If None, only the in-memory tier is used.
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+        if persist_path:
+            self._open_store(persist_path)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalize query text so equivalent queries share a cache entry.
+
+        Only whitespace is collapsed; the tokenizer splits on whitespace, so this
+        never changes the resulting embedding.
+        """
+        return " ".join(text.split())
+
+    def get(self, text: str, model_name: str) -> Optional[List[float]]:
+        """Return the cached embedding for text, or None on a miss.
+
+        Args:
+            text: The query text
+            model_name: Name of the model that produced the embedding
+
+        Returns:
+            A copy of the cached embedding, or None if it is missing or expired.
+        """
+        key = (model_name, self.normalize(text))
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, embedding = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return list(embedding)
+                del self._entries[key]
+
+            embedding, age = self._load_from_store(key)
+            if embedding is not None:
+                self._insert(key, embedding, now - age)
+                self.hits += 1
+                self.disk_hits += 1
+                return list(embedding)
+
+            self.misses += 1
+            return None
+
+    def put(self, text: str, model_name: str, embedding: List[float]) -> None:
+        """Store an embedding in the cache (and the persistent tier, if enabled).
+
+        Args:
+            text: The query text
+            model_name: Name of the model that produced the embedding
+            embedding: The embedding vector
+        """
+        key = (model_name, self.normalize(text))
+        embedding = list(embedding)
+
+        with self._lock:
+            self._insert(key, embedding, time.monotonic())
+            self._save_to_store(key, embedding)
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                try:
+                    with self._db:
+                        self._db.execute("DELETE FROM embeddings")
+                except sqlite3.Error as e:
+                    logger.warning(f"Error clearing persistent embedding cache: {e}")
+            self.hits = self.misses = self.disk_hits = self.evictions = 0
+
+    def close(self) -> None:
+        """Close the persistent tier."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and occupancy.
+
+        Returns:
+            Dict containing cache counters.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "persistent": self._db is not None
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _insert(self, key: Tuple[str, str], embedding: List[float], created_at: float) -> None:
+        """Insert into the memory tier, evicting the least recently used entry if full."""
+        expires_at = created_at + self.ttl_seconds if self.ttl_seconds > 0 else float("inf")
+        self._entries[key] = (expires_at, embedding)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _open_store(self, persist_path: str) -> None:
+        """Open (and create if needed) the SQLite persistent tier."""
+        try:
+            directory = os.path.dirname(persist_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            # Access is serialized by self._lock, so the connection can be shared across threads
+            self._db = sqlite3.connect(persist_path, check_same_thread=False, timeout=5.0)
+            with self._db:
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    "model TEXT NOT NULL, text TEXT NOT NULL, created_at REAL NOT NULL, "
+                    "vector BLOB NOT NULL, PRIMARY KEY (model, text))"
+                )
+                if self.ttl_seconds > 0:
+                    self._db.execute(
+                        "DELETE FROM embeddings WHERE created_at < ?",
+                        (time.time() - self.ttl_seconds,)
+                    )
+            logger.info(f"Opened persistent embedding cache at {persist_path}")
+        except sqlite3.Error as e:
+            logger.warning(f"Persistent embedding cache disabled, failed to open {persist_path}: {e}")
+            self._db = None
+
+    def _load_from_store(self, key: Tuple[str, str]) -> Tuple[Optional[List[float]], float]:
+        """Return (embedding, age in seconds) from the persistent tier, or (None, 0)."""
+        if self._db is None:
+            return None, 0.0
+
+        try:
+            row = self._db.execute(
+                "SELECT created_at, vector FROM embeddings WHERE model = ? AND text = ?", key
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Error reading persistent embedding cache: {e}")
+            return None, 0.0
+
+        if row is None:
+            return None, 0.0
+
+        created_at, blob = row
+        age = max(0.0, time.time() - created_at)
+        if self.ttl_seconds > 0 and age >= self.ttl_seconds:
+            return None, 0.0
+
+        vector = array.array("f")
+        vector.frombytes(blob)
+        return vector.tolist(), age
+
+    def _save_to_store(self, key: Tuple[str, str], embedding: List[float]) -> None:
+        """Write an embedding to the persistent tier as float32."""
+        if self._db is None:
+            return
+
+        try:
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO embeddings (model, text, created_at, vector) VALUES (?, ?, ?, ?)",
+                    (key[0], key[1], time.time(), array.array("f", embedding).tobytes())
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Error writing persistent embedding cache: {e}")
@@ -0,0 +1,297 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from config.settings import Settings
+
+from .embedding_backends import EmbeddingBackend
+
+logger = logging.getLogger(__name__)
+
+# Every message is a frame: header length and payload length (big-endian uint32),
+# a JSON header, then the payload (float32 vectors in responses, empty in requests)
+FRAME_PREFIX = struct.Struct(">II")
+MAX_HEADER_BYTES = 1 << 24
+
+
+def _pack(header: Dict[str, Any], payload: bytes = b"") -> bytes:
+    encoded = json.dumps(header).encode("utf-8")
+    return FRAME_PREFIX.pack(len(encoded), len(payload)) + encoded + payload
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Tuple[Dict[str, Any], bytes]:
+    header_length, payload_length = FRAME_PREFIX.unpack(await reader.readexactly(FRAME_PREFIX.size))
+    if header_length > MAX_HEADER_BYTES:
+        raise ValueError(f"frame header of {header_length} bytes is too large")
+    header = json.loads(await reader.readexactly(header_length))
+    payload = await reader.readexactly(payload_length) if payload_length else b""
+    return header, payload
+
+
+class _Request:
+    def __init__(self, texts: List[str], future: asyncio.Future):
+        self.texts = texts
+        self.future = future
+
+
+class EmbeddingServer:
+    """Hosts one embedding model for every job process of a pod, on a unix socket.
+
+    Each job process would otherwise load its own copy of the model, so memory
+    grows with the process count. Here job processes use RemoteEmbeddingBackend,
+    a thin client, and this process holds the only copy.
+
+    Requests from all connections go into one queue. The batcher takes the
+    first waiting request, then collects more for up to ``batch_window``
+    seconds (or until ``max_batch`` texts) and encodes them in one forward pass.
+    Encoding runs on a single worker thread, so the loop keeps reading requests
+    while a batch is in the model and the next batch fills up meanwhile.
+    """
+
+    def __init__(self, backend: EmbeddingBackend, socket_path: str,
+                 max_batch: int = 32, batch_window: float = 0.002):
+        """Initialize the server.
+
+        Args:
+            backend: The embedding model to serve
+            socket_path: Unix socket to listen on (replaced if it exists)
+            max_batch: Most texts encoded in one forward pass
+            batch_window: Seconds to wait for more requests after the first one
+        """
+        self.backend = backend
+        self.socket_path = socket_path
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.batches = 0
+        self.texts = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._writers: Set[asyncio.StreamWriter] = set()
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path)
+        self._batcher = asyncio.create_task(self._run_batches())
+        logger.info(f"Serving {self.backend.name} embeddings on {self.socket_path}")
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # wait_closed() waits for the client connections too
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+        self._executor.shutdown(wait=False)
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        """Queue texts for the next batch and wait for their vectors."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Request(texts, future))
+        return await future
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Requests on one connection are answered in order; clients use one connection per thread
+        self._writers.add(writer)
+        try:
+            while True:
+                header, _ = await _read_frame(reader)
+                if header.get("op") == "info":
+                    writer.write(_pack({"name": self.backend.name}))
+                else:
+                    try:
+                        vectors = await self.encode([str(text) for text in header["texts"]])
+                        writer.write(_pack({"shape": list(vectors.shape)}, vectors.tobytes()))
+                    except Exception as e:
+                        logger.error(f"Embedding request failed: {e}")
+                        writer.write(_pack({"error": str(e)}))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Closing embedding client after a malformed request: {e}")
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _next_batch(self) -> List[_Request]:
+        batch = [await self._queue.get()]
+        size = len(batch[0].texts)
+        deadline = time.monotonic() + self.batch_window
+        while size < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch
+
+    async def _run_batches(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            texts = [text for request in batch for text in request.texts]
+            try:
+                vectors = await loop.run_in_executor(self._executor, self.backend.encode, texts)
+            except Exception as e:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.texts += len(texts)
+            start = 0
+            for request in batch:
+                end = start + len(request.texts)
+                if not request.future.done():
+                    request.future.set_result(np.ascontiguousarray(vectors[start:end], dtype=np.float32))
+                start = end
+
+
+class RemoteEmbeddingBackend(EmbeddingBackend):
+    """Thin client of an EmbeddingServer, used by the job processes.
+
+    ``encode`` is synchronous like the local backends (RagService calls it from
+    its executor threads). Each thread keeps its own connection so concurrent
+    searches do not wait on each other's round trips; the server batches them
+    together. ``name`` is the served model's name, so embedding cache entries
+    match those of the equivalent local backend.
+
+    Nothing connects until the first ``name`` or ``encode``. The server may
+    still be loading its model when the job processes start, and prewarm must
+    not wait for it (LiveKit kills a process that takes too long to initialize).
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 10.0, connect_timeout: float = 60.0):
+        """Initialize the client.
+
+        Args:
+            socket_path: The server's unix socket
+            timeout: Seconds to wait for one response
+            connect_timeout: Seconds to wait for the server to come up (it may still be loading the model)
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self._local = threading.local()
+        self._name: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        """The served model's name, asked from the server on first use."""
+        if self._name is None:
+            self._name = self._request({"op": "info"}, wait_for_server=True)[0]["name"]
+        return self._name
+
+    def __str__(self) -> str:
+        # Does not connect, unlike name
+        return f"remote ({self.socket_path})"
+
+    def _connect(self, wait_for_server: bool) -> socket.socket:
+        deadline = time.monotonic() + (self.connect_timeout if wait_for_server else 0)
+        delay = 0.05
+        while True:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+                return sock
+            except OSError as e:
+                sock.close()
+                if time.monotonic() + delay > deadline:
+                    raise ConnectionError(f"embedding server at {self.socket_path} is not available: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, 1.0)
+
+    def _receive_exactly(self, sock: socket.socket, size: int) -> bytes:
+        chunks = []
+        while size:
+            chunk = sock.recv(size)
+            if not chunk:
+                raise ConnectionError("embedding server closed the connection")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    def _exchange(self, header: Dict[str, Any], wait_for_server: bool) -> Tuple[Dict[str, Any], bytes]:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = self._local.sock = self._connect(wait_for_server)
+        try:
+            sock.sendall(_pack(header))
+            header_length, payload_length = FRAME_PREFIX.unpack(self._receive_exactly(sock, FRAME_PREFIX.size))
+            response = json.loads(self._receive_exactly(sock, header_length))
+            payload = self._receive_exactly(sock, payload_length) if payload_length else b""
+            return response, payload
+        except OSError:
+            sock.close()
+            self._local.sock = None
+            raise
+
+    def _request(self, header: Dict[str, Any], wait_for_server: bool = False) -> Tuple[Dict[str, Any], bytes]:
+        try:
+            return self._exchange(header, wait_for_server)
+        except OSError:
+            # Retried once on a new connection, which covers a server restart
+            return self._exchange(header, wait_for_server=True)
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        response, payload = self._request({"texts": list(texts)})
+        if "error" in response:
+            raise RuntimeError(f"embedding server failed: {response['error']}")
+        return np.frombuffer(payload, dtype=np.float32).reshape(response["shape"])
+
+
+async def _serve(server: EmbeddingServer) -> None:
+    try:
+        await server.serve_forever()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    # Run from src/ (or with src on PYTHONPATH): python -m services.embedding_server
+    from .embedding_backends import EMBEDDING_BACKENDS, create_embedding_backend
+
+    settings = Settings()
+    parser = argparse.ArgumentParser(description="Serve the embedding model to the job processes of this pod")
+    parser.add_argument("--backend", default=settings.embedding_server_backend, choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--socket", default=settings.embedding_server_socket)
+    parser.add_argument("--max-batch", type=int, default=settings.embedding_server_max_batch)
+    parser.add_argument("--batch-window-ms", type=float, default=settings.embedding_server_batch_window_ms)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    settings.embedding_backend = args.backend
+    embedding_server = EmbeddingServer(
+        create_embedding_backend(settings), args.socket,
+        max_batch=args.max_batch, batch_window=args.batch_window_ms / 1000,
+    )
+    asyncio.run(_serve(embedding_server))
@@ -1,14 +1,69 @@
-import json
-import os
-from datetime import datetime
-from typing import Dict, Any
-from .rag_service import RagService
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, Any, FrozenSet, List, Optional, Tuple
+from config.settings import Settings
+from .latency_metrics import get_latency_recorder
 from .text_preprocessor import TTSPreprocessor
+from .week_prompt_store import DAYS, PERIODS, WeekPrompts, WeekPromptStore, get_week_prompt_store
+
+if TYPE_CHECKING:
+    # Imported lazily: it pulls in pymilvus, numpy and the embedding backend
+    from .rag_service import RagService
+
+logger = logging.getLogger(__name__)
+
+# Hours at which _get_time_period moves to a new bucket (the day name changes at 0)
+PERIOD_BOUNDARY_HOURS = (0, 6, 12, 17)
+
+# Book extracts retrieved per RAG query
+RAG_RESULTS_PER_QUERY = 2
+
 
 class InstructionsService:
-    """Service class for managing assistant instructions and prompts."""
+    """Service class for managing assistant instructions and prompts.
     
-    def __init__(self):
+    System instructions only change when the (day, time period) bucket changes,
+    so they are cached per bucket. A background refresher thread builds the next
+    bucket ahead of its boundary, which keeps RAG retrieval off the session join
+    path. The cache dict is never mutated in place: writers publish a new dict,
+    so a prefetched prompt becomes visible atomically and readers need no lock.
+    Concurrent misses for the same bucket share one build: the first caller
+    builds, the others wait for its result.
+    
+    The extracts of every successful retrieval are also kept per query, outside
+    the pruned cache. When a search fails, a bucket whose queries were retrieved
+    before is built from those extracts instead of the bare base prompt.
+    
+    The week prompts come from the process-wide WeekPromptStore. When the file
+    is edited, the cached buckets whose prompt or queries changed are marked
+    stale. Sessions keep getting the stale prompts (no retrieval on join) while
+    the refresher rebuilds them and swaps each one in when it is ready; the
+    other buckets are kept as they are.
+    """
+    
+    def __init__(self, rag_service: Optional["RagService"] = None,
+                 settings: Optional[Settings] = None,
+                 defer_rag: bool = False,
+                 prompt_store: Optional[WeekPromptStore] = None):
+        """Initialize the instructions service.
+
+        Args:
+            rag_service: Shared RagService instance (typically created once per
+                        worker process during prewarm). If None, a new instance
+                        is created for this service.
+            settings: Settings object containing configuration.
+                     If None, will create a new Settings instance.
+            defer_rag: If True and rag_service is None, do not create one; it is
+                      attached later with attach_rag_service(). Prompts built
+                      before that are cached as incomplete and rebuilt.
+            prompt_store: Week prompts to build from. If None, the process-wide
+                         store from get_week_prompt_store() is used.
+        """
+        self.settings = settings or Settings()
         self._default_instructions = (
             "You are a voice assistant created by LiveKit. Your interface with users will be voice. "
             "You should use short and concise responses, and avoiding usage of unpronouncable punctuation. "
@@ -16,33 +71,67 @@ class InstructionsService:
         )
         
         self._greeting_instructions = "Hey, how can I help you today?"
-        self._week_prompts = self._load_week_prompts()
-        self._rag_service = self._initialize_rag_service()
+        self._prompt_store = prompt_store or get_week_prompt_store()
+        self._rag_pending = defer_rag and rag_service is None
+        self._rag_service = rag_service or (None if defer_rag else self._initialize_rag_service())
         self._prompt_postprocessor = TTSPreprocessor()
+        
+        # (day, period) -> (instructions, complete). An incomplete entry was built
+        # without RAG extracts and is replaced as soon as a retrieval succeeds.
+        self._prompt_cache: Dict[Tuple[str, str], Tuple[str, bool]] = {}
+        # Builds in progress: bucket -> future of the instructions it will cache
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        # Query -> results of its last successful retrieval (replaced under _cache_lock, not mutated)
+        self._last_results: Dict[str, List[Dict[str, Any]]] = {}
+        # Cached buckets whose week prompt changed since they were built (replaced, not mutated)
+        self._stale: FrozenSet[Tuple[str, str]] = frozenset()
+        # The week prompts the cached entries were built from
+        self._week = self._prompt_store.current()
+        # Serializes cache writers (refresher thread and sessions)
+        self._cache_lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._refresh_stop = threading.Event()
+        # Set to make the refresher run now instead of at its next scheduled time
+        self._refresh_wake = threading.Event()
+        self._prompt_store.add_listener(self._on_week_prompts_changed)
     
-    def _initialize_rag_service(self) -> RagService:
+    def _initialize_rag_service(self) -> Optional["RagService"]:
         """Initialize the RAG service."""
         try:
+            from .rag_service import RagService
             return RagService()
         except Exception as e:
             print(f"Warning: Failed to initialize RAG service: {e}")
             return None
     
-    def _load_week_prompts(self) -> Dict[str, Any]:
-        """Load week prompts from JSON file."""
-        try:
-            # Try to load from src/data/ first, then src/config/
-            for path in ["src/data/week-prompt.json", "src/config/week-prompt.json"]:
-                if os.path.exists(path):
-                    with open(path, 'r') as file:
-                        return json.load(file)
-            
-            # If file not found, return empty dict and use default instructions
-            print("Warning: week-prompt.json not found, using default instructions")
-            return {}
-        except Exception as e:
-            print(f"Error loading week prompts: {e}")
-            return {}
+    def attach_rag_service(self, rag_service: Optional["RagService"]) -> None:
+        """Attach a RAG service that finished loading after this service was created.
+        
+        Prompts cached without RAG extracts in the meantime are dropped, so the
+        next session (or the refresher) rebuilds them with retrieval.
+        
+        Args:
+            rag_service: The loaded RagService, or None if loading failed
+        """
+        self._rag_service = rag_service
+        self._rag_pending = False
+        if rag_service is not None:
+            with self._cache_lock:
+                self._prompt_cache = {bucket: entry for bucket, entry in self._prompt_cache.items() if entry[1]}
+            # Rebuild the dropped prompts with retrieval right away
+            self._refresh_wake.set()
+    
+    def _on_week_prompts_changed(self, prompts: WeekPrompts) -> None:
+        """Mark the cached buckets whose (prompt, queries) changed stale and wake the refresher."""
+        with self._cache_lock:
+            changed = {bucket for bucket in self._prompt_cache if self._week.get(bucket) != prompts.get(bucket)}
+            self._week = prompts
+            self._stale = self._stale | changed
+        if changed:
+            self._refresh_wake.set()
+    
+    def _refresher_running(self) -> bool:
+        return self._refresh_thread is not None and self._refresh_thread.is_alive()
     
     def _get_time_period(self, hour: int) -> str:
         """Determine time period based on hour (24-hour format)."""
@@ -53,60 +142,436 @@ class InstructionsService:
         else:
             return "afternoon"
     
-    def _get_current_prompt(self) -> str:
-        """Get the current raw prompt based on day and time (without processing)."""
-        if not self._week_prompts:
-            return self._default_instructions
+    def _get_bucket(self, now: datetime) -> Tuple[str, str]:
+        """Return the (day, period) bucket the prompt depends on."""
+        return now.strftime("%A").lower(), self._get_time_period(now.hour)
+    
+    def _next_boundary(self, now: datetime) -> datetime:
+        """Return the start of the bucket that follows the one containing now."""
+        for hour in PERIOD_BOUNDARY_HOURS:
+            boundary = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+            if boundary > now:
+                return boundary
+        return (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    
+    def _get_entry(self, week: WeekPrompts, bucket: Tuple[str, str]) -> Optional[Tuple[str, Tuple[str, ...]]]:
+        """Return (base_prompt, queries) for a bucket, or None if it has no prompt.
         
-        now = datetime.now()
-        day_name = now.strftime("%A").lower()  # Get day name (monday, tuesday, etc.)
-        time_period = self._get_time_period(now.hour)
+        A bucket may have several queries (e.g. follow-up topics).
+        """
+        entry = week.get(bucket)
+        if entry is None:
+            print(f"Warning: No prompt found for {bucket[0]} {bucket[1]}, using default")
+        return entry
+    
+    def _format_enhanced_prompt(self, base_prompt: str, rag_results) -> str:
+        """Append the book extracts from RAG results to the base prompt."""
+        book_extracts = []
+        for result in rag_results or []:
+            # Assuming the text content is in a field called 'text' or 'content'
+            content = result.get('text') or result.get('content') or str(result.get('entity', {}))
+            if content and content.strip():
+                book_extracts.append(content.strip())
         
-        try:
-            base_prompt = self._week_prompts[day_name][time_period]['prompt']
+        if not book_extracts:
+            return base_prompt
+        
+        separator = '=' * 50
+        parts = [base_prompt, f"\n\n{separator}\nRELEVANT BOOK EXTRACTS:\n{separator}\n\n"]
+        for i, extract in enumerate(book_extracts, 1):
+            parts.append(f"Extract {i}:\n{extract}\n\n")
+        parts.append(f"{separator}\n")
+        return "".join(parts)
+    
+    def _plan_prompts(self, buckets: List[Tuple[str, str]]) -> Tuple[
+            Dict[Tuple[str, str], Tuple[str, bool]], Dict[Tuple[str, str], Tuple[str, List[str]]]]:
+        """Split buckets into prompts that are ready and prompts that need RAG extracts.
+        
+        Returns:
+            Tuple of (ready, pending). ready maps a bucket to (instructions, True);
+            pending maps a bucket to (base_prompt, queries).
+        """
+        ready = {}
+        pending = {}
+        week = self._prompt_store.current()
+        for bucket in buckets:
+            entry = self._get_entry(week, bucket) if week else None
+            if entry is None:
+                ready[bucket] = (self._finalize(self._default_instructions), True)
+                continue
+            
+            base_prompt, queries = entry
+            queries = list(queries)
             
             # If RAG service is available, enhance the prompt with book extracts
-            if self._rag_service:
-                try:
-                    query = self._week_prompts[day_name][time_period]['query']
-                    rag_results = self._rag_service.search_by_text(query, limit=2)
-                    
-                    # Format the enhanced prompt
-                    enhanced_prompt = base_prompt
-                    
-                    if rag_results:
-                        # Extract text content from RAG results
-                        book_extracts = []
-                        for result in rag_results:
-                            # Assuming the text content is in a field called 'text' or 'content'
-                            content = result.get('text') or result.get('content') or str(result.get('entity', {}))
-                            if content and content.strip():
-                                book_extracts.append(content.strip())
-                        
-                        if book_extracts:
-                            enhanced_prompt += f"\n\n{'='*50}\nRELEVANT BOOK EXTRACTS:\n{'='*50}\n\n"
-                            for i, extract in enumerate(book_extracts, 1):
-                                enhanced_prompt += f"Extract {i}:\n{extract}\n\n"
-                            enhanced_prompt += f"{'='*50}\n"
-                    
-                    return enhanced_prompt
-                    
-                except Exception as e:
-                    print(f"Warning: RAG service error, using base prompt: {e}")
-                    return base_prompt
+            if not self._rag_service or not queries:
+                # Still loading in the background: use the base prompt for now
+                ready[bucket] = (self._finalize(base_prompt), not (self._rag_pending and queries))
+            else:
+                pending[bucket] = (base_prompt, queries)
+        return ready, pending
+    
+    def _enhance_prompts(self, pending: Dict[Tuple[str, str], Tuple[str, List[str]]],
+                         rag_results: Optional[List[List[Dict[str, Any]]]],
+                         error: Optional[Exception] = None) -> Dict[Tuple[str, str], Tuple[str, bool]]:
+        """Attach the results of one batched search to the pending prompts.
+        
+        rag_results holds one result list per query, in the order the queries
+        appear in pending. If the search failed, the last extracts retrieved for
+        the bucket's queries are used, or the base prompt if there are none;
+        either way the prompt is marked incomplete.
+        """
+        prompts = {}
+        position = 0
+        # _last_results is replaced, never mutated, so this snapshot stays consistent
+        last_results = self._last_results
+        retrieved: Dict[str, List[Dict[str, Any]]] = {}
+        for bucket, (base_prompt, queries) in pending.items():
+            if rag_results is None:
+                print(f"Warning: RAG service error for {bucket[0]} {bucket[1]}: {error}")
+                if all(query in last_results for query in queries):
+                    print(f"Warning: using the last retrieved extracts for {bucket[0]} {bucket[1]}")
+                    merged = self._merge_results([last_results[query] for query in queries])
+                    prompts[bucket] = (self._finalize(self._format_enhanced_prompt(base_prompt, merged)), False)
+                else:
+                    prompts[bucket] = (self._finalize(base_prompt), False)
+                continue
             
-            return base_prompt
+            bucket_results = rag_results[position:position + len(queries)]
+            position += len(queries)
+            retrieved.update(zip(queries, bucket_results))
+            merged = self._merge_results(bucket_results)
+            prompts[bucket] = (self._finalize(self._format_enhanced_prompt(base_prompt, merged)), True)
+        
+        if retrieved:
+            # Published as a new dict, like _prompt_cache, so _prune_cache cannot lose the update
+            with self._cache_lock:
+                self._last_results = {**self._last_results, **retrieved}
+        return prompts
+    
+    def _merge_results(self, rag_results: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Merge the extracts of all of a bucket's queries, without duplicates."""
+        merged, seen = [], set()
+        for results in rag_results:
+            for result in results:
+                if result.get('id') not in seen:
+                    seen.add(result.get('id'))
+                    merged.append(result)
+        return merged
+    
+    def _build_prompts(self, buckets: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Tuple[str, bool]]:
+        """Build the instructions for several buckets with a single batched RAG search.
+        
+        Returns:
+            Dict mapping each bucket to (instructions, complete). complete is
+            False when RAG retrieval failed and the base prompt was used instead.
+        """
+        prompts, pending = self._plan_prompts(buckets)
+        if pending:
+            queries = [query for _, bucket_queries in pending.values() for query in bucket_queries]
+            try:
+                rag_results = self._rag_service.search_many(queries, limit=RAG_RESULTS_PER_QUERY)
+                prompts.update(self._enhance_prompts(pending, rag_results))
+            except Exception as e:
+                prompts.update(self._enhance_prompts(pending, None, e))
+        return prompts
+    
+    async def _build_prompts_async(self, buckets: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Tuple[str, bool]]:
+        """Async variant of _build_prompts that keeps RAG retrieval off the event loop."""
+        prompts, pending = self._plan_prompts(buckets)
+        if pending:
+            queries = [query for _, bucket_queries in pending.values() for query in bucket_queries]
+            try:
+                rag_results = await self._rag_service.search_many_async(queries, limit=RAG_RESULTS_PER_QUERY)
+                prompts.update(self._enhance_prompts(pending, rag_results))
+            except Exception as e:
+                prompts.update(self._enhance_prompts(pending, None, e))
+        return prompts
+    
+    def _build_prompt(self, bucket: Tuple[str, str]) -> Tuple[str, bool]:
+        """Build the instructions for a bucket.
+        
+        Returns:
+            Tuple of (instructions, complete). complete is False when RAG
+            retrieval failed and the base prompt was used instead.
+        """
+        return self._build_prompts([bucket])[bucket]
+    
+    async def _build_prompt_async(self, bucket: Tuple[str, str]) -> Tuple[str, bool]:
+        """Async variant of _build_prompt that keeps RAG retrieval off the event loop."""
+        return (await self._build_prompts_async([bucket]))[bucket]
+    
+    def _finalize(self, raw_prompt: str) -> str:
+        """Apply the text substitutions that turn a raw prompt into instructions."""
+        return self._prompt_postprocessor.replace_book_title(raw_prompt)
+    
+    def _store_prompt(self, bucket: Tuple[str, str], instructions: str, complete: bool,
+                      version: Optional[Tuple[int, ...]] = None) -> str:
+        """Cache a built prompt, keeping the last good one if this build was degraded.
+        
+        Args:
+            version: Version of the week prompts the build started from. If the
+                    file was reloaded since, the prompt is returned but not cached.
+        
+        Returns:
+            The instructions now cached for the bucket.
+        """
+        with self._cache_lock:
+            if version is not None and version != self._prompt_store.current().version:
+                return instructions
+            cached = self._prompt_cache.get(bucket)
+            # A stale entry is replaced even by a degraded build: its lesson changed
+            if not complete and cached is not None and cached[1] and bucket not in self._stale:
+                print(f"Warning: keeping last good prompt for {bucket[0]} {bucket[1]}")
+                return cached[0]
+            
+            # Publish a new dict rather than mutating the one readers may hold
+            self._prompt_cache = {**self._prompt_cache, bucket: (instructions, complete)}
+            if bucket in self._stale:
+                self._stale = self._stale - {bucket}
+            return instructions
+    
+    def _prune_cache(self, now: datetime) -> None:
+        """Drop cached buckets other than the current and the next one.
+        
+        Last retrieved extracts are kept for every query of the week prompts.
+        """
+        keep = {self._get_bucket(now), self._get_bucket(self._next_boundary(now))}
+        week = self._prompt_store.current()
+        queries = set()
+        for day in DAYS:
+            for period in PERIODS:
+                entry = week.get((day, period))
+                if entry is not None:
+                    queries.update(entry[1])
+        with self._cache_lock:
+            self._prompt_cache = {bucket: entry for bucket, entry in self._prompt_cache.items() if bucket in keep}
+            self._stale = self._stale & keep
+            self._last_results = {query: results for query, results in self._last_results.items() if query in queries}
+    
+    def _claim_builds(self, buckets: List[Tuple[str, str]], rebuild_incomplete: bool,
+                      rebuild_stale: bool) -> Tuple[List[Tuple[str, str]], Dict[Tuple[str, str], Future]]:
+        """Find which buckets the caller has to build and which it can wait for.
+        
+        A bucket that is cached resolves right away, unless it is incomplete
+        and rebuild_incomplete is set, or stale and rebuild_stale is set; one
+        already being built resolves with that build.
+        
+        Returns:
+            Tuple of (owned, futures). The caller builds the owned buckets and
+            must complete them with _finish_builds; futures holds one future
+            per requested bucket.
+        """
+        owned, futures = [], {}
+        with self._cache_lock:
+            for bucket in buckets:
+                future = self._inflight.get(bucket)
+                if future is None:
+                    cached = self._prompt_cache.get(bucket)
+                    future = Future()
+                    rebuild = ((rebuild_incomplete and not cached[1]) or
+                               (rebuild_stale and bucket in self._stale)) if cached is not None else True
+                    if not rebuild:
+                        future.set_result(cached[0])
+                    else:
+                        self._inflight[bucket] = future
+                        owned.append(bucket)
+                futures[bucket] = future
+        return owned, futures
+    
+    def _finish_builds(self, owned: List[Tuple[str, str]], futures: Dict[Tuple[str, str], Future],
+                       prompts: Optional[Dict[Tuple[str, str], Tuple[str, bool]]],
+                       version: Optional[Tuple[int, ...]] = None) -> None:
+        """Cache the owned buckets' prompts and release the callers waiting for them.
+        
+        If prompts is None the build was abandoned; waiting callers then build
+        the buckets themselves.
+        """
+        results = {}
+        if prompts is not None:
+            for bucket in owned:
+                results[bucket] = self._store_prompt(bucket, *prompts[bucket], version=version)
+        with self._cache_lock:
+            for bucket in owned:
+                if self._inflight.get(bucket) is futures[bucket]:
+                    del self._inflight[bucket]
+        for bucket in owned:
+            if bucket in results:
+                futures[bucket].set_result(results[bucket])
+            else:
+                futures[bucket].cancel()
+    
+    def _get_prompts(self, buckets: List[Tuple[str, str]], rebuild_incomplete: bool = False,
+                     rebuild_stale: bool = False) -> Dict[Tuple[str, str], str]:
+        """Return the cached instructions for buckets, building the missing ones once.
+        
+        Args:
+            buckets: The (day, period) buckets to return
+            rebuild_incomplete: Also rebuild buckets cached without RAG extracts
+            rebuild_stale: Also rebuild buckets whose week prompt changed
+        """
+        owned, futures = self._claim_builds(buckets, rebuild_incomplete, rebuild_stale)
+        if owned:
+            prompts = None
+            version = self._prompt_store.current().version
+            try:
+                prompts = self._build_prompts(owned)
+            finally:
+                self._finish_builds(owned, futures, prompts, version)
+        
+        results = {}
+        for bucket, future in futures.items():
+            if future.cancelled():
+                # The build this call waited for was abandoned
+                results[bucket] = self._get_prompts([bucket], rebuild_incomplete, rebuild_stale)[bucket]
+            else:
+                results[bucket] = future.result()
+        return results
+    
+    async def _get_prompts_async(self, buckets: List[Tuple[str, str]], rebuild_incomplete: bool = False,
+                                 rebuild_stale: bool = False) -> Dict[Tuple[str, str], str]:
+        """Async variant of _get_prompts that keeps RAG retrieval off the event loop."""
+        owned, futures = self._claim_builds(buckets, rebuild_incomplete, rebuild_stale)
+        if owned:
+            prompts = None
+            version = self._prompt_store.current().version
+            try:
+                prompts = await self._build_prompts_async(owned)
+            finally:
+                self._finish_builds(owned, futures, prompts, version)
+        
+        results = {}
+        for bucket, future in futures.items():
+            try:
+                # Shielded: cancelling this call must not cancel a build other callers share
+                results[bucket] = await asyncio.shield(asyncio.wrap_future(future))
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                results[bucket] = (await self._get_prompts_async([bucket], rebuild_incomplete, rebuild_stale))[bucket]
+        return results
+    
+    async def refresh_prompt(self, bucket: Optional[Tuple[str, str]] = None) -> str:
+        """Rebuild and cache the instructions for a bucket (the current one by default)."""
+        bucket = bucket or self._get_bucket(datetime.now())
+        return (await self.refresh_prompts([bucket]))[bucket]
+    
+    async def refresh_prompts(self, buckets: List[Tuple[str, str]]) -> Dict[Tuple[str, str], str]:
+        """Build and cache the instructions for several buckets in one RAG batch.
+        
+        Buckets that are missing, stale or were cached without RAG extracts are
+        built; a bucket already being built is waited for instead.
+        
+        Returns:
+            Dict mapping each bucket to the instructions now cached for it.
+        """
+        return await self._get_prompts_async(buckets, rebuild_incomplete=True, rebuild_stale=True)
+    
+    def start_prompt_refresher(self) -> None:
+        """Start the background thread that keeps the prompt cache ahead of the clock.
+        
+        Runs independently of any session's event loop, so an idle worker process
+        also has the next bucket ready when a lesson starts. Safe to call from
+        every session; only one refresher runs per service.
+        """
+        if self._refresher_running():
+            return
+        # Registered again after stop_prompt_refresher()
+        self._prompt_store.remove_listener(self._on_week_prompts_changed)
+        self._prompt_store.add_listener(self._on_week_prompts_changed)
+        self._refresh_stop = threading.Event()
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_loop, args=(self._refresh_stop,),
+            name="prompt-refresher", daemon=True
+        )
+        self._refresh_thread.start()
+    
+    def stop_prompt_refresher(self) -> None:
+        """Stop the background refresher thread and stop following week prompt reloads.
+        
+        The process-wide store would otherwise keep this service alive through
+        its listener.
+        """
+        self._prompt_store.remove_listener(self._on_week_prompts_changed)
+        self._refresh_stop.set()
+        self._refresh_wake.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join(timeout=5)
+            self._refresh_thread = None
+    
+    def _needs_refresh(self, bucket: Tuple[str, str]) -> bool:
+        cached = self._prompt_cache.get(bucket)
+        return cached is None or not cached[1] or bucket in self._stale
+    
+    def _refresh_loop(self, stop: threading.Event) -> None:
+        """Build the current bucket, then the next one shortly before its boundary."""
+        lead = timedelta(seconds=self.settings.prompt_refresh_lead)
+        retry_interval = self.settings.prompt_retry_interval
+        
+        while not stop.is_set():
+            try:
+                now = datetime.now()
+                boundary = self._next_boundary(now)
+                
+                # The current and (close to the boundary) the next bucket are
+                # retrieved together in one batched search
+                stale = [self._get_bucket(now)]
+                if boundary - now <= lead:
+                    stale.append(self._get_bucket(boundary))
+                stale = [bucket for bucket in dict.fromkeys(stale) if self._needs_refresh(bucket)]
+                if stale:
+                    start = time.perf_counter()
+                    self._get_prompts(stale, rebuild_incomplete=True, rebuild_stale=True)
+                    get_latency_recorder().record("prompt_prefetch", time.perf_counter() - start)
+                
+                if boundary - now <= lead:
+                    delay = (boundary - datetime.now()).total_seconds()
+                else:
+                    delay = (boundary - lead - datetime.now()).total_seconds()
+                
+                self._prune_cache(now)
+                
+                # Retry degraded entries instead of waiting for the next boundary
+                if any(not complete for _, complete in self._prompt_cache.values()):
+                    delay = min(delay, retry_interval)
+            except Exception as e:
+                print(f"Warning: prompt refresher error: {e}")
+                delay = retry_interval
             
-        except KeyError:
-            print(f"Warning: No prompt found for {day_name} {time_period}, using default")
-            return self._default_instructions
+            self._refresh_wake.wait(max(delay, 1.0))
+            self._refresh_wake.clear()
+    
+    def _cached_prompt(self, bucket: Tuple[str, str]) -> Optional[str]:
+        """Return the cached instructions for a bucket, if a session may use them.
+        
+        Stale instructions are used while the refresher is there to replace them.
+        """
+        cached = self._prompt_cache.get(bucket)
+        if cached is None or (bucket in self._stale and not self._refresher_running()):
+            return None
+        return cached[0]
     
     def get_system_instructions(self) -> str:
         """Get the system instructions for the assistant based on current time."""
-        raw_prompt = self._get_current_prompt()
-        response = self._prompt_postprocessor.replace_book_title(raw_prompt)
+        bucket = self._get_bucket(datetime.now())
+        cached = self._cached_prompt(bucket)
+        if cached is not None:
+            response = cached
+        else:
+            response = self._get_prompts([bucket], rebuild_stale=not self._refresher_running())[bucket]
         print("Instruction : ", response)
         return response
     
+    async def get_system_instructions_async(self) -> str:
+        """Get the system instructions without blocking the event loop on a cache miss."""
+        bucket = self._get_bucket(datetime.now())
+        cached = self._cached_prompt(bucket)
+        if cached is not None:
+            response = cached
+        else:
+            response = (await self._get_prompts_async([bucket], rebuild_stale=not self._refresher_running()))[bucket]
+        logger.debug(f"Instruction : {response}")
+        return response
+    
     def get_greeting_instructions(self) -> str:
         return "Hello, let's begin the lesson"
\ No newline at end of file
@@ -0,0 +1,388 @@
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+from config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the histogram buckets; +Inf is implicit
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 30.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+METRIC_NAME = "voice_agent_stage_latency_seconds"
+
+# Counters are exported as voice_agent_<name>_total
+COUNTER_PREFIX = "voice_agent_"
+COUNTER_HELP = {
+    "interrupted_replies": "Replies interrupted by the user while being generated.",
+    "wasted_llm_deltas": "LLM deltas (about one token each) of interrupted replies that never reached TTS.",
+    "wasted_tts_characters": "Characters sent to TTS for interrupted replies that were never played (estimated).",
+}
+
+# Gauges of the worker's main process (see services.worker_load), exported as voice_agent_<name>
+GAUGE_HELP = {
+    "worker_load": "Load reported to LiveKit (0-1); the worker takes no jobs at or above its threshold.",
+    "worker_active_sessions": "Sessions running or admitted on this worker.",
+    "worker_cpu_utilization": "CPU used by the worker's container as a fraction of its limit.",
+    "event_loop_lag_seconds": "Worst recent p95 event loop lag across the job processes.",
+}
+
+
+class LatencyHistogram:
+    """Per-bucket (non-cumulative) latency counts for one stage, mergeable across processes."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One count per bucket plus the +Inf overflow bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        if other.buckets != self.buckets:
+            raise ValueError("Cannot merge histograms with different buckets")
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.sum += other.sum
+        self.count += other.count
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside its bucket (like histogram_quantile)."""
+        if self.count == 0:
+            return float("nan")
+
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if i == len(self.buckets):
+                    # Overflow bucket: the best estimate is the largest finite bound
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def to_dict(self) -> Dict:
+        return {"buckets": list(self.buckets), "counts": self.counts, "sum": self.sum, "count": self.count}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "LatencyHistogram":
+        histogram = cls(data["buckets"])
+        histogram.counts = list(data["counts"])
+        histogram.sum = data["sum"]
+        histogram.count = data["count"]
+        return histogram
+
+
+class LatencyRecorder:
+    """Per-process latency histograms for the stages of a voice turn, plus counters.
+
+    Each job process records into its own recorder and periodically writes a
+    snapshot file (``<snapshot_dir>/<pid>.json``) that the worker's main process
+    merges when it serves /metrics. Writes are throttled to one per
+    ``snapshot_interval`` and can be forced with write_snapshot(), e.g. when a
+    job ends.
+    """
+
+    def __init__(self, snapshot_dir: Optional[str] = None, snapshot_interval: float = 5.0,
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """Initialize the recorder.
+
+        Args:
+            snapshot_dir: Directory for snapshot files. If None, nothing is written.
+            snapshot_interval: Minimum number of seconds between snapshot writes.
+            buckets: Histogram bucket upper bounds in seconds.
+        """
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_interval = snapshot_interval
+        self._buckets = tuple(buckets)
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._last_write = 0.0
+        self._dirty = False
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Record one observation for a stage.
+
+        Args:
+            stage: Stage name, e.g. "llm_first_token"
+            seconds: Duration of the stage
+        """
+        if seconds is None or seconds < 0:
+            return
+
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = LatencyHistogram(self._buckets)
+            histogram.observe(seconds)
+            self._dirty = True
+            due = time.monotonic() - self._last_write >= self.snapshot_interval
+
+        if due:
+            self.write_snapshot()
+
+    def count(self, name: str, value: float = 1) -> None:
+        """Add to a counter, e.g. the LLM deltas wasted by an interruption.
+
+        Args:
+            name: Counter name, e.g. "wasted_llm_deltas"
+            value: Amount to add
+        """
+        if not value:
+            return
+
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+            self._dirty = True
+            due = time.monotonic() - self._last_write >= self.snapshot_interval
+
+        if due:
+            self.write_snapshot()
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block and record it under stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def histograms(self) -> Dict[str, LatencyHistogram]:
+        """Return a copy of this process's histograms."""
+        with self._lock:
+            return {stage: LatencyHistogram.from_dict(h.to_dict()) for stage, h in self._histograms.items()}
+
+    def counters(self) -> Dict[str, float]:
+        """Return a copy of this process's counters."""
+        with self._lock:
+            return dict(self._counters)
+
+    def write_snapshot(self) -> None:
+        """Write the histograms to this process's snapshot file (atomically)."""
+        if not self.snapshot_dir:
+            return
+
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                "pid": os.getpid(),
+                "updated_at": time.time(),
+                "stages": {stage: h.to_dict() for stage, h in self._histograms.items()},
+                "counters": dict(self._counters),
+            }
+            self._dirty = False
+            self._last_write = time.monotonic()
+
+        path = os.path.join(self.snapshot_dir, f"{os.getpid()}.json")
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(data, file)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write latency snapshot {path}: {e}")
+
+
+def _read_snapshots(snapshot_dir: str) -> Iterator[Dict]:
+    for path in glob.glob(os.path.join(snapshot_dir, "*.json")):
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                yield json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable latency snapshot {path}: {e}")
+
+
+def load_snapshots(snapshot_dir: str) -> Dict[str, LatencyHistogram]:
+    """Merge the snapshot files of every process into one histogram per stage.
+
+    Args:
+        snapshot_dir: Directory the job processes write snapshots to
+
+    Returns:
+        Dict mapping stage name to the merged histogram
+    """
+    merged: Dict[str, LatencyHistogram] = {}
+    for data in _read_snapshots(snapshot_dir):
+        for stage, histogram_data in data.get("stages", {}).items():
+            histogram = LatencyHistogram.from_dict(histogram_data)
+            if stage in merged:
+                merged[stage].merge(histogram)
+            else:
+                merged[stage] = histogram
+    return merged
+
+
+def load_counters(snapshot_dir: str) -> Dict[str, float]:
+    """Sum the counters of every process's snapshot file.
+
+    Args:
+        snapshot_dir: Directory the job processes write snapshots to
+
+    Returns:
+        Dict mapping counter name to its total
+    """
+    totals: Dict[str, float] = {}
+    for data in _read_snapshots(snapshot_dir):
+        for name, value in data.get("counters", {}).items():
+            totals[name] = totals.get(name, 0) + value
+    return totals
+
+
+def render_prometheus(histograms: Dict[str, LatencyHistogram],
+                      counters: Optional[Dict[str, float]] = None,
+                      gauges: Optional[Dict[str, float]] = None) -> str:
+    """Render histograms (and counters and gauges) in the Prometheus text exposition format.
+
+    Each stage is exported as a histogram, plus estimated p50/p95/p99 gauges.
+    Each counter is exported as ``voice_agent_<name>_total``, each gauge as
+    ``voice_agent_<name>``.
+
+    Args:
+        histograms: Stage name -> histogram
+        counters: Counter name -> total
+        gauges: Gauge name -> current value
+
+    Returns:
+        str: The exposition text
+    """
+    lines: List[str] = [
+        f"# HELP {METRIC_NAME} Latency of each stage of a voice turn.",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+    for stage in sorted(histograms):
+        histogram = histograms[stage]
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+        lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+        lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {histogram.sum}')
+        lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {histogram.count}')
+
+    quantile_name = f"{METRIC_NAME}_quantile"
+    lines.append(f"# HELP {quantile_name} Latency quantiles estimated from the stage histograms.")
+    lines.append(f"# TYPE {quantile_name} gauge")
+    for stage in sorted(histograms):
+        for q in QUANTILES:
+            value = histograms[stage].quantile(q)
+            lines.append(f'{quantile_name}{{stage="{stage}",quantile="{q}"}} {value}')
+
+    for name in sorted(counters or {}):
+        counter_name = f"{COUNTER_PREFIX}{name}_total"
+        lines.append(f"# HELP {counter_name} {COUNTER_HELP.get(name, f'Total {name}.')}")
+        lines.append(f"# TYPE {counter_name} counter")
+        lines.append(f"{counter_name} {counters[name]}")
+
+    for name in sorted(gauges or {}):
+        gauge_name = f"{COUNTER_PREFIX}{name}"
+        lines.append(f"# HELP {gauge_name} {GAUGE_HELP.get(name, f'Current {name}.')}")
+        lines.append(f"# TYPE {gauge_name} gauge")
+        lines.append(f"{gauge_name} {gauges[name]}")
+
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Serves the merged latency histograms and counters on /metrics from the worker's main process."""
+
+    def __init__(self, snapshot_dir: str, host: str = "127.0.0.1", port: int = 9464,
+                 gauges: Optional[Callable[[], Dict[str, float]]] = None):
+        """Initialize the server.
+
+        Args:
+            snapshot_dir: Directory the job processes write snapshots to
+            host: Interface to bind
+            port: Port to listen on
+            gauges: Returns the main process's gauges (e.g. WorkerLoad.gauges) on each scrape
+        """
+        self.snapshot_dir = snapshot_dir
+        self.host = host
+        self.port = port
+        self.gauges = gauges
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, clear: bool = True) -> None:
+        """Start serving in a daemon thread.
+
+        Args:
+            clear: Remove snapshot files left over from a previous worker run
+        """
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        if clear:
+            for path in glob.glob(os.path.join(self.snapshot_dir, "*.json")) + \
+                    glob.glob(os.path.join(self.snapshot_dir, "*", "*.json")):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+        snapshot_dir = self.snapshot_dir
+        gauges = self.gauges
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = render_prometheus(
+                    load_snapshots(snapshot_dir), load_counters(snapshot_dir), gauges() if gauges else None
+                ).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(f"metrics request: {format % args}")
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="latency-metrics", daemon=True)
+        self._thread.start()
+        logger.info(f"Serving latency metrics on http://{self.host}:{self.port}/metrics")
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+_recorder: Optional[LatencyRecorder] = None
+_recorder_lock = threading.Lock()
+
+
+def get_latency_recorder() -> LatencyRecorder:
+    """Return this process's LatencyRecorder, creating it from Settings on first use."""
+    global _recorder
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                settings = Settings()
+                _recorder = LatencyRecorder(
+                    snapshot_dir=settings.metrics_snapshot_dir,
+                    snapshot_interval=settings.metrics_snapshot_interval,
+                )
+    return _recorder
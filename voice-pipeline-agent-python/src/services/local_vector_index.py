@@ -0,0 +1,273 @@
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:  # optional: only needed for use_hnsw=True
+    hnswlib = None
+
+logger = logging.getLogger(__name__)
+
+META_FILE = "meta.json"
+LOCK_FILE = ".refresh.lock"
+
+
+class LocalVectorIndex:
+    """In-process snapshot of a Milvus collection for local retrieval.
+
+    The snapshot lives in a directory shared by every worker process: a
+    memory-mapped float32 matrix of L2-normalized vectors
+    (``vectors-<version>.f32``), the matching records (``records-<version>.json``)
+    and ``meta.json``, which names the current version. A refresh writes a new
+    version and then replaces meta.json atomically, so readers never see a
+    half-written snapshot; processes pick the new version up on their next
+    reload().
+
+    Searches are cosine top-k over the whole matrix with NumPy (the corpus is a
+    single book), or over an HNSW graph built at load time when ``use_hnsw`` is
+    set and hnswlib is installed. Scores match Milvus' COSINE metric.
+    """
+
+    def __init__(self, directory: str, use_hnsw: bool = False):
+        """Initialize the index. Nothing is read until load().
+
+        Args:
+            directory: Directory holding the snapshot files
+            use_hnsw: Search an HNSW graph instead of the exact matrix product
+        """
+        if use_hnsw and hnswlib is None:
+            logger.warning("hnswlib is not installed, local index falls back to exact search")
+            use_hnsw = False
+
+        self.directory = directory
+        self.use_hnsw = use_hnsw
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self._created_at = 0.0
+        self._vectors: Optional[np.ndarray] = None
+        self._ids: List[Any] = []
+        self._records: List[Dict[str, Any]] = []
+        self._hnsw = None
+
+    @property
+    def ready(self) -> bool:
+        """True once a snapshot is loaded."""
+        return self._vectors is not None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def age(self) -> Optional[float]:
+        """Seconds since the snapshot on disk was built, or None if there is none."""
+        meta = self._read_meta()
+        return None if meta is None else max(0.0, time.time() - meta["created_at"])
+
+    def load(self) -> bool:
+        """Load (or reload) the current snapshot if it changed on disk.
+
+        Returns:
+            bool: True if a snapshot is loaded after the call
+        """
+        meta = self._read_meta()
+        if meta is None:
+            return self.ready
+        if meta["version"] == self._version:
+            return True
+
+        try:
+            vectors = np.memmap(
+                os.path.join(self.directory, f"vectors-{meta['version']}.f32"),
+                dtype=np.float32, mode="r", shape=(meta["count"], meta["dim"])
+            )
+            with open(os.path.join(self.directory, f"records-{meta['version']}.json"), 'r', encoding='utf-8') as file:
+                records = json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load local vector index version {meta['version']}: {e}")
+            return self.ready
+
+        hnsw = self._build_hnsw(vectors) if self.use_hnsw and meta["count"] else None
+
+        with self._lock:
+            self._vectors = vectors
+            self._ids = records["ids"]
+            self._records = records["records"]
+            self._hnsw = hnsw
+            self._version = meta["version"]
+            self._created_at = meta["created_at"]
+        logger.info(f"Loaded local vector index: {meta['count']} vectors, version {meta['version']}")
+        return True
+
+    def build(self, ids: Sequence[Any], vectors: Sequence[Sequence[float]],
+              records: Sequence[Dict[str, Any]]) -> str:
+        """Write a new snapshot and make it current.
+
+        Args:
+            ids: Primary keys, one per vector
+            vectors: The embedding vectors
+            records: Output fields of each entity (e.g. {"text": ...}), one per vector
+
+        Returns:
+            str: The version of the new snapshot
+        """
+        if not (len(ids) == len(vectors) == len(records)):
+            raise ValueError("ids, vectors and records must have the same length")
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2:
+            matrix = matrix.reshape(len(ids), -1)
+        # Normalized once here so cosine similarity is a plain dot product
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1.0, norms)
+
+        os.makedirs(self.directory, exist_ok=True)
+        version = f"{time.time_ns()}-{os.getpid()}"
+
+        vectors_path = os.path.join(self.directory, f"vectors-{version}.f32")
+        out = np.memmap(vectors_path, dtype=np.float32, mode="w+", shape=matrix.shape)
+        out[:] = matrix
+        out.flush()
+        del out
+
+        with open(os.path.join(self.directory, f"records-{version}.json"), 'w', encoding='utf-8') as file:
+            json.dump({"ids": list(ids), "records": list(records)}, file)
+
+        meta = {"version": version, "count": matrix.shape[0], "dim": matrix.shape[1], "created_at": time.time()}
+        meta_path = os.path.join(self.directory, META_FILE)
+        with open(f"{meta_path}.tmp", 'w', encoding='utf-8') as file:
+            json.dump(meta, file)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+        self._remove_old_versions(version)
+        return version
+
+    def refresh_from_collection(self, collection, vector_field: str = "vector",
+                                batch_size: int = 1000) -> bool:
+        """Snapshot a Milvus collection into the index, unless another process is doing it.
+
+        Args:
+            collection: pymilvus Collection to copy
+            vector_field: Name of the vector field
+            batch_size: Entities fetched per query_iterator batch
+
+        Returns:
+            bool: True if this call wrote a new snapshot
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, LOCK_FILE), 'w') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                logger.debug("Local vector index refresh already running in another process")
+                return False
+
+            primary_key = collection.schema.primary_field.name
+            fields = [field.name for field in collection.schema.fields if field.name != vector_field]
+
+            ids, vectors, records = [], [], []
+            iterator = collection.query_iterator(batch_size=batch_size, output_fields=fields + [vector_field])
+            try:
+                while True:
+                    batch = iterator.next()
+                    if not batch:
+                        break
+                    for entity in batch:
+                        ids.append(entity[primary_key])
+                        vectors.append(entity[vector_field])
+                        records.append({name: entity.get(name) for name in fields if name != primary_key})
+            finally:
+                iterator.close()
+
+            if not ids:
+                logger.warning("Milvus collection is empty, keeping the current local vector index")
+                return False
+
+            version = self.build(ids, vectors, records)
+            logger.info(f"Refreshed local vector index from Milvus: {len(ids)} vectors, version {version}")
+        self.load()
+        return True
+
+    def search(self, query_vectors: Sequence[Sequence[float]], limit: int = 1,
+               output_fields: Optional[List[str]] = None,
+               score_threshold: float = 0.0) -> List[List[Dict[str, Any]]]:
+        """Cosine top-k search, returning results shaped like RagService's.
+
+        Args:
+            query_vectors: One embedding per query
+            limit: Maximum number of results per query
+            output_fields: Record fields to include. If None or ["*"], all fields.
+            score_threshold: Minimum similarity score to include in results
+
+        Returns:
+            One list of result dictionaries (id, score, distance and fields) per query.
+        """
+        with self._lock:
+            vectors, ids, records, hnsw = self._vectors, self._ids, self._records, self._hnsw
+        if vectors is None:
+            raise RuntimeError("Local vector index is not loaded")
+
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1.0, norms)
+        k = min(limit, len(ids))
+        if k == 0:
+            return [[] for _ in range(len(queries))]
+
+        if hnsw is not None:
+            labels, distances = hnsw.knn_query(queries, k=k)
+            top, scores = labels, 1.0 - distances
+        else:
+            similarities = queries @ vectors.T
+            top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+            scores = np.take_along_axis(similarities, top, axis=1)
+            order = np.argsort(-scores, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            scores = np.take_along_axis(scores, order, axis=1)
+
+        all_fields = not output_fields or "*" in output_fields
+        results = []
+        for row_top, row_scores in zip(top, scores):
+            hits = []
+            for index, score in zip(row_top, row_scores):
+                score = float(score)
+                if score_threshold > 0.0 and score < score_threshold:
+                    continue
+                record = records[int(index)]
+                hit = {"id": ids[int(index)], "score": score, "distance": score}
+                hit.update(record if all_fields else {f: record[f] for f in output_fields if f in record})
+                hits.append(hit)
+            results.append(hits)
+        return results
+
+    def _read_meta(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.directory, META_FILE), 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable local vector index metadata: {e}")
+            return None
+
+    @staticmethod
+    def _build_hnsw(vectors: np.ndarray):
+        index = hnswlib.Index(space="cosine", dim=vectors.shape[1])
+        index.init_index(max_elements=vectors.shape[0], ef_construction=200, M=16)
+        index.add_items(np.asarray(vectors), np.arange(vectors.shape[0]))
+        index.set_ef(64)
+        return index
+
+    def _remove_old_versions(self, keep: str) -> None:
+        """Delete files of older snapshots (processes that mapped them keep their copy)."""
+        for name in os.listdir(self.directory):
+            if name.startswith(("vectors-", "records-")) and keep not in name:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
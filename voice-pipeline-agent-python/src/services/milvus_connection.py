@@ -1,173 +1,273 @@
 import logging
+import threading
+import time
+from contextlib import AbstractContextManager
 from typing import Optional, Dict, Any
-from pymilvus import connections, Collection, MilvusException
+from pymilvus import Collection, MilvusException
 from config.settings import Settings
+from .milvus_pool import MilvusConnectionPool, get_milvus_pool
 
 logger = logging.getLogger(__name__)
 
 
 class MilvusConnectionManager:
-    """Manages connections to Milvus vector database with optimized connection handling."""
+    """Manages connections to Milvus vector database with optimized connection handling.
     
-    def __init__(self, settings: Optional[Settings] = None):
+    The connections themselves live in a process-wide MilvusConnectionPool shared
+    by every manager (i.e. every session) in the process. A manager holds one
+    reference to the pool and tracks liveness as seen by its own requests.
+    """
+    
+    def __init__(self, settings: Optional[Settings] = None,
+                 pool: Optional[MilvusConnectionPool] = None):
         """Initialize the connection manager with Milvus configuration.
         
         Args:
             settings: Settings object containing Milvus configuration.
                      If None, will create a new Settings instance.
+            pool: Connection pool to use. If None, the process-wide pool for
+                  the configured host and collection is used.
         """
         self.settings = settings or Settings()
-        self._collection = None
         self._connected = False
+        self._retained = False
+        # Pool generation this manager last connected to
+        self._generation = 0
+        
+        # Serializes connect/disconnect between search threads and the heartbeat
+        self._lock = threading.RLock()
+        
+        # Liveness is tracked from the outcome of real requests (record_success /
+        # record_failure) and from the heartbeat, not probed on every access
+        self._suspect = False
+        self._last_success: Optional[float] = None
+        self._last_failure: Optional[float] = None
+        self._last_error: Optional[str] = None
+        self._consecutive_failures = 0
+        self._reconnects = 0
+        self._heartbeat_thread: Optional[threading.Thread] = None
+        self._heartbeat_stop = threading.Event()
         
         # Validate required configuration
         if not all([self.settings.milvus_host, self.settings.milvus_token, 
                    self.settings.milvus_collection_name]):
             raise ValueError("Missing required Milvus configuration: host, token, or collection_name")
+        
+        self._pool = pool or get_milvus_pool(self.settings)
     
     def connect(self) -> bool:
         """Connect to Milvus database with optimized connection management.
         
+        Also starts the background heartbeat (see start_heartbeat) once connected.
+        
         Returns:
             bool: True if connection successful, False otherwise.
         """
-        # Check if already connected and collection is loaded
-        if self._connected and self._collection is not None:
-            try:
-                # Validate existing connection by checking collection status
-                self._collection.describe()
-                logger.debug("Already connected to Milvus - reusing existing connection")
-                return True
-            except Exception:
-                # Connection is stale, need to reconnect
-                logger.warning("Existing connection is stale, reconnecting...")
-                self._cleanup_connection()
+        with self._lock:
+            connected = self._connect()
+        
+        if connected:
+            self.start_heartbeat()
+        return connected
+    
+    def _connect(self) -> bool:
+        """Connect while holding the lock. See connect()."""
+        # Check if already connected and nothing suggests the connection broke
+        if self.is_connected() and not self._suspect:
+            logger.debug("Already connected to Milvus - reusing pooled connections")
+            return True
         
         try:
-            # Check if connection with this alias already exists
-            try:
-                connections.get_connection("default")
-                logger.debug("Reusing existing Milvus connection")
-            except Exception:
-                # Create new connection with timeout
-                logger.info(f"Creating new connection to Milvus host: {self.settings.milvus_host}")
-                connections.connect(
-                    alias="default",
-                    host=self.settings.milvus_host,
-                    token=self.settings.milvus_token,
-                    timeout=30  # 30 second timeout
-                )
+            if not self._retained:
+                self._pool.retain()
+                self._retained = True
             
-            # Initialize and load collection
-            logger.info(f"Initializing collection: {self.settings.milvus_collection_name}")
-            self._collection = Collection(self.settings.milvus_collection_name)
-            
-            # Check if collection exists and has data
-            if self._collection.num_entities == 0:
-                logger.warning(f"Collection '{self.settings.milvus_collection_name}' is empty")
-            
-            # Load collection into memory for fast search
-            if not self._collection.has_index():
-                logger.warning(f"Collection '{self.settings.milvus_collection_name}' has no index - searches may be slow")
-            
-            self._collection.load(timeout=60)  # 60 second timeout for loading
-            logger.info(f"Collection loaded successfully. Entities: {self._collection.num_entities}")
-            
-            # Validate connection by performing a quick describe operation
-            collection_info = self._collection.describe()
-            logger.debug(f"Collection schema validated: {len(collection_info['fields'])} fields")
+            if self._generation and self._pool.is_open:
+                # Replace the connections we saw fail, unless another session already did
+                generation = self._pool.reconnect(self._generation)
+            else:
+                generation = self._pool.open()
             
+            if self._generation and generation != self._generation:
+                self._reconnects += 1
+            self._generation = generation
             self._connected = True
+            self.record_success()
             logger.info(f"Successfully connected to Milvus collection: {self.settings.milvus_collection_name}")
             return True
             
         except MilvusException as e:
             logger.error(f"Milvus-specific error during connection: {e}")
             self._cleanup_connection()
+            self.record_failure(e)
             return False
         except ConnectionError as e:
             logger.error(f"Network connection error to Milvus: {e}")
             self._cleanup_connection()
+            self.record_failure(e)
             return False
         except TimeoutError as e:
             logger.error(f"Connection timeout to Milvus: {e}")
             self._cleanup_connection()
+            self.record_failure(e)
             return False
         except Exception as e:
             logger.error(f"Unexpected error connecting to Milvus: {e}")
             self._cleanup_connection()
+            self.record_failure(e)
             return False
     
     def disconnect(self):
         """Disconnect from Milvus database with proper resource cleanup."""
-        if not self._connected and self._collection is None:
+        self.stop_heartbeat()
+        with self._lock:
+            self._disconnect()
+    
+    def _disconnect(self):
+        """Disconnect while holding the lock. See disconnect()."""
+        if not self._retained:
             logger.debug("Already disconnected from Milvus")
             return
         
-        try:
-            logger.info("Disconnecting from Milvus...")
-            
-            # Release collection resources first
-            if self._collection is not None:
-                try:
-                    # Release collection from memory
-                    self._collection.release()
-                    logger.debug("Collection released from memory")
-                except Exception as e:
-                    logger.warning(f"Error releasing collection: {e}")
-                finally:
-                    self._collection = None
-            
-            # Disconnect from Milvus server
-            try:
-                connections.disconnect("default")
-                logger.debug("Disconnected from Milvus server")
-            except Exception as e:
-                logger.warning(f"Error disconnecting from server: {e}")
-            
-            self._connected = False
-            logger.info("Successfully disconnected from Milvus")
-            
-        except Exception as e:
-            logger.error(f"Error during Milvus disconnection: {e}")
-            # Force cleanup even if errors occurred
-            self._collection = None
-            self._connected = False
+        logger.info("Disconnecting from Milvus...")
+        # Only drops this manager's reference: the pool keeps serving other
+        # sessions and closes (after in-flight requests finish) with the last one
+        self._pool.release()
+        self._retained = False
+        self._connected = False
+        logger.info("Successfully disconnected from Milvus")
     
     def _cleanup_connection(self):
-        """Internal method to cleanup connection state after failures."""
-        try:
-            if self._collection is not None:
-                self._collection.release()
-        except Exception:
-            pass  # Ignore cleanup errors
-        
-        try:
-            connections.disconnect("default")
-        except Exception:
-            pass  # Ignore cleanup errors
+        """Internal method to cleanup connection state after failures.
         
-        self._collection = None
+        The pooled connections are shared with other sessions, so only this
+        manager's state is reset; the pool retires broken connections when it
+        reconnects.
+        """
         self._connected = False
         logger.debug("Connection state cleaned up")
     
     def is_connected(self) -> bool:
-        """Check if the service is properly connected to Milvus.
+        """Check if the service is connected to Milvus.
+        
+        This reflects the last known state (from connect(), real requests and the
+        heartbeat) and makes no request itself; use check_health() to probe.
+        
+        Returns:
+            bool: True if connected and collection is loaded, False otherwise.
+        """
+        return self._connected and self._pool.is_open
+    
+    def check_health(self) -> bool:
+        """Probe the connection with a lightweight describe() request.
         
         Returns:
-            bool: True if connected and collection is accessible, False otherwise.
+            bool: True if Milvus answered, False otherwise (the connection is then
+                  marked as lost and the next ensure_connected() reconnects).
         """
-        if not self._connected or self._collection is None:
+        if not self.is_connected():
             return False
         
         try:
-            # Test connection by performing a lightweight operation
-            self._collection.describe()
-            return True
-        except Exception:
-            # Connection is broken, update state
+            with self._pool.lease() as collection:
+                collection.describe()
+        except Exception as e:
+            logger.warning(f"Milvus health check failed: {e}")
+            self.record_failure(e)
             self._connected = False
             return False
+        
+        self.record_success()
+        return True
+    
+    def record_success(self) -> None:
+        """Record that a request to Milvus succeeded."""
+        self._last_success = time.monotonic()
+        self._consecutive_failures = 0
+        self._suspect = False
+    
+    def record_failure(self, error: Exception) -> None:
+        """Record that a request to Milvus failed.
+        
+        The connection is not dropped right away (the error may be specific to
+        the request); the next ensure_connected() probes it first.
+        
+        Args:
+            error: The exception raised by the request
+        """
+        self._last_failure = time.monotonic()
+        self._last_error = str(error)
+        self._consecutive_failures += 1
+        self._suspect = True
+    
+    def health(self) -> Dict[str, Any]:
+        """Get a snapshot of the connection health.
+        
+        Returns:
+            Dict with the connection state, failure counters and the age in
+            seconds of the last successful and failed request.
+        """
+        now = time.monotonic()
+        return {
+            "connected": self.is_connected(),
+            "suspect": self._suspect,
+            "seconds_since_success": None if self._last_success is None else now - self._last_success,
+            "seconds_since_failure": None if self._last_failure is None else now - self._last_failure,
+            "consecutive_failures": self._consecutive_failures,
+            "last_error": self._last_error,
+            "reconnects": self._reconnects,
+            "pool": self._pool.stats(),
+            "heartbeat_interval": self.settings.milvus_heartbeat_interval,
+            "heartbeat_running": self._heartbeat_thread is not None and self._heartbeat_thread.is_alive(),
+        }
+    
+    def start_heartbeat(self, interval: Optional[float] = None) -> None:
+        """Start the background heartbeat if it is not running.
+        
+        Every interval seconds without a successful request, the heartbeat probes
+        the connection and reconnects if the probe fails, so the next search does
+        not pay for the reconnect.
+        
+        Args:
+            interval: Seconds between heartbeats. Defaults to
+                      settings.milvus_heartbeat_interval; 0 disables the heartbeat.
+        """
+        if interval is None:
+            interval = self.settings.milvus_heartbeat_interval
+        if interval <= 0:
+            return
+        
+        with self._lock:
+            if self._heartbeat_thread is not None and self._heartbeat_thread.is_alive():
+                return
+            self._heartbeat_stop = threading.Event()
+            self._heartbeat_thread = threading.Thread(
+                target=self._heartbeat, args=(interval, self._heartbeat_stop),
+                name="milvus-heartbeat", daemon=True
+            )
+            self._heartbeat_thread.start()
+    
+    def stop_heartbeat(self) -> None:
+        """Stop the background heartbeat and wait for it to exit."""
+        thread = self._heartbeat_thread
+        self._heartbeat_stop.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+        self._heartbeat_thread = None
+    
+    def _heartbeat(self, interval: float, stop: threading.Event) -> None:
+        """Heartbeat loop run by the background thread."""
+        while not stop.wait(interval):
+            last_success = self._last_success
+            if (not self._suspect and self.is_connected() and last_success is not None
+                    and time.monotonic() - last_success < interval):
+                # A real request proved the connection alive recently
+                continue
+            
+            if not self.check_health() and not stop.is_set():
+                logger.info("Milvus heartbeat failed, reconnecting...")
+                with self._lock:
+                    self._connect()
     
     def get_collection_stats(self) -> Dict[str, Any]:
         """Get collection statistics and health information.
@@ -179,21 +279,22 @@ class MilvusConnectionManager:
             return {"error": "Not connected to Milvus"}
         
         try:
-            stats = {
-                "collection_name": self.settings.milvus_collection_name,
-                "num_entities": self._collection.num_entities,
-                "has_index": self._collection.has_index(),
-                "is_loaded": True,  # If we can access it, it's loaded
-                "schema_fields": len(self._collection.describe()['fields'])
-            }
-            
-            # Add index information if available
-            if self._collection.has_index():
-                try:
-                    indexes = self._collection.indexes
-                    stats["indexes"] = [{"field": idx.field_name, "type": idx.index_type} for idx in indexes]
-                except Exception:
-                    stats["indexes"] = "Unable to retrieve index details"
+            with self._pool.lease() as collection:
+                stats = {
+                    "collection_name": self.settings.milvus_collection_name,
+                    "num_entities": collection.num_entities,
+                    "has_index": collection.has_index(),
+                    "is_loaded": True,  # If we can access it, it's loaded
+                    "schema_fields": len(collection.describe()['fields'])
+                }
+                
+                # Add index information if available
+                if collection.has_index():
+                    try:
+                        indexes = collection.indexes
+                        stats["indexes"] = [{"field": idx.field_name, "type": idx.index_type} for idx in indexes]
+                    except Exception:
+                        stats["indexes"] = "Unable to retrieve index details"
             
             return stats
         except Exception as e:
@@ -202,23 +303,41 @@ class MilvusConnectionManager:
     def ensure_connected(self) -> bool:
         """Ensure connection is active, reconnect if necessary.
         
+        No request is made while the connection is known to be good. After a
+        failed request the connection is probed once, and re-established only
+        if the probe fails too.
+        
         Returns:
             bool: True if connected successfully, False otherwise.
         """
-        if self.is_connected():
+        if self.is_connected() and (not self._suspect or self.check_health()):
             return True
         
         logger.info("Connection lost, attempting to reconnect...")
         return self.connect()
     
+    def lease(self) -> AbstractContextManager:
+        """Borrow a pooled connection for one request.
+        
+        The connection stays open until the with block exits, even if the pool
+        reconnects or another session disconnects meanwhile.
+        
+        Returns:
+            Context manager yielding a Collection bound to the leased connection.
+        """
+        return self._pool.lease()
+    
     @property
     def collection(self) -> Optional[Collection]:
         """Get the current collection instance.
         
+        Prefer lease() for requests: a handle obtained here is not protected
+        against the pool reconnecting.
+        
         Returns:
-            Collection instance if connected, None otherwise.
+            Collection instance if connected, None otherwise (no request is made).
         """
-        return self._collection if self.is_connected() else None
+        return self._pool.collection() if self.is_connected() else None
     
     def __enter__(self):
         """Context manager entry with connection validation."""
@@ -0,0 +1,261 @@
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pymilvus import connections, Collection
+from config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledConnection:
+    """One pymilvus alias and the collection handle bound to it."""
+
+    def __init__(self, alias: str, collection: Collection):
+        self.alias = alias
+        self.collection = collection
+        # Leases currently using this connection
+        self.in_use = 0
+        # Replaced by a newer generation; disconnected once in_use drops to 0
+        self.retired = False
+
+
+class MilvusConnectionPool:
+    """Process-wide pool of named Milvus connections for one collection.
+
+    Every connection has its own pymilvus alias (``milvus-pool-g<generation>-<n>``),
+    so nothing in the process shares or tears down the global ``"default"``
+    alias. Searches lease a connection for the duration of one request; the
+    least busy connection is handed out, so up to ``size`` searches run on
+    separate gRPC channels.
+
+    Owners (connection managers) hold a reference via retain()/release(); the
+    pool closes when the last one is released. Reconnecting or closing never
+    breaks a request in flight: the old connections are retired and only
+    disconnected once their last lease is returned.
+    """
+
+    def __init__(self, settings: Settings, size: int = 4):
+        """Initialize the pool. No connection is made until open().
+
+        Args:
+            settings: Settings holding the Milvus host, token and collection name
+            size: Number of connections (and aliases) in the pool
+        """
+        if size <= 0:
+            raise ValueError("Milvus pool size must be positive")
+
+        self.settings = settings
+        self.size = size
+        self._connections: List[_PooledConnection] = []
+        self._retired: List[_PooledConnection] = []
+        self._generation = 0
+        self._refcount = 0
+        # Guards the connection lists and counters; never held during a request
+        self._lock = threading.Lock()
+        # Serializes open/reconnect so concurrent failures reconnect only once
+        self._open_lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        """Incremented every time the pool's connections are (re)created."""
+        return self._generation
+
+    @property
+    def is_open(self) -> bool:
+        return bool(self._connections)
+
+    def retain(self) -> None:
+        """Register an owner of the pool."""
+        with self._lock:
+            self._refcount += 1
+
+    def release(self) -> None:
+        """Unregister an owner; the last one closes the pool."""
+        with self._lock:
+            self._refcount = max(0, self._refcount - 1)
+            if self._refcount > 0:
+                return
+            idle = self._retire(self._connections)
+            self._connections = []
+        for connection in idle:
+            self._disconnect(connection)
+        logger.info("Milvus connection pool closed")
+
+    def open(self) -> int:
+        """Connect the pool's aliases and load the collection, if not done yet.
+
+        Returns:
+            int: The pool generation now in use
+
+        Raises:
+            Exception: Any pymilvus or network error raised while connecting
+        """
+        with self._open_lock:
+            if not self.is_open:
+                self._install(self._generation + 1)
+            return self._generation
+
+    def reconnect(self, seen_generation: int) -> int:
+        """Replace the pool's connections after a failure.
+
+        Only reconnects if no one else did since seen_generation, so several
+        sessions noticing the same outage reconnect once.
+
+        Args:
+            seen_generation: The generation the caller found to be broken
+
+        Returns:
+            int: The pool generation now in use
+        """
+        with self._open_lock:
+            if self._generation == seen_generation or not self.is_open:
+                logger.info("Reconnecting Milvus connection pool...")
+                self._install(self._generation + 1)
+            return self._generation
+
+    @contextmanager
+    def lease(self) -> Iterator[Collection]:
+        """Borrow the least busy connection for one request.
+
+        Yields:
+            Collection: Collection handle bound to the leased connection
+
+        Raises:
+            RuntimeError: If the pool is not open
+        """
+        with self._lock:
+            if not self._connections:
+                raise RuntimeError("Milvus connection pool is not open")
+            connection = min(self._connections, key=lambda c: c.in_use)
+            connection.in_use += 1
+
+        try:
+            yield connection.collection
+        finally:
+            with self._lock:
+                connection.in_use -= 1
+                idle = connection.retired and connection.in_use == 0
+                if idle:
+                    self._retired.remove(connection)
+            if idle:
+                self._disconnect(connection)
+
+    def collection(self) -> Optional[Collection]:
+        """Return a collection handle without leasing it (for metadata calls)."""
+        with self._lock:
+            return self._connections[0].collection if self._connections else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool usage counters.
+
+        Returns:
+            Dict with the generation, owner count and per-alias lease counts.
+        """
+        with self._lock:
+            return {
+                "generation": self._generation,
+                "owners": self._refcount,
+                "size": self.size,
+                "in_use": {c.alias: c.in_use for c in self._connections},
+                "retired": len(self._retired),
+            }
+
+    def _create_connections(self, generation: int) -> List[_PooledConnection]:
+        """Connect a full set of aliases for a generation and load the collection."""
+        created: List[_PooledConnection] = []
+        try:
+            for index in range(self.size):
+                alias = f"milvus-pool-g{generation}-{index}"
+                logger.info(f"Creating Milvus connection {alias} to host: {self.settings.milvus_host}")
+                connections.connect(
+                    alias=alias,
+                    host=self.settings.milvus_host,
+                    token=self.settings.milvus_token,
+                    timeout=30  # 30 second timeout
+                )
+                created.append(_PooledConnection(alias, Collection(self.settings.milvus_collection_name, using=alias)))
+
+            self._load(created[0].collection)
+        except Exception:
+            for connection in created:
+                self._disconnect(connection)
+            raise
+
+        return created
+
+    def _load(self, collection: Collection) -> None:
+        """Load the collection into memory for fast search (once per generation)."""
+        name = self.settings.milvus_collection_name
+        logger.info(f"Initializing collection: {name}")
+
+        # Check if collection exists and has data
+        if collection.num_entities == 0:
+            logger.warning(f"Collection '{name}' is empty")
+
+        if not collection.has_index():
+            logger.warning(f"Collection '{name}' has no index - searches may be slow")
+
+        collection.load(timeout=60)  # 60 second timeout for loading
+        logger.info(f"Collection loaded successfully. Entities: {collection.num_entities}")
+
+        # Validate connection by performing a quick describe operation
+        collection_info = collection.describe()
+        logger.debug(f"Collection schema validated: {len(collection_info['fields'])} fields")
+
+    def _install(self, generation: int) -> None:
+        """Connect a new generation, swap it in and retire the old one.
+
+        Connecting happens without holding self._lock, so leases of the old
+        connections are not held up meanwhile.
+        """
+        new_connections = self._create_connections(generation)
+        with self._lock:
+            old, self._connections = self._connections, new_connections
+            self._generation = generation
+            idle = self._retire(old)
+        for connection in idle:
+            self._disconnect(connection)
+
+    def _retire(self, old: List[_PooledConnection]) -> List[_PooledConnection]:
+        """Mark connections as retired (holding self._lock); return those already idle."""
+        idle = []
+        for connection in old:
+            connection.retired = True
+            if connection.in_use == 0:
+                idle.append(connection)
+            else:
+                self._retired.append(connection)
+        # Disconnecting may block on the network, so callers do it after unlocking
+        return idle
+
+    @staticmethod
+    def _disconnect(connection: _PooledConnection) -> None:
+        try:
+            connections.disconnect(connection.alias)
+            logger.debug(f"Disconnected Milvus connection {connection.alias}")
+        except Exception as e:
+            logger.warning(f"Error disconnecting Milvus connection {connection.alias}: {e}")
+
+
+_pools: Dict[Tuple[Optional[str], str], MilvusConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_milvus_pool(settings: Optional[Settings] = None) -> MilvusConnectionPool:
+    """Return the process-wide pool for the configured Milvus host and collection.
+
+    Args:
+        settings: Settings object. If None, will create a new Settings instance.
+
+    Returns:
+        MilvusConnectionPool: The shared pool, created on first use
+    """
+    settings = settings or Settings()
+    key = (settings.milvus_host, settings.milvus_collection_name)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = MilvusConnectionPool(settings, size=settings.milvus_pool_size)
+        return pool
@@ -0,0 +1,310 @@
+import copy
+import json
+import logging
+import re
+from typing import Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Trie key marking the end of a word; real keys are single characters
+_END = ""
+
+
+class PronunciationLexicon:
+    """Pronunciation dictionary that rewrites whole words in a single scan.
+
+    Entries are stored in two character tries (case-insensitive and
+    case-sensitive). The tries are turned into one regular expression whose
+    alternatives share prefixes, so matching cost no longer grows with the number
+    of entries the way one regex per entry does. Adding or removing an entry only
+    updates its path in the trie and invalidates the cached pattern fragment for
+    its first character; the combined pattern is then recompiled right away, so
+    apply() never compiles. Bulk loads (the constructor and load_file) recompile
+    once at the end.
+
+    Matching follows the previous per-entry behaviour: whole words only (regex
+    word boundaries) and case-insensitive unless an entry is added as
+    case-sensitive. Differences: all entries are applied in one pass, so a
+    replacement is never rewritten again by another entry, and when entries
+    overlap the longest one wins (case-sensitive entries are tried first).
+    """
+
+    def __init__(self, entries: Optional[Dict[str, str]] = None):
+        """Initialize the lexicon.
+
+        Args:
+            entries: Initial case-insensitive word -> pronunciation mappings.
+        """
+        # Insertion-ordered word -> (pronunciation, case_sensitive), as added
+        self._entries: Dict[str, Tuple[str, bool]] = {}
+        # Lookup tables keyed on the matched text (lowercased for case-insensitive entries)
+        self._ci_lookup: Dict[str, str] = {}
+        self._cs_lookup: Dict[str, str] = {}
+        self._ci_trie: Dict[str, dict] = {}
+        self._cs_trie: Dict[str, dict] = {}
+        # Cached regex fragments per (case_sensitive, first character)
+        self._fragments: Dict[Tuple[bool, str], str] = {}
+        self._pattern: Optional[re.Pattern] = None
+        self._dirty = False
+        # Set by copy(); the tries are deep-copied on the first modification
+        self._shared = False
+
+        for word, pronunciation in (entries or {}).items():
+            self._add(word, pronunciation, False)
+        self._recompile()
+
+    @classmethod
+    def from_file(cls, path: str) -> "PronunciationLexicon":
+        """Create a lexicon from a file (see load_file for the supported formats)."""
+        lexicon = cls()
+        lexicon.load_file(path)
+        return lexicon
+
+    def load_file(self, path: str) -> int:
+        """Load entries from a file, adding to (or overriding) the current ones.
+
+        Supported formats:
+            - JSON object: {"Wintermute": "Winter-mute", ...}
+            - JSON list: [{"word": "...", "pronunciation": "...", "case_sensitive": false}, ...]
+            - Any other extension: one "word<TAB>pronunciation" pair per line;
+              blank lines and lines starting with '#' are ignored.
+
+        Args:
+            path: Path of the lexicon file
+
+        Returns:
+            int: Number of entries loaded
+        """
+        try:
+            loaded = self._load_entries(path)
+        finally:
+            # Entries added before a parse error are kept, so compile them too
+            self._recompile()
+
+        logger.info(f"Loaded {loaded} pronunciation entries from {path}")
+        return loaded
+
+    def _load_entries(self, path: str) -> int:
+        """Add the entries of a file without recompiling. See load_file()."""
+        loaded = 0
+        with open(path, 'r', encoding='utf-8') as file:
+            if path.endswith(".json"):
+                data = json.load(file)
+                if isinstance(data, dict):
+                    for word, pronunciation in data.items():
+                        self._add(word, pronunciation, False)
+                        loaded += 1
+                elif isinstance(data, list):
+                    for item in data:
+                        self._add(item["word"], item["pronunciation"], item.get("case_sensitive", False))
+                        loaded += 1
+                else:
+                    raise ValueError(f"Unsupported lexicon format in {path}")
+            else:
+                for line_number, line in enumerate(file, 1):
+                    line = line.rstrip("\n")
+                    if not line.strip() or line.lstrip().startswith("#"):
+                        continue
+                    try:
+                        word, pronunciation = line.split("\t", 1)
+                    except ValueError:
+                        raise ValueError(f"{path}:{line_number}: expected 'word<TAB>pronunciation'")
+                    self._add(word.strip(), pronunciation.strip(), False)
+                    loaded += 1
+        return loaded
+
+    def add(self, word: str, pronunciation: str, case_sensitive: bool = False) -> None:
+        """Add or replace an entry.
+
+        Args:
+            word: The word to replace
+            pronunciation: The pronunciation to use
+            case_sensitive: Only match the word with exactly this casing
+        """
+        self._add(word, pronunciation, case_sensitive)
+        self._recompile()
+
+    def _add(self, word: str, pronunciation: str, case_sensitive: bool) -> None:
+        """Add an entry to the tries without recompiling. See add()."""
+        if not word:
+            raise ValueError("Pronunciation entries need a non-empty word")
+
+        if word in self._entries:
+            self._remove(word)
+
+        self._unshare()
+        self._entries[word] = (pronunciation, case_sensitive)
+        key = word if case_sensitive else word.lower()
+        lookup = self._cs_lookup if case_sensitive else self._ci_lookup
+        lookup[key] = pronunciation
+
+        node = self._cs_trie if case_sensitive else self._ci_trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node[_END] = {}
+        self._invalidate(case_sensitive, key)
+
+    def remove(self, word: str) -> None:
+        """Remove an entry if present.
+
+        Args:
+            word: The word to remove
+        """
+        self._remove(word)
+        self._recompile()
+
+    def _remove(self, word: str) -> None:
+        """Remove an entry from the tries without recompiling. See remove()."""
+        entry = self._entries.get(word)
+        if entry is None:
+            return
+
+        self._unshare()
+        del self._entries[word]
+        case_sensitive = entry[1]
+        key = word if case_sensitive else word.lower()
+
+        # Another case-insensitive entry may share the lowercased key; the latest one wins
+        if not case_sensitive:
+            for other, (pronunciation, cs) in reversed(list(self._entries.items())):
+                if not cs and other.lower() == key:
+                    self._ci_lookup[key] = pronunciation
+                    return
+
+        lookup = self._cs_lookup if case_sensitive else self._ci_lookup
+        lookup.pop(key, None)
+        self._remove_from_trie(self._cs_trie if case_sensitive else self._ci_trie, key)
+        self._invalidate(case_sensitive, key)
+
+    def apply(self, text: str) -> str:
+        """Replace every whole-word entry occurrence in text in a single scan.
+
+        Args:
+            text: The text to rewrite
+
+        Returns:
+            str: The text with pronunciations applied (the same object if nothing matched)
+        """
+        pattern = self._pattern
+        if pattern is None:
+            return text
+        return pattern.sub(self._replace, text)
+
+    def compile(self) -> None:
+        """Make sure the matcher is built, e.g. before copying.
+
+        add(), remove() and the bulk loaders already recompile, so this only
+        does work if an earlier recompile was interrupted.
+        """
+        self._recompile()
+
+    def copy(self) -> "PronunciationLexicon":
+        """Return a copy that shares structure with this lexicon until either is modified."""
+        clone = copy.copy(self)
+        clone._entries = dict(self._entries)
+        clone._ci_lookup = dict(self._ci_lookup)
+        clone._cs_lookup = dict(self._cs_lookup)
+        clone._fragments = dict(self._fragments)
+        clone._shared = True
+        self._shared = True
+        return clone
+
+    def as_dict(self) -> Dict[str, str]:
+        """Return the word -> pronunciation mappings in insertion order."""
+        return {word: pronunciation for word, (pronunciation, _) in self._entries.items()}
+
+    def phrases(self) -> Iterator[Tuple[str, bool]]:
+        """Yield (word, case_sensitive) for entries that span several words."""
+        for word, (_, case_sensitive) in self._entries.items():
+            if any(char.isspace() for char in word):
+                yield word, case_sensitive
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        for word, (pronunciation, _) in self._entries.items():
+            yield word, pronunciation
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _replace(self, match: "re.Match[str]") -> str:
+        matched = match.group(0)
+        if match.lastgroup == "cs":
+            return self._cs_lookup.get(matched, matched)
+        return self._ci_lookup.get(matched.lower(), matched)
+
+    def _unshare(self) -> None:
+        """Deep-copy the tries before modifying a lexicon created by copy()."""
+        if self._shared:
+            self._ci_trie = copy.deepcopy(self._ci_trie)
+            self._cs_trie = copy.deepcopy(self._cs_trie)
+            self._shared = False
+
+    def _invalidate(self, case_sensitive: bool, key: str) -> None:
+        self._fragments.pop((case_sensitive, key[0]), None)
+        self._dirty = True
+
+    def _recompile(self) -> None:
+        """Rebuild the combined pattern if entries changed (reusing cached fragments)."""
+        if self._dirty:
+            self._pattern = self._compile()
+            self._dirty = False
+
+    def _compile(self) -> Optional[re.Pattern]:
+        alternatives = []
+        cs_fragment = self._trie_pattern(True, self._cs_trie)
+        if cs_fragment:
+            alternatives.append(f"(?P<cs>{cs_fragment})")
+        ci_fragment = self._trie_pattern(False, self._ci_trie)
+        if ci_fragment:
+            alternatives.append(f"(?P<ci>(?i:{ci_fragment}))")
+
+        if not alternatives:
+            return None
+        return re.compile(r'\b(?:' + "|".join(alternatives) + r')\b')
+
+    def _trie_pattern(self, case_sensitive: bool, trie: Dict[str, dict]) -> str:
+        """Build the alternation for a trie from per-first-character fragments."""
+        fragments = []
+        for char in sorted(trie):
+            key = (case_sensitive, char)
+            fragment = self._fragments.get(key)
+            if fragment is None:
+                fragment = re.escape(char) + self._node_pattern(trie[char])
+                self._fragments[key] = fragment
+            fragments.append(fragment)
+        return "|".join(fragments)
+
+    @classmethod
+    def _node_pattern(cls, node: Dict[str, dict]) -> str:
+        """Regex for the suffixes below a trie node, preferring longer words."""
+        children = sorted(char for char in node if char != _END)
+        if not children:
+            return ""
+
+        alternatives = [re.escape(char) + cls._node_pattern(node[char]) for char in children]
+        # A word ending here makes the rest optional; the group is greedy, so longer words win
+        if _END in node:
+            return "(?:" + "|".join(alternatives) + ")?"
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return "(?:" + "|".join(alternatives) + ")"
+
+    @staticmethod
+    def _remove_from_trie(trie: Dict[str, dict], key: str) -> None:
+        """Remove key from the trie and prune branches left without words."""
+        path = []
+        node = trie
+        for char in key:
+            if char not in node:
+                return
+            path.append((node, char))
+            node = node[char]
+        node.pop(_END, None)
+
+        for parent, char in reversed(path):
+            if parent[char]:
+                break
+            del parent[char]
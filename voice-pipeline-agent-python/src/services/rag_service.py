@@ -1,17 +1,28 @@
+import asyncio
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
-from sentence_transformers import SentenceTransformer
 from config.settings import Settings
+from .embedding_backends import EmbeddingBackend, create_embedding_backend
+from .embedding_cache import EmbeddingCache
+from .latency_metrics import get_latency_recorder
+from .local_vector_index import LocalVectorIndex
 from .milvus_connection import MilvusConnectionManager
 
 logger = logging.getLogger(__name__)
 
+LOCAL_INDEX_MODES = ("off", "fallback", "prefer")
+
 
 class RagService:
     """Service class for Retrieval-Augmented Generation focusing on embeddings and search."""
     
     def __init__(self, connection_manager: Optional[MilvusConnectionManager] = None, 
-                 settings: Optional[Settings] = None):
+                 settings: Optional[Settings] = None,
+                 embedding_cache: Optional[EmbeddingCache] = None,
+                 local_index: Optional[LocalVectorIndex] = None,
+                 embedding_backend: Optional[EmbeddingBackend] = None):
         """Initialize the RAG service with connection manager and embedding model.
         
         Args:
@@ -19,15 +30,43 @@ class RagService:
                               If None, will create a new instance using settings.
             settings: Settings object containing configuration.
                      If None, will create a new Settings instance.
+            embedding_cache: EmbeddingCache placed in front of the embedding model.
+                            If None, one is created from settings.
+            local_index: Local snapshot of the collection, used according to
+                        settings.local_index_mode. If None and the mode is not
+                        "off", one is opened from settings.local_index_dir.
+            embedding_backend: Backend that embeds query texts. If None, the one
+                              selected by settings.embedding_backend is created.
         """
         self.settings = settings or Settings()
         self.connection_manager = connection_manager or MilvusConnectionManager(self.settings)
-        self._embedding_model = None
+        self._embedding_backend = None
+        self._embedding_cache = embedding_cache or EmbeddingCache(
+            max_entries=self.settings.embedding_cache_size,
+            ttl_seconds=self.settings.embedding_cache_ttl,
+            persist_path=self.settings.embedding_cache_path
+        )
+        
+        if self.settings.local_index_mode not in LOCAL_INDEX_MODES:
+            raise ValueError(f"Unknown local index mode {self.settings.local_index_mode!r}, expected one of {LOCAL_INDEX_MODES}")
+        self._local_index = local_index
+        if self._local_index is None and self.settings.local_index_mode != "off":
+            self._local_index = LocalVectorIndex(self.settings.local_index_dir, use_hnsw=self.settings.local_index_hnsw)
+        if self._local_index is not None:
+            self._local_index.load()
+        self._local_index_thread: Optional[threading.Thread] = None
+        self._local_index_stop = threading.Event()
+        
+        # Bounded executor for CPU-bound encoding and blocking Milvus calls made from async code
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.settings.rag_executor_workers,
+            thread_name_prefix="rag"
+        )
         
         # Initialize embedding model (same as Java LangChain4j AllMiniLmL6V2EmbeddingModel)
         try:
-            self._embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-            logger.info("Loaded all-MiniLM-L6-v2 embedding model")
+            self._embedding_backend = embedding_backend or create_embedding_backend(self.settings)
+            logger.info(f"Loaded {self._embedding_backend} embedding model")
         except Exception as e:
             logger.error(f"Failed to load embedding model: {e}")
             raise
@@ -35,23 +74,93 @@ class RagService:
     def generate_embedding(self, text: str) -> List[float]:
         """Generate embedding for the given text using all-MiniLM-L6-v2 model.
         
+        Embeddings are served from the embedding cache when the same (normalized)
+        text was encoded before, skipping the model forward pass.
+        
         Args:
             text: The text to embed
             
         Returns:
             List of floats representing the embedding vector (384 dimensions)
         """
-        if self._embedding_model is None:
+        if self._embedding_backend is None:
             raise RuntimeError("Embedding model not initialized")
         
+        model_name = self._embedding_backend.name
+        cached = self._embedding_cache.get(text, model_name)
+        if cached is not None:
+            return cached
+        
         try:
             # Generate embedding - returns numpy array, convert to list
-            embedding = self._embedding_model.encode(text, convert_to_tensor=False)
-            return embedding.tolist()
+            embedding = self._embedding_backend.encode([text])[0].tolist()
+            self._embedding_cache.put(text, model_name, embedding)
+            return embedding
         except Exception as e:
             logger.error(f"Error generating embedding: {e}")
             raise
     
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for several texts with a single model call.
+        
+        Texts found in the embedding cache are not encoded again; the rest are
+        deduplicated and encoded as one batch.
+        
+        Args:
+            texts: The texts to embed
+            
+        Returns:
+            List of embedding vectors, in the order of texts
+        """
+        if self._embedding_backend is None:
+            raise RuntimeError("Embedding model not initialized")
+        
+        model_name = self._embedding_backend.name
+        embeddings: List[Optional[List[float]]] = [
+            self._embedding_cache.get(text, model_name) for text in texts
+        ]
+        
+        # Normalized text -> positions in texts still missing an embedding
+        missing: Dict[str, List[int]] = {}
+        for i, embedding in enumerate(embeddings):
+            if embedding is None:
+                missing.setdefault(EmbeddingCache.normalize(texts[i]), []).append(i)
+        
+        if missing:
+            batch = [texts[positions[0]] for positions in missing.values()]
+            try:
+                vectors = self._embedding_backend.encode(batch).tolist()
+            except Exception as e:
+                logger.error(f"Error generating embeddings: {e}")
+                raise
+            
+            for text, positions, vector in zip(batch, missing.values(), vectors):
+                self._embedding_cache.put(text, model_name, vector)
+                for i in positions:
+                    embeddings[i] = vector
+        
+        return embeddings
+    
+    async def generate_embedding_async(self, text: str) -> List[float]:
+        """Generate an embedding without blocking the event loop.
+        
+        Encoding runs on the service's bounded executor so concurrent sessions
+        sharing the event loop keep streaming audio while the model works.
+        
+        Args:
+            text: The text to embed
+            
+        Returns:
+            List of floats representing the embedding vector (384 dimensions)
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.generate_embedding, text)
+    
+    async def generate_embeddings_async(self, texts: List[str]) -> List[List[float]]:
+        """Async variant of generate_embeddings, run on the bounded executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.generate_embeddings, texts)
+    
     def search_by_text(self, query_text: str, limit: int = 1, 
                       output_fields: Optional[List[str]] = None,
                       score_threshold: float = 0.0) -> List[Dict[str, Any]]:
@@ -69,67 +178,309 @@ class RagService:
         Returns:
             List of dictionaries containing search results with scores and metadata.
         """
-        # Ensure connection is active, reconnect if necessary
-        if not self.connection_manager.ensure_connected():
-            raise RuntimeError("Unable to establish connection to Milvus. Check connection configuration.")
+        return self.search_many([query_text], limit, output_fields, score_threshold)[0]
+    
+    def search_many(self, query_texts: List[str], limit: int = 1,
+                    output_fields: Optional[List[str]] = None,
+                    score_threshold: float = 0.0) -> List[List[Dict[str, Any]]]:
+        """Search for several queries with one encode batch and one Milvus request.
+        
+        Args:
+            query_texts: The texts to search for
+            limit: Maximum number of results to return per query
+            output_fields: List of fields to include in results. If None, returns all fields.
+            score_threshold: Minimum similarity score to include in results
+            
+        Returns:
+            One list of results per query, in the order of query_texts.
+        """
+        if not query_texts:
+            return []
         
-        # Get the collection from connection manager
-        collection = self.connection_manager.collection
-        if collection is None:
-            raise RuntimeError("Collection is not available. Connection may have failed.")
+        with get_latency_recorder().span("rag_search"):
+            if self._prefer_local_index():
+                return self._search_local(query_texts, limit, output_fields, score_threshold)
+            try:
+                return self._search_many(query_texts, limit, output_fields, score_threshold)
+            except Exception as e:
+                if not self._local_index_ready():
+                    raise
+                logger.warning(f"Milvus search failed, answering from the local vector index: {e}")
+                return self._search_local(query_texts, limit, output_fields, score_threshold)
+    
+    def _search_many(self, query_texts: List[str], limit: int,
+                     output_fields: Optional[List[str]],
+                     score_threshold: float) -> List[List[Dict[str, Any]]]:
+        self._ensure_connected()
         
         try:
-            # Generate embedding for the query text
-            query_embedding = self.generate_embedding(query_text)
-            logger.info(f"Generated embedding for query: '{query_text[:50]}{'...' if len(query_text) > 50 else ''}'")
+            # Generate embeddings for all query texts in one batch
+            query_embeddings = self.generate_embeddings(query_texts)
+            self._log_queries(query_texts)
             
             # Default output fields if not specified
             if output_fields is None:
                 output_fields = ["*"]
             
-            # Perform vector search
-            search_params = {
-                "metric_type": "COSINE",  # or "L2", "IP" depending on your setup
-                "params": {"nprobe": 10}
-            }
+            try:
+                # Lease a pooled connection so a reconnect elsewhere cannot close it mid-request
+                with self.connection_manager.lease() as collection:
+                    results = collection.search(
+                        data=query_embeddings,
+                        anns_field="vector",  # Assuming your vector field is named "vector"
+                        param=self._search_params(),
+                        limit=limit,
+                        output_fields=output_fields
+                    )
+            except Exception as e:
+                self.connection_manager.record_failure(e)
+                raise
+            self.connection_manager.record_success()
             
-            results = collection.search(
-                data=[query_embedding],
-                anns_field="vector",  # Assuming your vector field is named "vector"
-                param=search_params,
-                limit=limit,
-                output_fields=output_fields
-            )
-            
-            # Format results
-            formatted_results = []
-            for hit in results[0]:
-                result = {
-                    "id": hit.id,
-                    "score": hit.score,
-                    "distance": hit.distance
-                }
-                # Add entity fields
-                if hasattr(hit, 'entity'):
-                    for field_name in output_fields:
-                        if field_name != "*" and hasattr(hit.entity, field_name):
-                            result[field_name] = getattr(hit.entity, field_name)
-                
-                formatted_results.append(result)
-            
-            # Filter by score threshold if specified
-            if score_threshold > 0.0:
-                filtered_results = [r for r in formatted_results if r.get('score', 0.0) >= score_threshold]
-                logger.info(f"Filtered {len(formatted_results)} to {len(filtered_results)} results using threshold {score_threshold}")
-                return filtered_results
-            
-            logger.info(f"Found {len(formatted_results)} similar vectors")
-            return formatted_results
+            return [self._format_results(hits, output_fields, score_threshold) for hits in results]
             
         except Exception as e:
             logger.error(f"Error in semantic text search: {e}")
             raise
     
+    async def search_by_text_async(self, query_text: str, limit: int = 1,
+                                   output_fields: Optional[List[str]] = None,
+                                   score_threshold: float = 0.0,
+                                   timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Async variant of search_by_text that never blocks the event loop.
+        
+        The connection check and the embedding run on the bounded executor and
+        the Milvus search is issued as a non-blocking request. Cancelling the
+        awaiting task (or hitting the timeout) cancels the in-flight search.
+        
+        Args:
+            query_text: The text to search for
+            limit: Maximum number of results to return
+            output_fields: List of fields to include in results. If None, returns all fields.
+            score_threshold: Minimum similarity score to include in results
+            timeout: Seconds to wait for the whole search. Defaults to settings.rag_search_timeout.
+            
+        Returns:
+            List of dictionaries containing search results with scores and metadata.
+            
+        Raises:
+            asyncio.TimeoutError: If the search does not complete within the timeout.
+        """
+        results = await self.search_many_async([query_text], limit, output_fields, score_threshold, timeout)
+        return results[0]
+    
+    async def search_many_async(self, query_texts: List[str], limit: int = 1,
+                                output_fields: Optional[List[str]] = None,
+                                score_threshold: float = 0.0,
+                                timeout: Optional[float] = None) -> List[List[Dict[str, Any]]]:
+        """Async variant of search_many that never blocks the event loop.
+        
+        Args:
+            query_texts: The texts to search for
+            limit: Maximum number of results to return per query
+            output_fields: List of fields to include in results. If None, returns all fields.
+            score_threshold: Minimum similarity score to include in results
+            timeout: Seconds to wait for the whole batch. Defaults to settings.rag_search_timeout.
+            
+        Returns:
+            One list of results per query, in the order of query_texts.
+            
+        Raises:
+            asyncio.TimeoutError: If the search does not complete within the timeout.
+        """
+        if not query_texts:
+            return []
+        if timeout is None:
+            timeout = self.settings.rag_search_timeout
+        
+        with get_latency_recorder().span("rag_search"):
+            if self._prefer_local_index():
+                return await self._search_local_async(query_texts, limit, output_fields, score_threshold)
+            try:
+                return await asyncio.wait_for(
+                    self._search_many_async(query_texts, limit, output_fields, score_threshold, timeout),
+                    timeout=timeout
+                )
+            except Exception as e:
+                if not self._local_index_ready():
+                    raise
+                logger.warning(f"Milvus search failed, answering from the local vector index: {e!r}")
+                return await self._search_local_async(query_texts, limit, output_fields, score_threshold)
+    
+    async def _search_many_async(self, query_texts: List[str], limit: int,
+                                 output_fields: Optional[List[str]],
+                                 score_threshold: float,
+                                 timeout: float) -> List[List[Dict[str, Any]]]:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._ensure_connected)
+        
+        try:
+            query_embeddings = await self.generate_embeddings_async(query_texts)
+            self._log_queries(query_texts)
+            
+            if output_fields is None:
+                output_fields = ["*"]
+            
+            try:
+                # The lease is held until the result arrives, so the connection
+                # cannot be retired under the in-flight request
+                with self.connection_manager.lease() as collection:
+                    # _async=True returns a SearchFuture backed by a gRPC future, so the
+                    # request is in flight without holding the event loop
+                    search_future = collection.search(
+                        data=query_embeddings,
+                        anns_field="vector",
+                        param=self._search_params(),
+                        limit=limit,
+                        output_fields=output_fields,
+                        timeout=timeout,
+                        _async=True
+                    )
+                    try:
+                        results = await loop.run_in_executor(self._executor, search_future.result)
+                    except asyncio.CancelledError:
+                        search_future.cancel()
+                        raise
+            except Exception as e:
+                self.connection_manager.record_failure(e)
+                raise
+            self.connection_manager.record_success()
+            
+            return [self._format_results(hits, output_fields, score_threshold) for hits in results]
+            
+        except asyncio.CancelledError:
+            logger.info("Semantic text search cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Error in async semantic text search: {e}")
+            raise
+    
+    def _local_index_ready(self) -> bool:
+        return (self.settings.local_index_mode != "off"
+                and self._local_index is not None and self._local_index.ready)
+    
+    def _prefer_local_index(self) -> bool:
+        return self.settings.local_index_mode == "prefer" and self._local_index_ready()
+    
+    def _search_local(self, query_texts: List[str], limit: int,
+                      output_fields: Optional[List[str]],
+                      score_threshold: float) -> List[List[Dict[str, Any]]]:
+        """Answer a search from the local vector index (no network request)."""
+        query_embeddings = self.generate_embeddings(query_texts)
+        return self._local_index.search(query_embeddings, limit, output_fields, score_threshold)
+    
+    async def _search_local_async(self, query_texts: List[str], limit: int,
+                                  output_fields: Optional[List[str]],
+                                  score_threshold: float) -> List[List[Dict[str, Any]]]:
+        query_embeddings = await self.generate_embeddings_async(query_texts)
+        # Top-k over a single book's vectors is far below a millisecond; no need to leave the loop
+        return self._local_index.search(query_embeddings, limit, output_fields, score_threshold)
+    
+    def refresh_local_index(self) -> bool:
+        """Snapshot the Milvus collection into the local vector index.
+        
+        Returns:
+            bool: True if a new snapshot was written by this call
+        """
+        if self._local_index is None:
+            return False
+        
+        self._ensure_connected()
+        with self.connection_manager.lease() as collection:
+            return self._local_index.refresh_from_collection(collection)
+    
+    def start_local_index_refresher(self) -> None:
+        """Keep the local vector index fresh from a background thread.
+        
+        The snapshot is rebuilt from Milvus once it is older than
+        settings.local_index_refresh_interval (by whichever worker process gets
+        there first); in between, snapshots written by other processes are loaded.
+        Does nothing when the local index is off.
+        """
+        if self._local_index is None or self.settings.local_index_mode == "off":
+            return
+        if self._local_index_thread is not None and self._local_index_thread.is_alive():
+            return
+        
+        self._local_index_stop = threading.Event()
+        self._local_index_thread = threading.Thread(
+            target=self._local_index_refresh_loop, args=(self._local_index_stop,),
+            name="local-index-refresher", daemon=True
+        )
+        self._local_index_thread.start()
+    
+    def stop_local_index_refresher(self) -> None:
+        """Stop the background refresher thread."""
+        self._local_index_stop.set()
+        if self._local_index_thread is not None:
+            self._local_index_thread.join(timeout=5)
+            self._local_index_thread = None
+    
+    def _local_index_refresh_loop(self, stop: threading.Event) -> None:
+        interval = self.settings.local_index_refresh_interval
+        delay = 0.0
+        while not stop.wait(delay):
+            delay = interval
+            try:
+                age = self._local_index.age()
+                if age is None or age >= interval:
+                    self.refresh_local_index()
+                else:
+                    self._local_index.load()
+                    delay = interval - age
+            except Exception as e:
+                logger.warning(f"Local vector index refresh failed: {e}")
+                delay = min(interval, self.settings.local_index_retry_interval)
+    
+    @staticmethod
+    def _log_queries(query_texts: List[str]) -> None:
+        for query_text in query_texts:
+            logger.info(f"Generated embedding for query: '{query_text[:50]}{'...' if len(query_text) > 50 else ''}'")
+    
+    def _ensure_connected(self) -> None:
+        """Make sure the pooled connections are up, reconnecting if necessary.
+        
+        Makes no request while the connection is healthy, so a search costs a
+        single round trip.
+        """
+        # Ensure connection is active, reconnect if necessary
+        if not self.connection_manager.ensure_connected():
+            raise RuntimeError("Unable to establish connection to Milvus. Check connection configuration.")
+    
+    def _search_params(self) -> Dict[str, Any]:
+        """Vector search parameters shared by the sync and async search paths."""
+        return {
+            "metric_type": "COSINE",  # or "L2", "IP" depending on your setup
+            "params": {"nprobe": 10}
+        }
+    
+    def _format_results(self, hits, output_fields: List[str],
+                        score_threshold: float) -> List[Dict[str, Any]]:
+        """Convert Milvus hits into result dictionaries and apply the score threshold."""
+        formatted_results = []
+        for hit in hits:
+            result = {
+                "id": hit.id,
+                "score": hit.score,
+                "distance": hit.distance
+            }
+            # Add entity fields
+            if hasattr(hit, 'entity'):
+                for field_name in output_fields:
+                    if field_name != "*" and hasattr(hit.entity, field_name):
+                        result[field_name] = getattr(hit.entity, field_name)
+            
+            formatted_results.append(result)
+        
+        # Filter by score threshold if specified
+        if score_threshold > 0.0:
+            filtered_results = [r for r in formatted_results if r.get('score', 0.0) >= score_threshold]
+            logger.info(f"Filtered {len(formatted_results)} to {len(filtered_results)} results using threshold {score_threshold}")
+            return filtered_results
+        
+        logger.info(f"Found {len(formatted_results)} similar vectors")
+        return formatted_results
+    
     # Convenience methods to access connection manager functionality
     def connect(self) -> bool:
         """Connect to Milvus database. Delegates to connection manager."""
@@ -147,6 +498,25 @@ class RagService:
         """Get collection statistics. Delegates to connection manager."""
         return self.connection_manager.get_collection_stats()
     
+    def get_connection_health(self) -> Dict[str, Any]:
+        """Get a connection health snapshot. Delegates to connection manager."""
+        return self.connection_manager.health()
+    
+    def get_local_index_stats(self) -> Dict[str, Any]:
+        """Get the local vector index mode, size and snapshot age."""
+        if self._local_index is None:
+            return {"mode": self.settings.local_index_mode, "ready": False}
+        return {
+            "mode": self.settings.local_index_mode,
+            "ready": self._local_index.ready,
+            "vectors": len(self._local_index),
+            "age_seconds": self._local_index.age(),
+        }
+    
+    def get_embedding_cache_stats(self) -> Dict[str, Any]:
+        """Get embedding cache hit/miss counters."""
+        return self._embedding_cache.stats()
+    
     def __enter__(self):
         """Context manager entry with connection validation."""
         if not self.connection_manager.connect():
@@ -0,0 +1,119 @@
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+Replacement = Union[str, Callable[["re.Match[str]"], str]]
+
+
+class _GuardedPass:
+    """Base class for passes that are skipped unless the text has their trigger characters."""
+
+    def __init__(self, name: str, requires: Sequence[str] = ()):
+        self.name = name
+        self._requires = [frozenset(chars) for chars in requires]
+
+    def should_run(self, chars: frozenset) -> bool:
+        """Return True if the text (given as its character set) can match this pass."""
+        for required in self._requires:
+            if required.isdisjoint(chars):
+                return False
+        return True
+
+    def apply(self, text: str) -> str:
+        raise NotImplementedError
+
+
+class RewritePass(_GuardedPass):
+    """A single scan over the text that applies one or more merged rewrite rules.
+
+    Rules merged into a pass are compiled into one alternation of named groups
+    and dispatched on ``match.lastgroup``, so the text is scanned and copied once
+    no matter how many rules the pass holds. A pass is skipped entirely unless
+    the text contains at least one character from every string in ``requires``;
+    streamed LLM tokens rarely contain any trigger characters, so most chunks
+    skip most passes.
+    """
+
+    def __init__(self, name: str, rules: Sequence[Tuple[str, str, Replacement]],
+                 requires: Sequence[str] = (), flags: int = 0):
+        """Compile the pass.
+
+        Args:
+            name: Name of the pass, used for debugging and benchmarks.
+            rules: (group name, pattern, replacement) tuples, tried in order at each
+                   position. Group names inside patterns must be unique per pass.
+                   A string replacement is a template (as in ``re.sub``); in merged
+                   passes refer to groups by name (``\\g<name>``).
+            requires: Character sets that must all intersect the text for the pass
+                      to run. An empty sequence means the pass always runs.
+            flags: Regex flags applied to the combined pattern.
+        """
+        if not rules:
+            raise ValueError("A rewrite pass needs at least one rule")
+
+        super().__init__(name, requires)
+
+        if len(rules) == 1:
+            _, pattern, replacement = rules[0]
+            self._regex = re.compile(pattern, flags)
+            self._replacement: Replacement = replacement
+        else:
+            self._regex = re.compile(
+                "|".join(f"(?P<{group}>{pattern})" for group, pattern, _ in rules), flags
+            )
+            self._handlers: Dict[str, Replacement] = {group: replacement for group, _, replacement in rules}
+            self._replacement = self._dispatch
+
+    def apply(self, text: str) -> str:
+        """Apply the pass. Returns the same object when nothing matched."""
+        return self._regex.sub(self._replacement, text)
+
+    def _dispatch(self, match: "re.Match[str]") -> str:
+        handler = self._handlers[match.lastgroup]
+        if isinstance(handler, str):
+            return match.expand(handler)
+        return handler(match)
+
+
+class CallablePass(_GuardedPass):
+    """A guarded pass backed by a plain function, for rewrites that need their own scan logic."""
+
+    def __init__(self, name: str, function: Callable[[str], str], requires: Sequence[str] = ()):
+        super().__init__(name, requires)
+        self._function = function
+
+    def apply(self, text: str) -> str:
+        return self._function(text)
+
+
+class RewriteEngine:
+    """Runs an ordered list of guarded passes over a text.
+
+    The character set used by the guards is recomputed only when a pass
+    actually changed the text, so a chunk without trigger characters costs one
+    ``frozenset`` construction plus a few set intersections.
+    """
+
+    def __init__(self, passes: Sequence[_GuardedPass]):
+        self.passes: List[_GuardedPass] = list(passes)
+
+    def rewrite(self, text: str, stats: Optional[Dict[str, int]] = None) -> str:
+        """Rewrite text through every pass whose guard matches.
+
+        Args:
+            text: The text to rewrite
+            stats: Optional dict that receives the number of times each pass ran.
+
+        Returns:
+            str: The rewritten text
+        """
+        chars = frozenset(text)
+        for rewrite_pass in self.passes:
+            if not rewrite_pass.should_run(chars):
+                continue
+            if stats is not None:
+                stats[rewrite_pass.name] = stats.get(rewrite_pass.name, 0) + 1
+            rewritten = rewrite_pass.apply(text)
+            if rewritten is not text:
+                text = rewritten
+                chars = frozenset(text)
+        return text
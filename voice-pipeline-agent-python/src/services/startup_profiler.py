@@ -0,0 +1,163 @@
+import builtins
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+PROFILE_FLAG = "--profile-startup"
+# Inherited by the job processes, which do not see the command line flag
+PROFILE_ENV = "PROFILE_STARTUP"
+
+
+class StartupProfiler:
+    """Measures import and initialization time while a process starts.
+
+    Imports are timed by wrapping ``builtins.__import__``: every module that is
+    actually loaded (not already in sys.modules) gets its cumulative time and
+    its self time (excluding the nested imports it triggered). Modules loaded
+    via importlib.import_module are counted in their importer's self time.
+    Initialization steps are added with phase() or add_phase().
+    """
+
+    def __init__(self):
+        self._original_import = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # module name -> (cumulative seconds, self seconds)
+        self._imports: Dict[str, Tuple[float, float]] = {}
+        self._phases: List[Tuple[str, float]] = []
+        self._started_at = time.perf_counter()
+
+    def install(self) -> "StartupProfiler":
+        """Start timing imports."""
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._import
+        return self
+
+    def uninstall(self) -> None:
+        """Stop timing imports."""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time an initialization step."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start)
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._phases.append((name, seconds))
+
+    def report(self, title: str = "startup", top: int = 20) -> str:
+        """Format the import and initialization breakdown.
+
+        Args:
+            title: Label for this process (e.g. "main process", "job process prewarm")
+            top: Number of packages and modules to list
+
+        Returns:
+            str: A multi-line report
+        """
+        with self._lock:
+            imports = dict(self._imports)
+            phases = list(self._phases)
+
+        packages: Dict[str, float] = {}
+        for name, (_, self_time) in imports.items():
+            package = name.split(".")[0]
+            packages[package] = packages.get(package, 0.0) + self_time
+
+        lines = [
+            f"Startup profile ({title}, pid {os.getpid()}): "
+            f"{time.perf_counter() - self._started_at:.2f}s since profiling started, "
+            f"{sum(packages.values()):.2f}s importing {len(imports)} modules",
+            "  Import time by top-level package (self time, summed):",
+        ]
+        for package, seconds in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+            lines.append(f"    {seconds * 1000:9.1f} ms  {package}")
+
+        lines.append("  Slowest modules (cumulative / self):")
+        for name, (cumulative, self_time) in sorted(imports.items(), key=lambda item: -item[1][0])[:top]:
+            lines.append(f"    {cumulative * 1000:9.1f} ms / {self_time * 1000:8.1f} ms  {name}")
+
+        if phases:
+            lines.append("  Initialization:")
+            for name, seconds in phases:
+                lines.append(f"    {seconds * 1000:9.1f} ms  {name}")
+        return "\n".join(lines)
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        target = _resolve_name(name, globals, level)
+        if target is None or target in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+
+        start = time.perf_counter()
+        stack.append(0.0)
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            with self._lock:
+                self._imports[target] = (elapsed, elapsed - children)
+
+
+def _resolve_name(name: str, globals: Optional[dict], level: int) -> Optional[str]:
+    """Return the absolute module name of an import statement, or None if unknown."""
+    if level == 0:
+        return name
+    package = (globals or {}).get("__package__")
+    if not package:
+        return None
+    parts = package.rsplit(".", level - 1)
+    if len(parts) < level:
+        return None
+    base = parts[0]
+    return f"{base}.{name}" if name else base
+
+
+_profiler: Optional[StartupProfiler] = None
+
+
+def start_startup_profiling(argv: Optional[List[str]] = None) -> Optional[StartupProfiler]:
+    """Install the process's profiler if --profile-startup or PROFILE_STARTUP=1 asks for it.
+
+    The flag is removed from argv (so the LiveKit CLI does not reject it) and
+    exported as PROFILE_STARTUP=1 so job processes profile their own startup.
+
+    Args:
+        argv: Argument list to inspect and edit. Defaults to sys.argv.
+
+    Returns:
+        The installed StartupProfiler, or None if profiling is off
+    """
+    global _profiler
+    argv = sys.argv if argv is None else argv
+    if PROFILE_FLAG in argv:
+        argv.remove(PROFILE_FLAG)
+        os.environ[PROFILE_ENV] = "1"
+
+    if os.getenv(PROFILE_ENV) != "1":
+        return None
+    if _profiler is None:
+        _profiler = StartupProfiler().install()
+    return _profiler
+
+
+def get_startup_profiler() -> Optional[StartupProfiler]:
+    """Return the profiler installed by start_startup_profiling(), if any."""
+    return _profiler
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test script for the embedding backends and the equivalence check.
+
+Set EMBEDDING_MODEL_DIR to a directory built with
+``python -m services.embedding_backends export <dir>`` to also compare the
+ONNX backends against the sentence-transformers reference model.
+"""
+import os
+import sys
+
+import numpy as np
+
+# embedding_backends reads its defaults from config.settings in the parent directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_backends import EmbeddingBackend, check_equivalence
+
+
+class _HashBackend(EmbeddingBackend):
+    """Deterministic stand-in model: one pseudo-random unit vector per text."""
+
+    def __init__(self, noise: float = 0.0):
+        self.name = f"hash-{noise}"
+        self._noise = noise
+
+    def encode(self, texts):
+        vectors = []
+        for text in texts:
+            rng = np.random.default_rng(sum(map(ord, text)))
+            vector = rng.normal(size=384)
+            vector += self._noise * np.random.default_rng(len(text)).normal(size=384)
+            vectors.append(vector / np.linalg.norm(vector))
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def test_embedding_backends():
+    """Check the equivalence check itself, then the real backends if available."""
+
+    print("Embedding Backends Test Results")
+    print("=" * 50)
+
+    print("\n1. Equivalence check")
+    print("-" * 30)
+    reference = _HashBackend()
+    close = check_equivalence(reference, _HashBackend(noise=0.05))
+    far = check_equivalence(reference, _HashBackend(noise=1.0))
+    print(f"Small noise: min cosine {close['min_cosine']:.4f}, passed={close['passed']}")
+    print(f"Large noise: min cosine {far['min_cosine']:.4f}, passed={far['passed']}")
+    assert close["passed"] and not far["passed"]
+
+    print("\n2. ONNX backends against the reference model")
+    print("-" * 30)
+    model_dir = os.getenv("EMBEDDING_MODEL_DIR")
+    if not model_dir:
+        print("Skipped: EMBEDDING_MODEL_DIR is not set")
+        return
+
+    from embedding_backends import OnnxEmbeddingBackend, SentenceTransformerBackend
+
+    reference = SentenceTransformerBackend()
+    for quantized in (False, True):
+        result = check_equivalence(reference, OnnxEmbeddingBackend(model_dir, quantized=quantized))
+        print(f"{result['candidate']}: min cosine {result['min_cosine']:.4f}, mean {result['mean_cosine']:.4f}")
+        assert result["passed"]
+
+
+if __name__ == "__main__":
+    test_embedding_backends()
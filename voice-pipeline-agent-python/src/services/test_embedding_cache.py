@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test script for the EmbeddingCache LRU/TTL eviction and persistent tier.
+"""
+import os
+import tempfile
+import time
+
+from embedding_cache import EmbeddingCache
+
+
+def test_embedding_cache():
+    """Exercise hits, misses, LRU eviction, TTL expiry and the on-disk tier."""
+
+    print("Embedding Cache Test Results")
+    print("=" * 50)
+
+    cache = EmbeddingCache(max_entries=2, ttl_seconds=60)
+    vector = [0.25, -0.5, 1.0]
+
+    print("\n1. Normalized keys")
+    print("-" * 30)
+    assert cache.get("past tense verbs", "all-MiniLM-L6-v2") is None
+    cache.put("past tense verbs", "all-MiniLM-L6-v2", vector)
+    assert cache.get("  past   tense verbs ", "all-MiniLM-L6-v2") == vector
+    assert cache.get("past tense verbs", "another-model") is None
+    print(f"Stats: {cache.stats()}")
+
+    print("\n2. LRU eviction")
+    print("-" * 30)
+    cache.put("dialogue", "all-MiniLM-L6-v2", vector)
+    cache.get("past tense verbs", "all-MiniLM-L6-v2")
+    cache.put("character conversations", "all-MiniLM-L6-v2", vector)
+    assert cache.get("dialogue", "all-MiniLM-L6-v2") is None
+    assert cache.get("past tense verbs", "all-MiniLM-L6-v2") == vector
+    print(f"Stats: {cache.stats()}")
+
+    print("\n3. TTL expiry")
+    print("-" * 30)
+    short_lived = EmbeddingCache(max_entries=4, ttl_seconds=0.05)
+    short_lived.put("morning", "all-MiniLM-L6-v2", vector)
+    time.sleep(0.1)
+    assert short_lived.get("morning", "all-MiniLM-L6-v2") is None
+    print(f"Stats: {short_lived.stats()}")
+
+    print("\n4. Persistent tier survives a restart")
+    print("-" * 30)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "embeddings.sqlite")
+        first = EmbeddingCache(max_entries=4, ttl_seconds=60, persist_path=path)
+        first.put("noon", "all-MiniLM-L6-v2", vector)
+        first.close()
+
+        restarted = EmbeddingCache(max_entries=4, ttl_seconds=60, persist_path=path)
+        assert restarted.get("noon", "all-MiniLM-L6-v2") == vector
+        assert restarted.stats()["disk_hits"] == 1
+        print(f"Stats: {restarted.stats()}")
+        restarted.close()
+
+
+if __name__ == "__main__":
+    test_embedding_cache()
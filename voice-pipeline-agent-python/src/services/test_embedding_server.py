@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared embedding server: micro-batching and the remote backend.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# embedding_server reads its defaults from config.settings in the parent directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.embedding_backends import EmbeddingBackend
+from services.embedding_server import EmbeddingServer, RemoteEmbeddingBackend
+
+
+class _SlowHashBackend(EmbeddingBackend):
+    """Deterministic stand-in model with a fixed cost per forward pass."""
+
+    name = "hash-model"
+
+    def __init__(self, pass_seconds: float = 0.02):
+        self.pass_seconds = pass_seconds
+        self.batch_sizes = []
+
+    def encode(self, texts):
+        time.sleep(self.pass_seconds)
+        self.batch_sizes.append(len(texts))
+        vectors = [np.random.default_rng(sum(map(ord, text))).normal(size=384) for text in texts]
+        return np.asarray([v / np.linalg.norm(v) for v in vectors], dtype=np.float32)
+
+
+class _ServerThread:
+    """Runs an EmbeddingServer on its own loop, as the separate server process would."""
+
+    def __init__(self, server: EmbeddingServer):
+        self.server = server
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.server.start(), self.loop).result()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+def test_embedding_server():
+    print("Embedding Server Test Results")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, "embedding.sock")
+        backend = _SlowHashBackend()
+        server = _ServerThread(EmbeddingServer(backend, socket_path, max_batch=16, batch_window=0.005))
+        server.start()
+
+        print("\n1. The remote backend returns the served model's vectors and name")
+        print("-" * 30)
+        client = RemoteEmbeddingBackend(socket_path)
+        # Connects on first use, not when created
+        assert getattr(client._local, "sock", None) is None
+        texts = ["minimal pairs", "past tense verbs", "hello"]
+        assert client.name == "hash-model"
+        assert np.allclose(client.encode(texts), _SlowHashBackend(0).encode(texts))
+        print(f"{client.name}: {client.encode(texts).shape}")
+
+        print("\n2. Concurrent requests from several threads are batched")
+        print("-" * 30)
+        backend.batch_sizes.clear()
+        queries = [f"query {i}" for i in range(48)]
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(lambda text: client.encode([text])[0], queries))
+        assert np.allclose(np.asarray(results), _SlowHashBackend(0).encode(queries))
+        assert len(backend.batch_sizes) < len(queries) and max(backend.batch_sizes) <= 16
+        print(f"{len(queries)} requests in {len(backend.batch_sizes)} forward passes: {backend.batch_sizes}")
+
+        print("\n3. Clients reconnect after a server restart")
+        print("-" * 30)
+        server.stop()
+        server = _ServerThread(EmbeddingServer(backend, socket_path))
+        server.start()
+        assert np.allclose(client.encode(["hello"]), _SlowHashBackend(0).encode(["hello"]))
+        server.stop()
+        print("reconnected")
+
+        print("\n4. A missing server fails after the connect timeout, on first use")
+        print("-" * 30)
+        client = RemoteEmbeddingBackend(socket_path, connect_timeout=0.3)
+        start = time.perf_counter()
+        try:
+            client.encode(["hello"])
+        except ConnectionError as error:
+            print(f"ConnectionError after {time.perf_counter() - start:.1f}s: {error}")
+        else:
+            raise AssertionError("expected ConnectionError")
+
+
+if __name__ == "__main__":
+    test_embedding_server()
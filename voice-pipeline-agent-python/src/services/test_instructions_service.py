@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test script for the system prompt cache: shared builds and last good extracts.
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+# instructions_service reads its defaults from config.settings in the parent directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import Settings
+from services.instructions_service import InstructionsService
+from services.week_prompt_store import DAYS, PERIODS, WeekPromptStore
+
+WEEK = {
+    day: {period: {"prompt": f"{day} {period} lesson", "query": f"{day} {period} topic"} for period in PERIODS}
+    for day in DAYS
+}
+
+
+class _FakeRagService:
+    """Counts searches, each taking ``delay`` seconds; fails while ``failing`` is set."""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.failing = False
+        self.searches = 0
+        self._lock = threading.Lock()
+
+    def search_many(self, queries, limit=1):
+        with self._lock:
+            self.searches += 1
+        time.sleep(self.delay)
+        if self.failing:
+            raise ConnectionError("milvus is down")
+        return [[{"id": query, "text": f"extract for {query}"}] for query in queries]
+
+    async def search_many_async(self, queries, limit=1):
+        return await asyncio.get_running_loop().run_in_executor(None, self.search_many, queries, limit)
+
+
+async def test_instructions_service():
+    print("Instructions Service Test Results")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "week-prompt.json")
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(WEEK, file)
+        store = WeekPromptStore(path)
+
+        print("\n1. Concurrent cold misses share one build")
+        print("-" * 30)
+        rag = _FakeRagService()
+        instructions = InstructionsService(rag, prompt_store=store)
+        refresher = threading.Thread(target=instructions.get_system_instructions)
+        refresher.start()
+        await asyncio.sleep(0.01)
+        prompts = await asyncio.gather(*(instructions.get_system_instructions_async() for _ in range(5)))
+        refresher.join()
+        assert len(set(prompts)) == 1 and "extract for" in prompts[0]
+        assert rag.searches == 1
+        print(f"6 callers, {rag.searches} search")
+
+        print("\n2. A failed search for a new bucket uses the last extracts, not the base prompt")
+        print("-" * 30)
+        bucket = instructions._get_bucket(datetime.now())
+        # The bucket is pruned from the cache (e.g. a week later), then retrieval fails
+        instructions._prompt_cache = {}
+        rag.failing = True
+        prompt = await instructions.refresh_prompt(bucket)
+        assert "extract for" in prompt
+        assert instructions._prompt_cache[bucket] == (prompt, False)
+        print(f"served with extracts: {prompt.splitlines()[-3]!r}")
+
+        print("\n3. Without earlier extracts the base prompt is used and retried")
+        print("-" * 30)
+        other = next((day, period) for day in DAYS for period in PERIODS if (day, period) != bucket)
+        prompt = await instructions.refresh_prompt(other)
+        assert prompt == f"{other[0]} {other[1]} lesson"
+        rag.failing = False
+        prompt = await instructions.refresh_prompt(other)
+        assert "extract for" in prompt and instructions._prompt_cache[other][1]
+        print("rebuilt with extracts once the search succeeds")
+
+        instructions.stop_prompt_refresher()
+
+        print("\n4. An edit keeps serving cached prompts while only the changed bucket is rebuilt")
+        print("-" * 30)
+        rag = _FakeRagService(delay=0.3)
+        settings = Settings()
+        # No prefetch of the next bucket, so every search below is a rebuild
+        settings.prompt_refresh_lead = 0
+        instructions = InstructionsService(rag, settings=settings, prompt_store=store)
+        current = instructions._get_bucket(datetime.now())
+        cached = await instructions.get_system_instructions_async()
+        instructions.start_prompt_refresher()
+        edited = {**WEEK, current[0]: {**WEEK[current[0]], current[1]: {"prompt": "Edited lesson", "query": "new"}}}
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(edited, file)
+        searches = rag.searches
+        store.reload(force=True)
+        prompts = await asyncio.gather(*(instructions.get_system_instructions_async() for _ in range(5)))
+        # Sessions got the cached prompt without searching; the refresher is rebuilding it
+        assert prompts == [cached] * 5 and rag.searches - searches <= 1
+        deadline = time.monotonic() + 5
+        while "Edited lesson" not in instructions._prompt_cache[current][0] and time.monotonic() < deadline:
+            await asyncio.sleep(0.02)
+        assert "extract for new" in await instructions.get_system_instructions_async()
+        assert rag.searches - searches == 1 and not instructions._stale
+        print(f"5 sessions during the rebuild, {rag.searches - searches} search")
+
+        print("\n5. Stopping the refresher unregisters the reload listener")
+        print("-" * 30)
+        listeners = len(store._listeners)
+        instructions.stop_prompt_refresher()
+        assert len(store._listeners) == listeners - 1
+        print(f"{len(store._listeners)} listeners left")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_instructions_service())
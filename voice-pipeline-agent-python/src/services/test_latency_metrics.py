@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script for the latency histograms, cross-process snapshots and Prometheus export.
+"""
+import os
+import sys
+import tempfile
+import urllib.request
+
+# latency_metrics reads its defaults from config.settings in the parent directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from latency_metrics import (
+    LatencyHistogram, LatencyRecorder, MetricsServer, load_counters, load_snapshots, render_prometheus
+)
+
+
+def test_latency_metrics():
+    """Exercise quantile estimates, snapshot merging and the /metrics endpoint."""
+
+    print("Latency Metrics Test Results")
+    print("=" * 50)
+
+    print("\n1. Quantile estimates")
+    print("-" * 30)
+    histogram = LatencyHistogram(buckets=(0.1, 0.2, 0.5, 1.0))
+    for value in [0.05] * 50 + [0.15] * 45 + [0.7] * 5:
+        histogram.observe(value)
+    p50, p95, p99 = (histogram.quantile(q) for q in (0.5, 0.95, 0.99))
+    print(f"p50={p50:.3f} p95={p95:.3f} p99={p99:.3f}")
+    assert 0.0 < p50 <= 0.1 and 0.1 < p95 <= 0.2 and 0.5 < p99 <= 1.0
+
+    print("\n2. Snapshots from several processes are merged")
+    print("-" * 30)
+    with tempfile.TemporaryDirectory() as directory:
+        for pid_dir in ("job-a", "job-b"):
+            recorder = LatencyRecorder(snapshot_dir=os.path.join(directory, pid_dir))
+            recorder.record("llm_first_token", 0.4)
+            recorder.record("tts_first_byte", 0.2)
+            recorder.count("wasted_llm_deltas", 2)
+            recorder.write_snapshot()
+            # Both recorders live in this process, so give each snapshot its own name
+            os.replace(os.path.join(directory, pid_dir, f"{os.getpid()}.json"),
+                       os.path.join(directory, f"{pid_dir}.json"))
+
+        merged = load_snapshots(directory)
+        assert merged["llm_first_token"].count == 2
+        counters = load_counters(directory)
+        assert counters == {"wasted_llm_deltas": 4}
+        print(f"Stages: {sorted(merged)}")
+
+        print("\n3. Prometheus endpoint")
+        print("-" * 30)
+        server = MetricsServer(directory, port=0)
+        server.start(clear=False)
+        try:
+            port = server._server.server_address[1]
+            body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics").read().decode()
+        finally:
+            server.stop()
+        assert body == render_prometheus(merged, counters)
+        assert "voice_agent_wasted_llm_deltas_total 4" in body
+        assert 'voice_agent_stage_latency_seconds_count{stage="tts_first_byte"} 2' in body
+        print("\n".join(line for line in body.splitlines() if "llm_first_token" in line and "quantile" in line))
+
+
+if __name__ == "__main__":
+    test_latency_metrics()
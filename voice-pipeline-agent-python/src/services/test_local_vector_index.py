@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test script for the local vector index (runs fully offline).
+"""
+import tempfile
+
+import numpy as np
+
+from local_vector_index import LocalVectorIndex
+
+
+def test_local_vector_index():
+    """Compare local top-k against brute-force cosine similarity and check snapshot reloads."""
+
+    print("Local Vector Index Test Results")
+    print("=" * 50)
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(500, 384)).astype(np.float32)
+    ids = list(range(1000, 1500))
+    records = [{"text": f"passage {i}"} for i in ids]
+    queries = rng.normal(size=(3, 384)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as directory:
+        print("\n1. Exact top-k matches brute force")
+        print("-" * 30)
+        writer = LocalVectorIndex(directory)
+        writer.build(ids, vectors, records)
+
+        index = LocalVectorIndex(directory)
+        assert index.load() and len(index) == 500
+        results = index.search(queries, limit=5, output_fields=["text"])
+
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        for query, hits in zip(queries, results):
+            similarities = normalized @ (query / np.linalg.norm(query))
+            expected = [ids[i] for i in np.argsort(-similarities)[:5]]
+            assert [hit["id"] for hit in hits] == expected
+            assert abs(hits[0]["score"] - similarities.max()) < 1e-5
+            assert hits[0]["text"] == f"passage {hits[0]['id']}"
+        print(f"Top hit for query 1: {results[0][0]}")
+
+        print("\n2. Score threshold")
+        print("-" * 30)
+        # Searching with a stored vector finds itself with similarity 1
+        hits = index.search(vectors[:1], limit=5, score_threshold=0.99)[0]
+        assert [hit["id"] for hit in hits] == [1000]
+        print(f"Hits above 0.99: {len(hits)}")
+
+        print("\n3. A new snapshot is picked up on reload")
+        print("-" * 30)
+        writer.build(ids[:10], vectors[:10], records[:10])
+        assert len(index) == 500
+        index.load()
+        assert len(index) == 10
+        assert index.search(queries, limit=20)[0][-1]["id"] in ids[:10]
+        print(f"Vectors after reload: {len(index)}")
+
+
+if __name__ == "__main__":
+    test_local_vector_index()
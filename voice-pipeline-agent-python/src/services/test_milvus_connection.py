@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test script for MilvusConnectionManager liveness: no probes while requests succeed.
+"""
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# milvus_connection reads its defaults from config.settings in the parent directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import Settings
+from services.milvus_connection import MilvusConnectionManager
+
+
+class _FakeCollection:
+    """Counts describe() probes; they fail while ``failing`` is set."""
+
+    def __init__(self):
+        self.failing = False
+        self.describes = 0
+        self._lock = threading.Lock()
+
+    def describe(self):
+        with self._lock:
+            self.describes += 1
+        if self.failing:
+            raise ConnectionError("milvus is down")
+        return {"fields": []}
+
+
+class _FakePool:
+    """Connection pool over one collection that counts opens and reconnects."""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.generation = 0
+        self.opens = 0
+        self.reconnects = 0
+        self.owners = 0
+
+    @property
+    def is_open(self):
+        return self.generation > 0
+
+    def retain(self):
+        self.owners += 1
+
+    def release(self):
+        self.owners -= 1
+
+    def open(self):
+        if not self.is_open:
+            self.opens += 1
+            self.generation += 1
+        return self.generation
+
+    def reconnect(self, seen_generation):
+        if seen_generation == self.generation:
+            self.reconnects += 1
+            self.generation += 1
+        return self.generation
+
+    @contextmanager
+    def lease(self):
+        yield self._collection
+
+    def collection(self):
+        return self._collection
+
+    def stats(self):
+        return {"generation": self.generation, "owners": self.owners}
+
+
+def _search(manager, ok=True):
+    """Stand-in for RagService: lease, then report the outcome of the request."""
+    with manager.lease():
+        pass
+    if ok:
+        manager.record_success()
+    else:
+        manager.record_failure(ConnectionError("search failed"))
+
+
+def test_milvus_connection():
+    print("Milvus Connection Test Results")
+    print("=" * 50)
+
+    settings = Settings()
+    settings.milvus_host = "milvus.test"
+    settings.milvus_token = "token"
+    # The heartbeat is started explicitly in section 3
+    settings.milvus_heartbeat_interval = 0
+    collection = _FakeCollection()
+    pool = _FakePool(collection)
+    manager = MilvusConnectionManager(settings, pool=pool)
+    assert manager.connect() and pool.opens == 1
+
+    print("\n1. Healthy searches make no describe/check_health request")
+    print("-" * 30)
+    for _ in range(10):
+        assert manager.ensure_connected()
+        _search(manager)
+    assert collection.describes == 0 and pool.reconnects == 0
+    print(f"10 searches, {collection.describes} probes")
+
+    print("\n2. A failed search is probed once; reconnect only if the probe fails")
+    print("-" * 30)
+    _search(manager, ok=False)
+    assert manager.ensure_connected() and manager.ensure_connected()
+    assert collection.describes == 1 and pool.reconnects == 0
+    print(f"probe succeeded: {collection.describes} probe, {pool.reconnects} reconnects")
+
+    _search(manager, ok=False)
+    collection.failing = True
+    assert manager.ensure_connected()
+    collection.failing = False
+    assert manager.ensure_connected()
+    assert collection.describes == 2 and pool.reconnects == 1
+    assert manager.health()["reconnects"] == 1
+    print(f"probe failed: {collection.describes - 1} probe, {pool.reconnects} reconnect")
+
+    print("\n3. The heartbeat skips probing while requests succeed")
+    print("-" * 30)
+    probes = collection.describes
+    manager.start_heartbeat(interval=0.05)
+    deadline = time.monotonic() + 0.3
+    while time.monotonic() < deadline:
+        _search(manager)
+        time.sleep(0.01)
+    assert collection.describes == probes
+    print(f"busy: {collection.describes - probes} probes in 0.3s")
+
+    # Idle: nothing proves the connection alive, so the heartbeat probes it
+    time.sleep(0.3)
+    assert collection.describes > probes and pool.reconnects == 1
+    print(f"idle: {collection.describes - probes} probes in 0.3s")
+
+    manager.disconnect()
+    assert not manager.health()["heartbeat_running"] and pool.owners == 0
+
+
+if __name__ == "__main__":
+    test_milvus_connection()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test script for MilvusConnectionPool: shared reconnects and leases outliving retirement.
+"""
+import os
+import sys
+import threading
+import time
+
+# milvus_pool reads its defaults from config.settings in the parent directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import Settings
+from services import milvus_pool
+from services.milvus_pool import MilvusConnectionPool
+
+
+class _FakeConnections:
+    """Stands in for pymilvus.connections; connecting takes ``delay`` seconds."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.connected = set()
+        self.connects = 0
+        self._lock = threading.Lock()
+
+    def connect(self, alias, host, token, timeout):
+        time.sleep(self.delay)
+        with self._lock:
+            self.connects += 1
+            self.connected.add(alias)
+
+    def disconnect(self, alias):
+        with self._lock:
+            self.connected.discard(alias)
+
+
+class _FakeCollection:
+    """Stands in for pymilvus.Collection bound to an alias."""
+
+    num_entities = 1
+
+    def __init__(self, name, using):
+        self.name = name
+        self.using = using
+
+    def has_index(self):
+        return True
+
+    def load(self, timeout=None):
+        pass
+
+    def describe(self):
+        return {"fields": []}
+
+
+def test_milvus_pool():
+    print("Milvus Connection Pool Test Results")
+    print("=" * 50)
+
+    connections = _FakeConnections(delay=0.02)
+    milvus_pool.connections = connections
+    milvus_pool.Collection = _FakeCollection
+
+    settings = Settings()
+    settings.milvus_host = "milvus.test"
+    settings.milvus_token = "token"
+    pool = MilvusConnectionPool(settings, size=2)
+    pool.retain()
+    pool.retain()
+    assert pool.open() == 1 and connections.connects == 2
+
+    print("\n1. Concurrent reconnects after the same failure connect once")
+    print("-" * 30)
+    generations = []
+    threads = [threading.Thread(target=lambda: generations.append(pool.reconnect(1))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert generations == [2] * 5 and connections.connects == 4
+    assert connections.connected == {"milvus-pool-g2-0", "milvus-pool-g2-1"}
+    print(f"5 callers, generation {pool.generation}, {connections.connects - 2} new connections")
+
+    print("\n2. A lease held across a reconnect is disconnected once returned")
+    print("-" * 30)
+    with pool.lease() as collection:
+        leased = collection.using
+        assert pool.reconnect(2) == 3
+        assert leased in connections.connected and pool.stats()["retired"] == 1
+        # New leases go to the new generation
+        with pool.lease() as other:
+            assert other.using.startswith("milvus-pool-g3-")
+    assert leased not in connections.connected and pool.stats()["retired"] == 0
+    assert connections.connected == {"milvus-pool-g3-0", "milvus-pool-g3-1"}
+    print(f"{leased} disconnected after its lease")
+
+    print("\n3. A release that is not the last leaves the pool open")
+    print("-" * 30)
+    pool.release()
+    assert pool.is_open and len(connections.connected) == 2
+    with pool.lease() as collection:
+        assert collection.using in connections.connected
+    print(f"{pool.stats()['owners']} owner left, pool open")
+
+    print("\n4. A lease held across the last release is disconnected once returned")
+    print("-" * 30)
+    with pool.lease() as collection:
+        leased = collection.using
+        pool.release()
+        assert not pool.is_open and connections.connected == {leased}
+    assert not connections.connected
+    print(f"{leased} disconnected after its lease, pool closed")
+
+
+if __name__ == "__main__":
+    test_milvus_pool()
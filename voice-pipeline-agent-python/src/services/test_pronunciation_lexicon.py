@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test script for the PronunciationLexicon single-pass matcher.
+"""
+import json
+import os
+import tempfile
+
+from pronunciation_lexicon import PronunciationLexicon
+
+
+def test_pronunciation_lexicon():
+    """Exercise word boundaries, casing, longest match, updates and file loading."""
+
+    print("Pronunciation Lexicon Test Results")
+    print("=" * 50)
+
+    lexicon = PronunciationLexicon({
+        'HTTP': 'H T T P',
+        'HTTPS': 'H T T P S',
+        'AI': 'A I',
+        'New York': 'New York City',
+    })
+
+    print("\n1. Whole words, any casing, longest match")
+    print("-" * 30)
+    result = lexicon.apply("http and HTTPS, ai but not AIM or said, new york")
+    print(f"Output: {result}")
+    assert result == "H T T P and H T T P S, A I but not AIM or said, New York City"
+
+    print("\n2. Case-sensitive entries")
+    print("-" * 30)
+    lexicon.add('Case', 'Kays', case_sensitive=True)
+    result = lexicon.apply("Case case CASE")
+    print(f"Output: {result}")
+    assert result == "Kays case CASE"
+
+    print("\n3. Incremental add/remove")
+    print("-" * 30)
+    lexicon.remove('HTTP')
+    lexicon.add('Wintermute', 'Winter-mute')
+    result = lexicon.apply("HTTP HTTPS wintermute")
+    print(f"Output: {result}")
+    assert result == "HTTP H T T P S Winter-mute"
+
+    print("\n4. add/remove recompile eagerly, apply() never compiles")
+    print("-" * 30)
+    compiles = []
+    compile_pattern = lexicon._compile
+    lexicon._compile = lambda: compiles.append(1) or compile_pattern()
+    lexicon.add('Molly', 'Mol-ee')
+    lexicon.remove('Wintermute')
+    assert len(compiles) == 2
+    result = lexicon.apply("Molly and wintermute")
+    assert result == "Mol-ee and wintermute" and len(compiles) == 2
+    del lexicon._compile
+    lexicon.remove('Molly')
+    print(f"Output: {result}, {len(compiles)} compiles")
+
+    print("\n5. Copies do not affect each other")
+    print("-" * 30)
+    copy = lexicon.copy()
+    copy.remove('AI')
+    assert lexicon.apply("AI") == "A I"
+    assert copy.apply("AI") == "AI"
+    print(f"Original: {len(lexicon)} entries, copy: {len(copy)} entries")
+
+    print("\n6. Loading from files")
+    print("-" * 30)
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, "names.json")
+        with open(json_path, 'w', encoding='utf-8') as file:
+            json.dump([{"word": "Molly", "pronunciation": "Mol-ee"},
+                       {"word": "Case", "pronunciation": "Kays", "case_sensitive": True}], file)
+        tsv_path = os.path.join(directory, "places.tsv")
+        with open(tsv_path, 'w', encoding='utf-8') as file:
+            file.write("# places\nChiba\tChee-bah\n\nSprawl\tthe Sprawl\n")
+
+        loaded = PronunciationLexicon.from_file(json_path)
+        assert loaded.load_file(tsv_path) == 2
+        result = loaded.apply("Molly met Case in Chiba, far from the sprawl")
+        print(f"Output: {result}")
+        assert result == "Mol-ee met Kays in Chee-bah, far from the the Sprawl"
+
+
+if __name__ == "__main__":
+    test_pronunciation_lexicon()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Test script for RagService batching and the cancellation of in-flight async searches.
+"""
+import asyncio
+import os
+import sys
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+# rag_service reads its defaults from config.settings in the parent directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import Settings
+from services.embedding_backends import EmbeddingBackend
+from services.embedding_cache import EmbeddingCache
+from services.rag_service import RagService
+
+
+class _CountingBackend(EmbeddingBackend):
+    """Stand-in model embedding each distinct text as [n, 0, ...]; records encode batches."""
+
+    name = "counting"
+
+    def __init__(self):
+        self.batches = []
+        self._ids = {}
+
+    def encode(self, texts):
+        self.batches.append(list(texts))
+        vectors = np.zeros((len(texts), 384), dtype=np.float32)
+        for row, text in enumerate(texts):
+            vectors[row, 0] = self._ids.setdefault(" ".join(text.split()), len(self._ids) + 1)
+        return vectors
+
+    def id_of(self, text):
+        return self._ids[" ".join(text.split())]
+
+
+class _Hit:
+    def __init__(self, vector):
+        self.id = int(vector[0])
+        self.score = self.distance = 1.0
+
+
+class _FakeSearchFuture:
+    """Like pymilvus' SearchFuture: result() blocks until the search is answered or cancelled."""
+
+    def __init__(self, results=None):
+        self.cancelled = False
+        self._results = results
+        self._done = threading.Event()
+        if results is not None:
+            self._done.set()
+
+    def cancel(self):
+        self.cancelled = True
+        self._done.set()
+
+    def result(self):
+        self._done.wait(timeout=5)
+        if self.cancelled:
+            raise RuntimeError("search cancelled")
+        return self._results
+
+
+class _FakeCollection:
+    """Records search requests and answers each vector with one hit carrying its id.
+
+    While ``hanging`` is set, async searches never complete unless cancelled.
+    """
+
+    def __init__(self):
+        self.hanging = False
+        self.searches = []
+        self.futures = []
+
+    def search(self, data, anns_field, param, limit, output_fields, timeout=None, _async=False):
+        self.searches.append((len(data), _async))
+        if not _async:
+            return [[_Hit(vector)] for vector in data]
+        future = _FakeSearchFuture(None if self.hanging else [[_Hit(vector)] for vector in data])
+        self.futures.append(future)
+        return future
+
+
+class _FakeConnectionManager:
+    """Connection manager over a single collection that counts the leases held."""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.leased = 0
+        self.failures = 0
+
+    def ensure_connected(self):
+        return True
+
+    @contextmanager
+    def lease(self):
+        self.leased += 1
+        try:
+            yield self._collection
+        finally:
+            self.leased -= 1
+
+    def record_success(self):
+        pass
+
+    def record_failure(self, error):
+        self.failures += 1
+
+
+async def _wait_for_search(collection, count):
+    while len(collection.futures) < count:
+        await asyncio.sleep(0.01)
+
+
+async def test_rag_service():
+    print("RAG Service Test Results")
+    print("=" * 50)
+
+    settings = Settings()
+    settings.rag_search_timeout = 0.2
+    collection = _FakeCollection()
+    manager = _FakeConnectionManager(collection)
+    backend = _CountingBackend()
+    rag = RagService(manager, settings=settings, embedding_cache=EmbeddingCache(),
+                     embedding_backend=backend)
+
+    print("\n1. generate_embeddings encodes uncached, deduplicated texts in one call")
+    print("-" * 30)
+    rag.generate_embedding("cached query")
+    embeddings = rag.generate_embeddings(["first query", "cached query", "first  query", "second query"])
+    assert backend.batches == [["cached query"], ["first query", "second query"]]
+    assert [int(vector[0]) for vector in embeddings] == [
+        backend.id_of(text) for text in ("first query", "cached query", "first query", "second query")]
+    print(f"4 texts, encode batches: {backend.batches[1:]}")
+
+    print("\n2. search_many: one encode call, one multi-vector search, results in query order")
+    print("-" * 30)
+    queries = ["third query", "cached query", "fourth query", "third query"]
+    results = rag.search_many(queries, limit=1)
+    assert backend.batches[2:] == [["third query", "fourth query"]]
+    assert collection.searches == [(4, False)]
+    assert [hits[0]["id"] for hits in results] == [backend.id_of(query) for query in queries]
+    print(f"{len(queries)} queries, {len(collection.searches)} search of {collection.searches[0][0]} vectors")
+
+    print("\n3. search_many_async: the same batching over a non-blocking search")
+    print("-" * 30)
+    queries = ["fifth query", "fourth query", "fifth query", "sixth query"]
+    results = await rag.search_many_async(queries, limit=1)
+    assert backend.batches[3:] == [["fifth query", "sixth query"]]
+    assert collection.searches[1:] == [(4, True)]
+    assert [hits[0]["id"] for hits in results] == [backend.id_of(query) for query in queries]
+    assert manager.leased == 0
+    print(f"{len(queries)} queries, 1 search of {collection.searches[1][0]} vectors")
+
+    collection.hanging = True
+    collection.futures.clear()
+
+    print("\n4. RAG_SEARCH_TIMEOUT cancels the in-flight search and returns the lease")
+    print("-" * 30)
+    try:
+        await rag.search_by_text_async("slow query")
+        raise AssertionError("the search should have timed out")
+    except asyncio.TimeoutError:
+        pass
+    assert len(collection.futures) == 1 and collection.futures[0].cancelled
+    assert manager.leased == 0
+    print(f"timed out after {settings.rag_search_timeout}s, search cancelled, {manager.leased} leases held")
+
+    print("\n5. Cancelling the caller cancels the in-flight search and returns the lease")
+    print("-" * 30)
+    task = asyncio.create_task(rag.search_by_text_async("interrupted query", timeout=5))
+    await _wait_for_search(collection, 2)
+    assert manager.leased == 1
+    task.cancel()
+    try:
+        await task
+        raise AssertionError("the search should have been cancelled")
+    except asyncio.CancelledError:
+        pass
+    assert collection.futures[1].cancelled and manager.leased == 0
+    print(f"search cancelled, {manager.leased} leases held")
+
+    rag._executor.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(test_rag_service())
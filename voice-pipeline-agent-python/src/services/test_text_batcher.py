@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test script for the TextBatcher TTS aggregation stage.
+"""
+import asyncio
+
+from text_batcher import TextBatcher
+
+
+async def stream(text: str, chunk_size: int = 4):
+    """Simulate processed LLM output arriving in small chunks."""
+    for i in range(0, len(text), chunk_size):
+        yield text[i:i + chunk_size]
+
+
+async def collect(batcher: TextBatcher, text: str) -> list:
+    return [batch async for batch in batcher.batch(stream(text))]
+
+
+async def test_text_batcher():
+    """Check the first-clause fast path, sentence/clause batching and the length cap."""
+
+    print("Text Batcher Test Results")
+    print("=" * 50)
+
+    text = ("Sure, here is the summary. Case is a washed-up hacker in Chiba City; he meets Molly. "
+            "They travel together.<break time=\"1s\"/>Armitage hires them")
+
+    for mode in ("sentence", "clause", "off"):
+        batches = await collect(TextBatcher(mode=mode, first_min_chars=5, min_chars=30), text)
+        # Batches are exact pieces of the input, whitespace and break tags included
+        assert "".join(batches) == text
+        print(f"\n{mode}: {len(batches)} batches")
+        print("-" * 30)
+        for batch in batches[:6]:
+            print(f"  {batch!r}")
+
+    batches = await collect(TextBatcher(mode="sentence", first_min_chars=5, min_chars=30), text)
+    assert batches[0] == "Sure, "
+    assert batches[1] == "here is the summary. Case is a washed-up hacker in Chiba City; he meets Molly. "
+
+    print("\nLength cap without punctuation")
+    print("-" * 30)
+    long_text = "word " * 40
+    batches = await collect(TextBatcher(mode="sentence", min_chars=20, max_chars=60), long_text)
+    assert "".join(batches) == long_text
+    assert all(len(batch) <= 60 for batch in batches[:-1])
+    print(f"{len(batches)} batches, longest {max(len(batch) for batch in batches)} chars")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_text_batcher())
@@ -100,5 +100,70 @@ Are you ready?""",
     print(f"With custom pronunciation: {processed_custom}")
 
 
+def test_rewrite_engine_matches_stepwise():
+    """Check that the compiled rewrite engine matches the step-by-step pipeline byte-for-byte."""
+    
+    tts_processor = TTSPreprocessor()
+    
+    samples = [
+        """# Meeting Summary
+**Important:** The meeting is scheduled for 4/20/2023 at 3:30PM.
+- Check the API documentation at https://cartesia.ai
+- Send confirmation to support@cartesia.ai
+- *Remember* to bring the `config.json` file
+Are you ready?""",
+        "The **event** is on 12/25/2023 at 7:00PM. Contact: us at info@example.com if you have questions?",
+        'Visit our website at https://cartesia.ai for more info. Email us at support@cartesia.ai?',
+        "The API uses HTTP and HTTPS protocols. The UI/UX team will handle the ML models.",
+        "Are you coming to the party? Will you be there on time? Can you help us?",
+        "Wait.. let me think about this.\nThis is a new line.\nAnother line here.. with more dots.",
+        "The pronunciation is /th/ and /sh/ sounds. Also /example/ word.",
+        "Let's read [LITERATURE_BOOK] together: \"Case\" met Molly at 3 a.m. on 1-2-2024.",
+        "1. First item\n2. Second item with [a link](https://example.org)\n+ bullet",
+        "x12/12/2023 12/12/2023 and 1:00 A.M.2:30 P.M.5pm",
+        '*',
+        " the",
+        "?",
+    ]
+    
+    print("\nRewrite engine vs stepwise pipeline")
+    print("=" * 50)
+    
+    for i, sample in enumerate(samples, 1):
+        expected = tts_processor._process_for_tts_stepwise(sample)
+        actual = tts_processor.process_for_tts(sample)
+        assert actual == expected, f"Sample {i} differs:\n{expected!r}\n{actual!r}"
+        print(f"{i}. OK: {actual!r}")
+
+
+def test_stream_normalizer_matches_whole_text():
+    """Check that streaming deltas through the normalizer matches processing the whole text."""
+    
+    tts_processor = TTSPreprocessor()
+    tts_processor.add_custom_pronunciation("Chiba City", "Chee-bah City")
+    
+    samples = [
+        "The **event** is on 12/25/2023 at 7:00 PM. Visit https://cartesia.ai for more info?",
+        "Let's read [LITERATURE_BOOK] together, or [the summary](https://example.org/summary).",
+        "* *Case* lives in Chiba City\n- Molly meets him at 3 a.m.\n1. `ICE` breaker",
+        "Wait.. the UI/UX team will handle the ML models at 5\nPM",
+    ]
+    
+    print("\nStreaming normalizer vs whole text")
+    print("=" * 50)
+    
+    for i, sample in enumerate(samples, 1):
+        expected = tts_processor.process_for_tts(sample)
+        for size in (1, 2, 3, 5, 8):
+            normalizer = tts_processor.create_stream_normalizer()
+            pieces = [normalizer.push(sample[j:j + size]) for j in range(0, len(sample), size)]
+            pieces.append(normalizer.flush())
+            actual = "".join(pieces)
+            assert actual == expected, f"Sample {i} differs with {size}-char deltas:\n{expected!r}\n{actual!r}"
+        print(f"{i}. OK: {expected!r}")
+
+
 if __name__ == "__main__":
     test_tts_preprocessor()
+    test_rewrite_engine_matches_stepwise()
+    test_stream_normalizer_matches_whole_text()
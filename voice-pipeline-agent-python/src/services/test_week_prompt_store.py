@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script for week prompt validation, lookup and hot reloading.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+# week_prompt_store reads its defaults from config.settings in the parent directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.instructions_service import InstructionsService
+from services.week_prompt_store import DEFAULT_WEEK_PROMPT_PATHS, WeekPromptStore, parse_week_prompts
+
+WEEK = {
+    "monday": {
+        "morning": {"prompt": "Monday morning lesson", "query": "minimal pairs"},
+        "noon": {"prompt": "Monday noon lesson", "query": ["past tense", "plot events"]},
+    },
+    "friday": {"afternoon": {"prompt": "Friday review"}},
+}
+
+
+class _FakeRagService:
+    def search_many(self, queries, limit=1):
+        return [[{"id": query, "text": f"extract for {query}"}] for query in queries]
+
+
+def write_json(path, data):
+    # Written to a temporary file and renamed, like most editors and deploy tools do
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as file:
+        json.dump(data, file)
+    os.replace(f"{path}.tmp", path)
+
+
+def test_week_prompt_store():
+    print("Week Prompt Store Test Results")
+    print("=" * 50)
+
+    print("\n1. Entries are indexed by (day, period)")
+    print("-" * 30)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "week-prompt.json")
+        write_json(path, WEEK)
+        store = WeekPromptStore(path, poll_interval=0.05)
+        week = store.current()
+        assert len(week) == 3
+        assert week.get(("monday", "morning")) == ("Monday morning lesson", ("minimal pairs",))
+        assert week.get(("monday", "noon"))[1] == ("past tense", "plot events")
+        assert week.get(("friday", "afternoon")) == ("Friday review", ())
+        assert week.get(("tuesday", "morning")) is None and week.get(("someday", "noon")) is None
+        print(f"{len(week)} entries, version {week.version}")
+
+        print("\n2. Invalid files are rejected with every problem listed")
+        print("-" * 30)
+        try:
+            parse_week_prompts({"mondy": {}, "monday": {"evening": {"prompt": "x"}, "noon": {"prompt": ""}},
+                                "friday": {"morning": {"prompt": "ok", "query": [1]}}})
+        except ValueError as error:
+            print(error)
+            assert str(error).count(";") == 3
+        else:
+            raise AssertionError("expected ValueError")
+
+        print("\n3. Edits are picked up by the watcher; invalid edits keep the last good version")
+        print("-" * 30)
+        instructions = InstructionsService(_FakeRagService(), prompt_store=store)
+        bucket, unchanged = ("monday", "morning"), ("friday", "afternoon")
+        before = instructions._build_prompt(bucket)
+        instructions._store_prompt(bucket, *before, version=week.version)
+        instructions._store_prompt(unchanged, *instructions._build_prompt(unchanged), version=week.version)
+
+        store.start_watching()
+        write_json(path, {**WEEK, "monday": {"morning": {"prompt": "Updated lesson", "query": "dialogue"}}})
+        deadline = time.monotonic() + 5
+        while store.current() is week and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert store.current().get(bucket) == ("Updated lesson", ("dialogue",))
+        # Only the edited bucket is stale; it is still cached until rebuilt
+        assert instructions._stale == {bucket} and instructions._prompt_cache[bucket][0] == before[0]
+        updated = instructions._build_prompt(bucket)[0]
+        assert "Updated lesson" in updated and "extract for dialogue" in updated
+
+        current = store.current()
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('{"monday": {"morning": ')
+        time.sleep(0.3)
+        assert store.current() is current
+        store.stop_watching()
+        print(f"reloaded: {store.current().get(bucket)[0]!r}")
+
+        print("\n4. A prompt built from a replaced version is not cached")
+        print("-" * 30)
+        instructions._store_prompt(bucket, "built from the old file", True, version=week.version)
+        assert instructions._prompt_cache[bucket][0] == before[0] and bucket in instructions._stale
+        print("stale prompt skipped")
+
+    print("\n5. The shipped week-prompt.json is valid")
+    print("-" * 30)
+    shipped = WeekPromptStore(DEFAULT_WEEK_PROMPT_PATHS[0])
+    assert len(shipped.current()) == 21
+    print(f"{shipped.path}: {len(shipped.current())} entries")
+
+
+if __name__ == "__main__":
+    test_week_prompt_store()
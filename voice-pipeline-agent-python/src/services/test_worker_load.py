@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test script for the event loop lag reporter, the worker load function and job admission.
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from latency_metrics import render_prometheus
+from worker_load import LOAD_SUBDIR, LoopLagReporter, WorkerLoad, read_job_loads
+
+
+class FixedCpu:
+    def __init__(self, utilization: float = 0.0):
+        self.utilization = utilization
+
+    def sample(self) -> float:
+        return self.utilization
+
+
+class FakeWorker:
+    def __init__(self, active_jobs: int):
+        self.active_jobs = [object()] * active_jobs
+
+
+class FakeJobRequest:
+    class room:
+        name = "lesson-1"
+
+    def __init__(self):
+        self.accepted = None
+
+    async def accept(self):
+        self.accepted = True
+
+    async def reject(self):
+        self.accepted = False
+
+
+async def block_loop(seconds: float, times: int):
+    """Keep the loop busy the way a synchronous embedding or regex pass would."""
+    for _ in range(times):
+        time.sleep(seconds)
+        await asyncio.sleep(0.02)
+
+
+async def test_worker_load():
+    print("Worker Load Test Results")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        print("\n1. A blocked event loop is reported as lag")
+        print("-" * 30)
+        reporter = LoopLagReporter(directory, interval=0.01, publish_interval=0.05)
+        reporter.sessions = 1
+        reporter.start()
+        await asyncio.sleep(0.2)
+        idle_lag = reporter.lag_p95()
+        await block_loop(0.08, 10)
+        busy_lag = reporter.lag_p95()
+        reporter.publish()
+        print(f"idle p95 {idle_lag * 1000:.1f}ms, busy p95 {busy_lag * 1000:.1f}ms")
+        assert busy_lag > 0.05 > idle_lag
+        loads = read_job_loads(directory)
+        assert len(loads) == 1 and loads[0]["pid"] == os.getpid() and loads[0]["sessions"] == 1
+
+        print("\n2. Load is the largest of the session, lag and CPU ratios")
+        print("-" * 30)
+        cpu = FixedCpu(0.2)
+        worker_load = WorkerLoad(directory, max_sessions=10, lag_budget=0.1, cpu_sampler=cpu)
+        load = worker_load(FakeWorker(2))
+        print(f"lag-bound load {load:.2f}, gauges {worker_load.gauges()}")
+        assert load == min(1.0, busy_lag / 0.1)
+
+        await reporter.stop()
+        assert not read_job_loads(directory)
+        assert worker_load(FakeWorker(2)) == 0.2
+        assert worker_load(FakeWorker(8)) == 0.8
+        assert worker_load() == 0.2  # no worker: sessions come from the (removed) load files
+        print("cpu-bound 0.2, session-bound 0.8")
+
+        print("\n3. A stale file of a live process counts its age as lag, a dead process is skipped")
+        print("-" * 30)
+        os.makedirs(os.path.join(directory, LOAD_SUBDIR), exist_ok=True)
+        for pid in (os.getpid(), 2 ** 22 + 1):
+            with open(os.path.join(directory, LOAD_SUBDIR, f"{pid}.json"), 'w') as file:
+                json.dump({"pid": pid, "updated_at": time.time() - 30, "lag_p95": 0.0, "sessions": 1}, file)
+        # A stale file without a pid is treated as dead, not as a process blocked forever
+        with open(os.path.join(directory, LOAD_SUBDIR, "unknown.json"), 'w') as file:
+            json.dump({"updated_at": time.time() - 30, "lag_p95": 0.0, "sessions": 1}, file)
+        loads = read_job_loads(directory, max_age=10)
+        assert [load["pid"] for load in loads] == [os.getpid()] and loads[0]["lag_p95"] >= 30
+        assert worker_load(FakeWorker(1)) == 1.0
+        print(loads)
+
+    print("\n4. Jobs are rejected once max_sessions is reached")
+    print("-" * 30)
+    worker_load = WorkerLoad("", max_sessions=3, cpu_sampler=FixedCpu())
+    worker_load(FakeWorker(1))
+    requests = [FakeJobRequest() for _ in range(3)]
+    for request in requests:
+        await worker_load.request_fnc(request)
+    assert [request.accepted for request in requests] == [True, True, False]
+    # The next load update sees the admitted jobs as running
+    worker_load(FakeWorker(2))
+    request = FakeJobRequest()
+    await worker_load.request_fnc(request)
+    assert request.accepted is True
+    print(f"sessions {worker_load.sessions()} of {worker_load.max_sessions}")
+
+    print("\n5. The gauges are exported on /metrics")
+    print("-" * 30)
+    text = render_prometheus({}, {}, worker_load.gauges())
+    assert "# TYPE voice_agent_worker_load gauge" in text
+    assert "voice_agent_worker_active_sessions 2" in text
+    print(text.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    asyncio.run(test_worker_load())
@@ -0,0 +1,133 @@
+import re
+from typing import AsyncIterable, AsyncIterator, List
+
+# Sentence endings, as in the test_text_buffering.py prototype, plus the break tags
+# that TTSPreprocessor puts in place of newlines
+_SENTENCE_END = re.compile(r'[.!?]+\s+|<break[^>]*/>\s*')
+_CLAUSE_END = re.compile(r'[.!?]+\s+|<break[^>]*/>\s*|[,;:]\s+|\s[-–—]\s+')
+
+BATCH_MODES = ("off", "clause", "sentence")
+
+
+class TextBatcher:
+    """Groups streamed TTS text into clause- or sentence-sized batches.
+
+    The first batch of a generation is sent at the first clause or sentence
+    boundary after ``first_min_chars`` characters, to keep time-to-first-audio
+    low. Later text is held until it ends at a boundary of the configured mode
+    and holds at least ``min_chars`` characters; all complete sentences (or
+    clauses) in the buffer go out together. Past ``max_chars`` the buffer is
+    cut at its last word boundary even without punctuation. Batches are exact
+    substrings of the input (whitespace included) and never split a break tag.
+
+    Larger ``min_chars`` means fewer TTS requests and better prosody; smaller
+    values mean audio starts sooner after each pause in the LLM stream.
+    """
+
+    def __init__(self, mode: str = "sentence", first_min_chars: int = 12,
+                 min_chars: int = 40, max_chars: int = 250):
+        """Initialize the batcher.
+
+        Args:
+            mode: "sentence", "clause" (also cut at commas, semicolons, colons
+                  and dashes) or "off" (pass text through unchanged)
+            first_min_chars: Minimum length of the first batch
+            min_chars: Minimum length of later batches
+            max_chars: Length past which the buffer is cut at a word boundary
+        """
+        if mode not in BATCH_MODES:
+            raise ValueError(f"Unknown TTS batch mode {mode!r}, expected one of {BATCH_MODES}")
+        if max_chars < max(first_min_chars, min_chars):
+            raise ValueError("max_chars must be at least first_min_chars and min_chars")
+
+        self.mode = mode
+        self.first_min_chars = first_min_chars
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._boundary = _CLAUSE_END if mode == "clause" else _SENTENCE_END
+        self._buffer = ""
+        self._first = True
+
+    def reset(self) -> None:
+        """Drop buffered text and re-enable the first-batch fast path."""
+        self._buffer = ""
+        self._first = True
+
+    def push(self, text: str) -> List[str]:
+        """Add text and return the batches that are ready.
+
+        Args:
+            text: The next piece of text
+
+        Returns:
+            List[str]: Batches to send to TTS, in order (possibly empty)
+        """
+        if self.mode == "off":
+            return [text] if text else []
+
+        self._buffer += text
+        batches = []
+        while True:
+            cut = self._find_cut()
+            if cut == 0:
+                break
+            batches.append(self._buffer[:cut])
+            self._buffer = self._buffer[cut:]
+            self._first = False
+        return batches
+
+    def flush(self) -> str:
+        """Return the buffered text (call at the end of the stream).
+
+        Returns:
+            str: The remaining text, possibly empty
+        """
+        remaining, self._buffer = self._buffer, ""
+        return remaining
+
+    async def batch(self, text: AsyncIterable[str]) -> AsyncIterator[str]:
+        """Batch a whole text stream.
+
+        Args:
+            text: The text stream, e.g. the input of tts_node
+
+        Yields:
+            str: Batches to send to TTS
+        """
+        self.reset()
+        async for chunk in text:
+            for batch in self.push(chunk):
+                yield batch
+
+        remaining = self.flush()
+        if remaining:
+            yield remaining
+
+    def _find_cut(self) -> int:
+        """Return where the next batch ends, or 0 if it is not ready yet."""
+        buffer = self._buffer
+
+        if self._first:
+            # Fast path: the first clause or sentence boundary past first_min_chars
+            for match in _CLAUSE_END.finditer(buffer):
+                if match.end() >= self.first_min_chars:
+                    return match.end()
+        else:
+            cut = 0
+            for match in self._boundary.finditer(buffer):
+                cut = match.end()
+            if cut >= self.min_chars:
+                return cut
+
+        if len(buffer) > self.max_chars:
+            return self._last_word_boundary(buffer, self.max_chars)
+        return 0
+
+    @staticmethod
+    def _last_word_boundary(buffer: str, limit: int) -> int:
+        """Return the end of the last whitespace run before limit that is not inside a tag."""
+        for position in range(limit, 0, -1):
+            if buffer[position - 1].isspace() and not buffer[position].isspace():
+                if buffer.rfind("<", 0, position) <= buffer.rfind(">", 0, position):
+                    return position
+        return 0
@@ -1,10 +1,43 @@
+import re
+from typing import Dict, Iterator, Optional, Tuple
+
+try:
+    from .pronunciation_lexicon import PronunciationLexicon
+    from .rewrite_engine import CallablePass, RewriteEngine, RewritePass
+    from .tts_stream_normalizer import StreamingTTSNormalizer
+except ImportError:
+    # Imported as a top-level module by the test scripts in this directory
+    from pronunciation_lexicon import PronunciationLexicon
+    from rewrite_engine import CallablePass, RewriteEngine, RewritePass
+    from tts_stream_normalizer import StreamingTTSNormalizer
+
+BOOK_TITLE = "Neuromancer"
+
+# Default custom pronunciation mappings
+DEFAULT_PRONUNCIATIONS = {
+    'API': 'A P I',
+    'URL': 'U R L',
+    'HTTP': 'H T T P',
+    'HTTPS': 'H T T P S',
+    'AI': 'A I',
+    'ML': 'M L',
+    'UI': 'U I',
+    'UX': 'U X'
+}
+
+
 class TTSPreprocessor:
     """Service class for preprocessing text for TTS (Text-to-Speech) using Cartesia guidelines."""
     
-    def __init__(self):
-        """Initialize the TTS preprocessor with default configurations."""
-        import re
+    def __init__(self, lexicon: Optional[PronunciationLexicon] = None):
+        """Initialize the TTS preprocessor with default configurations.
         
+        Args:
+            lexicon: Pronunciation lexicon to start from, e.g. one loaded once per
+                     worker process. It is copied, so add/remove calls on this
+                     preprocessor never affect other users of the lexicon.
+                     Defaults to DEFAULT_PRONUNCIATIONS.
+        """
         # Regular expressions for various patterns
         self.date_pattern = re.compile(r'\b(\d{1,2})[\/\-](\d{1,2})[\/\-](\d{4})\b')
         self.time_pattern = re.compile(r'\b(\d{1,2}):(\d{2})\s*(AM|PM|A\.M\.|P\.M\.)\b', re.IGNORECASE)
@@ -14,17 +47,23 @@ class TTSPreprocessor:
         self.single_question_pattern = re.compile(r'([^?])\?(\s|$)')
         self.email_url_question_pattern = re.compile(r'(@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}|\.ai|\.com|\.org|\.net)\?')
         
-        # Custom pronunciation mappings
-        self.custom_pronunciations = {
-            'API': 'A P I',
-            'URL': 'U R L',
-            'HTTP': 'H T T P',
-            'HTTPS': 'H T T P S',
-            'AI': 'A I',
-            'ML': 'M L',
-            'UI': 'U I',
-            'UX': 'U X'
-        }
+        # Merged patterns used by the rewrite engine
+        self._slash_date_pattern = re.compile(
+            r'(?P<date>\b(?P<month>\d{1,2})[\/\-](?P<day>\d{1,2})[\/\-](?P<year>\d{4})\b)|(?P<slash>/)'
+        )
+        self._times_pattern = re.compile(
+            r'(?P<time_minutes>\b(?P<minutes_hour>\d{1,2}):(?P<minutes_minute>\d{2})\s*'
+            r'(?P<minutes_period>AM|PM|A\.M\.|P\.M\.)\b)'
+            r'|(?P<time_simple>\b(?P<simple_hour>\d{1,2})\s*(?P<simple_period>AM|PM|A\.M\.|P\.M\.)\b)',
+            re.IGNORECASE
+        )
+        self._quote_colon_table = str.maketrans({'"': None, "'": None, ':': '-'})
+        
+        # Custom pronunciation mappings, matched in a single scan
+        if lexicon is not None:
+            self._lexicon = lexicon.copy()
+        else:
+            self._lexicon = PronunciationLexicon(DEFAULT_PRONUNCIATIONS)
         
         # Markdown patterns
         self.markdown_patterns = [
@@ -37,6 +76,73 @@ class TTSPreprocessor:
             (re.compile(r'^\s*\d+\.\s+(.*)$', re.MULTILINE), r'\1'),  # Numbered lists
             (re.compile(r'\[([^\]]+)\]\([^)]+\)'), r'\1'),  # Links [text](url)
         ]
+        
+        self._engine = self._build_rewrite_engine()
+    
+    @property
+    def custom_pronunciations(self) -> Dict[str, str]:
+        """Current word -> pronunciation mappings (a snapshot; use the add/remove methods to change them)."""
+        return self._lexicon.as_dict()
+    
+    def _build_rewrite_engine(self) -> RewriteEngine:
+        """Compile the process_for_tts pipeline into guarded, merged rewrite passes.
+        
+        The passes run in the same order as the step methods used by
+        _process_for_tts_stepwise and produce byte-identical output. Rules are only
+        merged into one scan where applying them together cannot change what
+        the sequential steps would match:
+        
+        - book title + star removal (disjoint literals)
+        - forward slashes + date normalization ('/' and '-' are interchangeable
+          in the date pattern, so slash rewriting never changes which dates match)
+        - times with and without minutes
+        - question emphasis + quotation marks + colons (the character captured
+          before a '?' gets the quote/colon rewrite applied in the handler)
+        - double dots + newlines
+        
+        The separate email pass is dropped: the URL pass already rewrites every
+        dot an email address could match on.
+        """
+        digits = "0123456789"
+        
+        # Characters that must be present for each markdown pattern to match, in pattern order
+        markdown_requires = [
+            ("markdown_bold", ["*"]),
+            ("markdown_italic", ["*"]),
+            ("markdown_code", ["`"]),
+            ("markdown_code_block", ["`"]),
+            ("markdown_headers", ["#"]),
+            ("markdown_bullets", ["-*+"]),
+            ("markdown_numbered", [".", digits]),
+            ("markdown_links", ["[", "]", "("]),
+        ]
+        markdown_passes = [
+            RewritePass(name, [(name, pattern.pattern, replacement)], requires=requires, flags=pattern.flags)
+            for (pattern, replacement), (name, requires) in zip(self.markdown_patterns, markdown_requires)
+        ]
+        
+        return RewriteEngine(markdown_passes + [
+            RewritePass("book_title_and_stars", [
+                ("book_title", r'\[LITERATURE_BOOK\]', BOOK_TITLE),
+                ("star", r'\*', ""),
+            ], requires=["[*"]),
+            CallablePass("slashes_and_dates", self._rewrite_slashes_and_dates, requires=["/-"]),
+            CallablePass("times", self._rewrite_times, requires=[digits, "mM"]),
+            RewritePass("urls", [("url", self.url_pattern.pattern, self._replace_url_dots)], requires=["."]),
+            RewritePass("questions_quotes_colons", [
+                ("question", r'(?P<question_before>[^?])\?(?P<question_after>\s|$)', self._replace_question),
+                ("quote", r'["\']', ""),
+                ("colon", r':', "-"),
+            ], requires=["?\"':"]),
+            CallablePass("custom_pronunciations", self._apply_custom_pronunciations),
+            RewritePass("url_email_questions",
+                        [("url_email_question", self.email_url_question_pattern.pattern, r'\1 ?')],
+                        requires=["?", "."]),
+            RewritePass("double_dots_and_newlines", [
+                ("double_dot", r'\.\.', "-"),
+                ("newline", r'\n', '<break time="1s"/>'),
+            ], requires=[".\n"]),
+        ])
     
     def process_for_tts(self, text: str, is_markdown: bool = False) -> str:
         """
@@ -52,6 +158,29 @@ class TTSPreprocessor:
         if not isinstance(text, str):
             return str(text) if text is not None else ""
         
+        return self._engine.rewrite(text)
+    
+    def create_stream_normalizer(self) -> StreamingTTSNormalizer:
+        """
+        Create a normalizer that applies process_for_tts to streamed text.
+        
+        Use one normalizer per generation: push() each delta and flush() at the end.
+        
+        Returns:
+            StreamingTTSNormalizer: A new normalizer bound to this preprocessor
+        """
+        return StreamingTTSNormalizer(self)
+    
+    def pronunciation_phrases(self) -> Iterator[Tuple[str, bool]]:
+        """Yield (word, case_sensitive) for custom pronunciations spanning several words."""
+        return self._lexicon.phrases()
+    
+    def _process_for_tts_stepwise(self, text: str) -> str:
+        """Reference implementation of process_for_tts: one full pass per step.
+        
+        Kept to document the pipeline order and to check the compiled rewrite
+        engine against (see test_tts_preprocessor.py).
+        """
         processed_text = text
         
         # Step 1: Convert markdown to plain text if needed
@@ -93,7 +222,7 @@ class TTSPreprocessor:
     
     def replace_book_title(self, text: str) -> str:
         processed = text
-        processed = processed.replace("[LITERATURE_BOOK]", "Neuromancer")
+        processed = processed.replace("[LITERATURE_BOOK]", BOOK_TITLE)
         return processed
     
     def _handle_forward_slashes(self, text: str) -> str:
@@ -115,6 +244,29 @@ class TTSPreprocessor:
 
         return temp_text
     
+    def _rewrite_slashes_and_dates(self, text: str) -> str:
+        """Single-scan equivalent of _handle_forward_slashes followed by _normalize_dates."""
+        # _handle_forward_slashes protects dates by replacing the first occurrence of
+        # each date string with a placeholder. When that occurrence is not the match
+        # itself (or the text already contains a placeholder), defer to the steps.
+        if "__DATE_PLACEHOLDER_" in text:
+            return self._normalize_dates(self._handle_forward_slashes(text))
+        
+        ambiguous = False
+        
+        def replace(match):
+            nonlocal ambiguous
+            if match.lastgroup == "slash":
+                return "-"
+            if text.find(match.group("date")) != match.start():
+                ambiguous = True
+            return f"{match.group('month').zfill(2)}/{match.group('day').zfill(2)}/{match.group('year')}"
+        
+        rewritten = self._slash_date_pattern.sub(replace, text)
+        if ambiguous:
+            return self._normalize_dates(self._handle_forward_slashes(text))
+        return rewritten
+    
     def _normalize_dates(self, text: str) -> str:
         """Convert dates to MM/DD/YYYY format."""
         def format_date(match):
@@ -144,6 +296,39 @@ class TTSPreprocessor:
         
         return text
     
+    def _rewrite_times(self, text: str) -> str:
+        """Single-scan equivalent of _normalize_times (times with minutes, then simple times)."""
+        # After a time with minutes whose period is dotted ("A.M."), the rewritten
+        # period ends in a letter, so the simple-time step no longer sees a word
+        # boundary right after it. Track that position and leave such matches alone.
+        glued_at = -1
+        
+        def replace(match):
+            nonlocal glued_at
+            if match.lastgroup == "time_minutes":
+                period = match.group("minutes_period")
+                if period.endswith("."):
+                    glued_at = match.end()
+                period_clean = period.upper().replace('.', '')
+                return f"{match.group('minutes_hour')}:{match.group('minutes_minute')} {period_clean}"
+            if match.start() == glued_at:
+                return match.group(0)
+            period_clean = match.group("simple_period").upper().replace('.', '')
+            return f"{match.group('simple_hour')} {period_clean}"
+        
+        return self._times_pattern.sub(replace, text)
+    
+    def _replace_url_dots(self, match) -> str:
+        """Replace dots in a URL match with ' dot '."""
+        protocol, domain_path = match.group(1), match.group(2)
+        protocol_part = protocol if protocol else ""
+        return f"{protocol_part}{domain_path.replace('.', ' dot ')}"
+    
+    def _replace_question(self, match) -> str:
+        """Emphasize a question mark, applying the quote and colon rewrites to the preceding character."""
+        before = match.group("question_before").translate(self._quote_colon_table)
+        return f"{before}??{match.group('question_after')}"
+    
     def _handle_urls_and_emails(self, text: str) -> str:
         """Replace dots in URLs with 'dot' for better pronunciation."""
         def replace_url_dots(match):
@@ -182,14 +367,7 @@ class TTSPreprocessor:
     
     def _apply_custom_pronunciations(self, text: str) -> str:
         """Apply custom pronunciations for domain-specific words."""
-        import re
-        
-        processed = text
-        for word, pronunciation in self.custom_pronunciations.items():
-            # Use word boundaries to avoid partial matches
-            pattern = re.compile(r'\b' + re.escape(word) + r'\b', re.IGNORECASE)
-            processed = pattern.sub(pronunciation, processed)
-        return processed
+        return self._lexicon.apply(text)
     
     def _add_appropriate_punctuation(self, text: str) -> str:
         """Add punctuation where appropriate."""
@@ -255,15 +433,16 @@ class TTSPreprocessor:
         else:
             return text[:position] + break_tag + text[position:]
     
-    def add_custom_pronunciation(self, word: str, pronunciation: str) -> None:
+    def add_custom_pronunciation(self, word: str, pronunciation: str, case_sensitive: bool = False) -> None:
         """
         Add a custom pronunciation mapping.
         
         Args:
             word (str): The word to replace
             pronunciation (str): The pronunciation to use
+            case_sensitive (bool): Only replace the word with exactly this casing
         """
-        self.custom_pronunciations[word] = pronunciation
+        self._lexicon.add(word, pronunciation, case_sensitive)
     
     def remove_custom_pronunciation(self, word: str) -> None:
         """
@@ -272,4 +451,16 @@ class TTSPreprocessor:
         Args:
             word (str): The word to remove from pronunciations
         """
-        self.custom_pronunciations.pop(word, None)
+        self._lexicon.remove(word)
+    
+    def load_pronunciation_lexicon(self, path: str) -> int:
+        """
+        Load custom pronunciation mappings from a lexicon file.
+        
+        Args:
+            path (str): Path of a JSON or tab-separated lexicon file
+            
+        Returns:
+            int: Number of entries loaded
+        """
+        return self._lexicon.load_file(path)
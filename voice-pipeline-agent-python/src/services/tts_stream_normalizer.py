@@ -0,0 +1,195 @@
+import re
+from typing import List, Tuple
+
+# Characters that some rewrite starts on when they begin a line (headers, bullets,
+# numbered lists), that depend on the character before them (question marks) or
+# that the markdown passes may delete, exposing what follows (emphasis stars,
+# inline code, link brackets). A chunk handed to process_for_tts is always
+# treated as starting a line, so it must never start with one of these.
+_UNSAFE_CHUNK_START = frozenset("#-*+?`[0123456789")
+
+# Periods that the time rewrite joins to a preceding number across whitespace ("5 PM")
+_TIME_PERIOD_START = frozenset("aApP")
+
+# Markdown markers that may be deleted before the time and pronunciation rewrites run
+_MARKERS = "*`"
+# Skipped when looking for the number before a period; list and header markers
+# are included because the list patterns may delete whole marker lines
+_TIME_SKIPPED = " \t\r\n\f\v#+-." + _MARKERS
+_TIME_LOOKBACK = 80
+_PHRASE_SKIPPED = str.maketrans("", "", _MARKERS + "\"'")
+
+# Markdown links, allowing for emphasis and code markers that earlier passes
+# delete between ']' and '('
+_LINK_PATTERN = re.compile(r'\[([^\]]+)\][*`]*\([^)]+\)')
+
+# A star preceded on its line only by whitespace, list/header markers and backticks
+_LEADING_STAR_PATTERN = re.compile(r'[\s#+\-.\d`]*\*')
+
+# Upper bound on the text held back waiting for a closing marker (e.g. an unclosed
+# '[' or inline code span). Past it the normalizer cuts at the last word boundary
+# anyway, trading exactness on malformed markdown for bounded latency.
+MAX_PENDING_CHARS = 400
+
+
+class StreamingTTSNormalizer:
+    """Applies TTSPreprocessor.process_for_tts to a stream of LLM deltas.
+
+    Processing each delta on its own misses anything split across deltas
+    (dates, times, URLs, ``**bold**`` spans, ``[LITERATURE_BOOK]``). This class
+    buffers the stream and only hands process_for_tts prefixes that end at a
+    safe cut point: right after whitespace, where no rewrite rule can match
+    across the cut. Everything before the last safe cut is processed and
+    returned immediately, so normally only the last, possibly incomplete, word
+    is held back. Text is held longer only while a construct that needs a
+    closing marker is open (an unclosed link bracket, an odd number of
+    backticks, a star bullet with an unclosed emphasis star on the same line) or
+    while the tail could be the start of a multi-word pronunciation entry.
+
+    The concatenation of everything returned by push() and flush() equals
+    process_for_tts on the whole text, except for markdown left open for more
+    than MAX_PENDING_CHARS characters and for the rare date strings that
+    _handle_forward_slashes resolves by searching the whole text (a date glued
+    to a word, e.g. "x12/12/2023", repeated later in the answer).
+    """
+
+    def __init__(self, preprocessor, max_pending: int = MAX_PENDING_CHARS):
+        """Initialize the normalizer.
+
+        Args:
+            preprocessor: The TTSPreprocessor whose process_for_tts is applied
+            max_pending: Maximum number of characters held back for open markdown
+        """
+        self._preprocessor = preprocessor
+        self._max_pending = max_pending
+        self._pending = ""
+        self._phrases: List[Tuple[str, bool]] = [
+            (phrase if case_sensitive else phrase.lower(), case_sensitive)
+            for phrase, case_sensitive in preprocessor.pronunciation_phrases()
+        ]
+
+    @property
+    def pending(self) -> str:
+        """Text received but not processed yet."""
+        return self._pending
+
+    def push(self, text: str) -> str:
+        """Add a delta and return the processed text that is safe to emit.
+
+        Args:
+            text: The next piece of LLM output
+
+        Returns:
+            str: Processed text for the safe prefix (possibly empty)
+        """
+        if not text:
+            return ""
+
+        self._pending += text
+        cut = self._find_cut(self._pending)
+        if cut == 0 and len(self._pending) > self._max_pending:
+            cut = self._last_word_boundary(self._pending)
+        if cut == 0:
+            return ""
+
+        ready, self._pending = self._pending[:cut], self._pending[cut:]
+        return self._preprocessor.process_for_tts(ready)
+
+    def flush(self) -> str:
+        """Process and return everything still held back (call at generation end).
+
+        Returns:
+            str: Processed text for the remaining tail
+        """
+        ready, self._pending = self._pending, ""
+        if not ready:
+            return ""
+        return self._preprocessor.process_for_tts(ready)
+
+    def _find_cut(self, text: str) -> int:
+        """Return the largest safe cut position in text, or 0 if there is none."""
+        limit = min(self._unresolved_link_start(text), len(text) - 1)
+        link_spans = [match.span() for match in _LINK_PATTERN.finditer(text)]
+
+        # The character after the cut must be known, so the last one is never a candidate
+        for cut in range(limit, 0, -1):
+            if not text[cut - 1].isspace() or text[cut].isspace():
+                continue
+            if self._is_safe_cut(text, cut, link_spans):
+                return cut
+        return 0
+
+    def _is_safe_cut(self, text: str, cut: int, link_spans: List[Tuple[int, int]]) -> bool:
+        first = text[cut]
+        if first in _UNSAFE_CHUNK_START:
+            return False
+
+        # "5 " + "PM" is one time expression, also across markers deleted before the time rewrite
+        if first in _TIME_PERIOD_START and self._ends_with_number(text, cut):
+            return False
+
+        for start, end in link_spans:
+            if start < cut < end:
+                return False
+
+        line_start = text.rfind("\n", 0, cut) + 1
+        # Unpaired backticks are kept, so pairing must not change across the cut
+        if text.count("`", line_start, cut) % 2:
+            return False
+        # Stars are removed whether or not they pair up as emphasis, except that an
+        # unpaired star at the start of a line is a bullet marker (and pairing one
+        # changes the whitespace the list patterns strip)
+        line = text[line_start:cut]
+        if line.count("*") % 2 and _LEADING_STAR_PATTERN.match(line):
+            return False
+
+        return not self._splits_phrase(text, cut)
+
+    @staticmethod
+    def _ends_with_number(text: str, cut: int) -> bool:
+        """Return True if a number could end right before the cut once markdown is removed."""
+        before = _LINK_PATTERN.sub(r'\1', text[max(0, cut - _TIME_LOOKBACK):cut])
+        return before.rstrip(_TIME_SKIPPED)[-1:].isdigit()
+
+    def _splits_phrase(self, text: str, cut: int) -> bool:
+        """Return True if a multi-word pronunciation entry could span the cut."""
+        for phrase, case_sensitive in self._phrases:
+            # Markers and quotes are deleted before pronunciations are applied
+            window = 4 * len(phrase)
+            before = text[max(0, cut - window):cut].translate(_PHRASE_SKIPPED)
+            after = text[cut:cut + window].translate(_PHRASE_SKIPPED)
+            if not case_sensitive:
+                before, after = before.lower(), after.lower()
+            for split in range(1, len(phrase)):
+                if not phrase[split - 1].isspace():
+                    continue
+                if before.endswith(phrase[:split]) and (
+                    phrase[split:].startswith(after) or after.startswith(phrase[split:])
+                ):
+                    return True
+        return False
+
+    @staticmethod
+    def _unresolved_link_start(text: str) -> int:
+        """Return the position of the first '[' that could still open a link, or len(text)."""
+        position = text.find("[")
+        while position != -1:
+            close = text.find("]", position + 1)
+            if close == -1:
+                return position
+            after = close + 1
+            while after < len(text) and text[after] in "*`":
+                after += 1
+            if after == len(text):
+                return position
+            if text[after] == "(" and text.find(")", after + 1) == -1:
+                return position
+            position = text.find("[", position + 1)
+        return len(text)
+
+    @staticmethod
+    def _last_word_boundary(text: str) -> int:
+        for cut in range(len(text) - 1, 0, -1):
+            if text[cut - 1].isspace() and not text[cut].isspace():
+                return cut
+        return 0
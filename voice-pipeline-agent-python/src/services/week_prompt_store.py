@@ -0,0 +1,226 @@
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, List, Optional, Tuple
+
+from config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+DAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+PERIODS = ("morning", "noon", "afternoon")
+
+_SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Looked up next to the code, whatever the working directory
+DEFAULT_WEEK_PROMPT_PATHS = (
+    os.path.join(_SRC_DIR, "data", "week-prompt.json"),
+    os.path.join(_SRC_DIR, "config", "week-prompt.json"),
+)
+
+# (base prompt, RAG queries) for one (day, period)
+PromptEntry = Tuple[str, Tuple[str, ...]]
+
+
+def parse_week_prompts(data: Any) -> List[Optional[PromptEntry]]:
+    """Validate week-prompt.json contents and index them by (day, period).
+
+    The file maps day names to period names to ``{"prompt": str, "query": str | [str]}``.
+    Days and periods may be missing (sessions then use the default instructions);
+    unknown names, empty prompts and malformed queries are errors.
+
+    Args:
+        data: The parsed JSON
+
+    Returns:
+        One slot per (day, period), DAYS-major, holding (prompt, queries) or None
+
+    Raises:
+        ValueError: Listing every problem found
+    """
+    errors = []
+    table: List[Optional[PromptEntry]] = [None] * (len(DAYS) * len(PERIODS))
+    if not isinstance(data, dict):
+        raise ValueError("week prompts must be an object of days")
+
+    for day, periods in data.items():
+        if day not in DAYS:
+            errors.append(f"unknown day {day!r}")
+            continue
+        if not isinstance(periods, dict):
+            errors.append(f"{day}: must be an object of periods")
+            continue
+        for period, entry in periods.items():
+            where = f"{day}.{period}"
+            if period not in PERIODS:
+                errors.append(f"{where}: unknown period, expected one of {PERIODS}")
+                continue
+            if not isinstance(entry, dict):
+                errors.append(f"{where}: must be an object with a prompt")
+                continue
+            prompt = entry.get("prompt")
+            if not isinstance(prompt, str) or not prompt.strip():
+                errors.append(f"{where}.prompt: must be a non-empty string")
+                continue
+            query = entry.get("query")
+            queries = [query] if isinstance(query, str) else query if query is not None else []
+            if not isinstance(queries, list) or not all(isinstance(q, str) and q.strip() for q in queries):
+                errors.append(f"{where}.query: must be a non-empty string or a list of them")
+                continue
+            table[DAYS.index(day) * len(PERIODS) + PERIODS.index(period)] = (prompt, tuple(queries))
+
+    if errors:
+        raise ValueError("; ".join(errors))
+    return table
+
+
+class WeekPrompts:
+    """One immutable, validated version of the week prompts."""
+
+    def __init__(self, table: List[Optional[PromptEntry]], version: Tuple[int, ...] = ()):
+        self._table = tuple(table)
+        self.version = version
+
+    def get(self, bucket: Tuple[str, str]) -> Optional[PromptEntry]:
+        """Return (base_prompt, queries) for a (day, period) bucket, or None if it has no prompt."""
+        day, period = bucket
+        try:
+            return self._table[DAYS.index(day) * len(PERIODS) + PERIODS.index(period)]
+        except ValueError:
+            return None
+
+    def __bool__(self) -> bool:
+        return any(entry is not None for entry in self._table)
+
+    def __len__(self) -> int:
+        return sum(entry is not None for entry in self._table)
+
+
+class WeekPromptStore:
+    """Process-wide week prompts, reloaded when the file changes.
+
+    The file is parsed and validated once per change rather than once per
+    InstructionsService. ``current()`` returns the active WeekPrompts; a reload
+    builds a new one and replaces the reference, so readers never see a
+    half-loaded version and need no lock. A file that fails to parse or validate
+    is logged and ignored, and the previous version stays active.
+
+    A watcher thread polls the file's mtime, size and inode every
+    ``poll_interval`` seconds. Editors' save-by-rename counts as a change too.
+    Listeners are called after each swap; InstructionsService uses this to
+    rebuild the cached prompts that changed.
+    """
+
+    def __init__(self, path: Optional[str] = None, poll_interval: float = 5.0):
+        """Initialize the store and load the file.
+
+        Args:
+            path: week-prompt.json to serve. If None, the first of DEFAULT_WEEK_PROMPT_PATHS that exists.
+            poll_interval: Seconds between change checks once watching
+        """
+        self.path = path or next(
+            (candidate for candidate in DEFAULT_WEEK_PROMPT_PATHS if os.path.exists(candidate)),
+            DEFAULT_WEEK_PROMPT_PATHS[0]
+        )
+        self.poll_interval = poll_interval
+        self._prompts = WeekPrompts([])
+        self._stat: Optional[Tuple[int, ...]] = None
+        self._generation = 0
+        self._listeners: List[Callable[[WeekPrompts], None]] = []
+        self._reload_lock = threading.Lock()
+        self._watch_thread: Optional[threading.Thread] = None
+        self._watch_stop = threading.Event()
+        if not self.reload():
+            logger.warning(f"{self.path} could not be loaded, using default instructions")
+
+    def current(self) -> WeekPrompts:
+        return self._prompts
+
+    def add_listener(self, callback: Callable[[WeekPrompts], None]) -> None:
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[WeekPrompts], None]) -> None:
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _file_stat(self) -> Optional[Tuple[int, ...]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def reload(self, force: bool = False) -> bool:
+        """Load the file if it changed since the last load.
+
+        Args:
+            force: Load even if the file looks unchanged
+
+        Returns:
+            bool: True if a new version is active
+        """
+        with self._reload_lock:
+            stat = self._file_stat()
+            if stat is None or (stat == self._stat and not force):
+                return False
+            # Remembered even if the file is invalid, so a bad edit is reported once
+            self._stat = stat
+            try:
+                with open(self.path, 'r', encoding='utf-8') as file:
+                    table = parse_week_prompts(json.load(file))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Keeping the previous week prompts, {self.path} is invalid: {e}")
+                return False
+            self._generation += 1
+            prompts = WeekPrompts(table, version=(self._generation, *stat))
+            self._prompts = prompts
+
+        logger.info(f"Loaded {len(prompts)} week prompts from {self.path}")
+        for listener in list(self._listeners):
+            try:
+                listener(prompts)
+            except Exception as e:
+                logger.warning(f"Week prompt listener failed: {e}")
+        return True
+
+    def start_watching(self) -> None:
+        """Start the thread that reloads the file when it changes (no-op if running)."""
+        if self._watch_thread is not None and self._watch_thread.is_alive():
+            return
+        self._watch_stop = threading.Event()
+        self._watch_thread = threading.Thread(
+            target=self._watch_loop, args=(self._watch_stop,),
+            name="week-prompt-watcher", daemon=True
+        )
+        self._watch_thread.start()
+
+    def stop_watching(self) -> None:
+        self._watch_stop.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join(timeout=5)
+            self._watch_thread = None
+
+    def _watch_loop(self, stop: threading.Event) -> None:
+        while not stop.wait(self.poll_interval):
+            try:
+                self.reload()
+            except Exception as e:
+                logger.warning(f"Week prompt watcher error: {e}")
+
+
+_store: Optional[WeekPromptStore] = None
+_store_lock = threading.Lock()
+
+
+def get_week_prompt_store() -> WeekPromptStore:
+    """Return this process's WeekPromptStore, created from Settings and watching its file."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                settings = Settings()
+                store = WeekPromptStore(settings.week_prompts_path, settings.week_prompts_poll_interval)
+                if settings.week_prompts_poll_interval > 0:
+                    store.start_watching()
+                _store = store
+    return _store
@@ -0,0 +1,287 @@
+import asyncio
+import contextlib
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Job process load files live next to the latency snapshots, in their own directory
+LOAD_SUBDIR = "load"
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class LoopLagReporter:
+    """Measures event loop lag in a job process and publishes it to the worker's main process.
+
+    A task sleeps ``interval`` seconds at a time; how late it wakes up is the
+    time other work kept the loop busy (embedding, regex preprocessing, turn
+    detection). The p95 over the last ``window`` samples is written to
+    ``<snapshot_dir>/load/<pid>.json`` every ``publish_interval`` seconds, where
+    WorkerLoad reads it. The file is removed when the reporter stops, so an idle
+    process adds no load.
+    """
+
+    def __init__(self, snapshot_dir: Optional[str], interval: float = 0.1, window: int = 50,
+                 publish_interval: float = 1.0):
+        """Initialize the reporter.
+
+        Args:
+            snapshot_dir: Metrics snapshot directory. If empty, lag is measured but not published.
+            interval: Seconds between lag samples
+            window: Number of recent samples the p95 is taken over
+            publish_interval: Minimum seconds between file writes
+        """
+        self.path = os.path.join(snapshot_dir, LOAD_SUBDIR, f"{os.getpid()}.json") if snapshot_dir else None
+        self.interval = interval
+        self.publish_interval = publish_interval
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.sessions = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start sampling on the running loop (no-op if already running)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        self.samples.clear()
+        if self.path:
+            with contextlib.suppress(OSError):
+                os.remove(self.path)
+
+    def lag_p95(self) -> float:
+        return _percentile(list(self.samples), 0.95)
+
+    async def _run(self) -> None:
+        last_publish = 0.0
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self.samples.append(max(0.0, now - start - self.interval))
+            if now - last_publish >= self.publish_interval:
+                self.publish()
+                last_publish = now
+
+    def publish(self) -> None:
+        """Write the current lag and session count (atomically)."""
+        if not self.path:
+            return
+        data = {"pid": os.getpid(), "updated_at": time.time(),
+                "lag_p95": self.lag_p95(), "sessions": self.sessions}
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(data, file)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to write load file {self.path}: {e}")
+
+
+def _process_alive(pid: Optional[int]) -> bool:
+    # A stale file without a valid pid cannot belong to a process we could still hear from
+    if not isinstance(pid, int) or pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # e.g. EPERM: the process exists but belongs to another user
+        return True
+    return True
+
+
+def read_job_loads(snapshot_dir: str, max_age: float = 10.0) -> List[Dict[str, Any]]:
+    """Read the load files of the job processes.
+
+    A file not updated for ``max_age`` seconds belongs to a dead process (skipped)
+    or to one whose event loop is blocked, in which case its lag is at least the
+    time since the last update.
+
+    Args:
+        snapshot_dir: Metrics snapshot directory
+        max_age: Seconds after which a file counts as stale
+
+    Returns:
+        The contents of each load file of a live process
+    """
+    loads = []
+    now = time.time()
+    for path in glob.glob(os.path.join(snapshot_dir, LOAD_SUBDIR, "*.json")):
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            # Removed by its process between glob and open, or never written completely
+            continue
+        age = now - data.get("updated_at", 0)
+        if age > max_age:
+            if not _process_alive(data.get("pid")):
+                continue
+            data["lag_p95"] = max(data.get("lag_p95", 0.0), age)
+        loads.append(data)
+    return loads
+
+
+class CpuSampler:
+    """CPU utilization of this container as a fraction of its CPU limit.
+
+    Reads the cgroup v2 usage counter and quota, which is what the pod is
+    throttled against. Outside a cgroup v2 container it falls back to
+    psutil's system-wide utilization.
+    """
+
+    def __init__(self, cgroup_dir: str = "/sys/fs/cgroup"):
+        self.cgroup_dir = cgroup_dir
+        self._last: Optional[Tuple[float, float]] = None
+        self._cpus = self._cpu_limit()
+
+    def _cpu_limit(self) -> float:
+        try:
+            with open(os.path.join(self.cgroup_dir, "cpu.max"), 'r') as file:
+                quota, period = file.read().split()
+            if quota != "max":
+                return int(quota) / int(period)
+        except (OSError, ValueError):
+            pass
+        return float(os.cpu_count() or 1)
+
+    def _usage_seconds(self) -> Optional[float]:
+        try:
+            with open(os.path.join(self.cgroup_dir, "cpu.stat"), 'r') as file:
+                for line in file:
+                    key, value = line.split()
+                    if key == "usage_usec":
+                        return int(value) / 1e6
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def sample(self) -> float:
+        """Utilization (0-1) since the previous call; 0.0 on the first cgroup call."""
+        usage = self._usage_seconds()
+        if usage is None:
+            import psutil  # installed with livekit-agents
+
+            return psutil.cpu_percent(interval=None) / 100.0
+        now = time.monotonic()
+        last, self._last = self._last, (now, usage)
+        if last is None or now <= last[0]:
+            return 0.0
+        return min(1.0, (usage - last[1]) / (now - last[0]) / self._cpus)
+
+
+class WorkerLoad:
+    """Load function and job admission for the worker's main process.
+
+    The load passed to LiveKit is the largest of three ratios, each 1.0 at capacity:
+
+    - sessions / ``max_sessions`` (the worker's running jobs)
+    - worst job-process event loop lag p95 / ``lag_budget``
+    - container CPU utilization
+
+    At or above the worker's load threshold, LiveKit stops sending jobs, so
+    an overloaded pod sheds new sessions before their replies slow down.
+    ``request_fnc`` also rejects jobs once ``max_sessions`` is reached, which
+    covers the seconds between two load updates.
+
+    LiveKit calls the load function from a thread pool, so state is locked.
+    """
+
+    def __init__(self, snapshot_dir: str, max_sessions: int = 0, lag_budget: float = 0.1,
+                 cpu_sampler: Optional[CpuSampler] = None):
+        """Initialize the load calculator.
+
+        Args:
+            snapshot_dir: Metrics snapshot directory the job processes publish lag to
+            max_sessions: Sessions per worker at which it is full (0: no session limit)
+            lag_budget: Event loop lag p95 (seconds) at which the worker is full
+            cpu_sampler: CPU utilization source (default: CpuSampler())
+        """
+        self.snapshot_dir = snapshot_dir
+        self.max_sessions = max_sessions
+        self.lag_budget = lag_budget
+        self.cpu_sampler = cpu_sampler or CpuSampler()
+        self._lock = threading.Lock()
+        self._active_jobs = 0
+        self._admitted = 0
+        self._gauges: Dict[str, float] = {}
+
+    def sessions(self) -> int:
+        with self._lock:
+            return self._active_jobs + self._admitted
+
+    def __call__(self, worker: Any = None) -> float:
+        """Compute the load; used as WorkerOptions.load_fnc.
+
+        Args:
+            worker: The LiveKit Worker, whose active_jobs are the running sessions
+
+        Returns:
+            float: Load between 0 and 1
+        """
+        loads = read_job_loads(self.snapshot_dir) if self.snapshot_dir else []
+        lag = max((load.get("lag_p95", 0.0) for load in loads), default=0.0)
+        if worker is not None:
+            active_jobs = len(worker.active_jobs)
+        else:
+            active_jobs = sum(load.get("sessions", 0) for load in loads)
+        cpu = self.cpu_sampler.sample()
+
+        with self._lock:
+            self._active_jobs = active_jobs
+            # Accepted jobs show up in active_jobs once assigned
+            self._admitted = 0
+            sessions = active_jobs
+        session_load = sessions / self.max_sessions if self.max_sessions else 0.0
+        lag_load = lag / self.lag_budget if self.lag_budget else 0.0
+        load = min(1.0, max(session_load, lag_load, cpu))
+
+        with self._lock:
+            self._gauges = {
+                "worker_load": load,
+                "worker_active_sessions": sessions,
+                "worker_cpu_utilization": cpu,
+                "event_loop_lag_seconds": lag,
+            }
+        return load
+
+    def gauges(self) -> Dict[str, float]:
+        """The figures of the last load computation, for /metrics."""
+        with self._lock:
+            return dict(self._gauges)
+
+    def admit(self) -> bool:
+        """Reserve a session slot for a job request; False if the worker is full."""
+        with self._lock:
+            if self.max_sessions and self._active_jobs + self._admitted >= self.max_sessions:
+                return False
+            self._admitted += 1
+            return True
+
+    async def request_fnc(self, request: Any) -> None:
+        """WorkerOptions.request_fnc: accept the job unless max_sessions is reached."""
+        if self.admit():
+            await request.accept()
+        else:
+            logger.info(f"rejecting job for room {request.room.name}: {self.sessions()} sessions running")
+            await request.reject()